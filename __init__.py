@@ -18,6 +18,7 @@ __author__ = "HR-Avatar Team"
 
 # Импорты для удобного доступа
 from .gigachat_client import GigaChatClient
+from .async_gigachat_client import AsyncGigaChatClient
 from .resume_parser import ResumeParser
 from .interview_agent import InterviewAgent
 from .analyzer import InterviewAnalyzer
@@ -26,6 +27,7 @@ from .voice_service import VoiceService
 # Экспортируемые объекты
 __all__ = [
     'GigaChatClient',
+    'AsyncGigaChatClient',
     'ResumeParser',
     'InterviewAgent',
     'InterviewAnalyzer',
@@ -0,0 +1,155 @@
+# services/analysis_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from config import Config
+from .cache import TieredCache
+from .embedding_backends import get_embedding_backend
+
+
+class ResumeAnalysisCache:
+    """Мемоизация анализа загруженных резюме по содержимому файла.
+
+    Текст резюме кэшируется по SHA-256 байтов файла, результат анализа
+    (навыки и оценка) - по хэшу файла, навыкам вакансии и версии моделей.
+    Кэш общий для процесса и хранится в SQLite, поэтому одинаковые загрузки
+    из разных сессий Streamlit и после перезапуска анализируются один раз.
+    """
+
+    def __init__(self, max_items=None, path=None, ttl=None, max_bytes=None):
+        self.store = TieredCache(
+            max_items=max_items or Config.ANALYSIS_CACHE_MEMORY_ITEMS,
+            path=path or Config.ANALYSIS_CACHE_FILE,
+            table="resume_analysis",
+            ttl=ttl or Config.ANALYSIS_CACHE_TTL,
+            max_bytes=max_bytes or Config.ANALYSIS_CACHE_MAX_BYTES
+        )
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def model_version():
+        """Все, от чего зависит результат анализа, кроме файла и вакансии"""
+        return "|".join([
+            Config.ANALYSIS_CACHE_VERSION,
+            Config.GIGACHAT_MODEL,
+            # Модель, бэкенд (torch/onnx) и квантизация эмбеддингов
+            Config.EMBEDDING_BACKEND,
+            get_embedding_backend().cache_name,
+            str(Config.RESUME_TEXT_MAX_CHARS)
+        ])
+
+    def _text_key(self, digest):
+        return f"text:{digest}:{Config.RESUME_TEXT_MAX_CHARS}"
+
+    def _analysis_key(self, digest, required_skills):
+        raw = json.dumps([digest, sorted(required_skills), self.model_version()], ensure_ascii=False)
+        return "analysis:" + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def analyze(self, data, filename, required_skills, parser_factory, save_dir=None):
+        """Анализ резюме из байтов загруженного файла.
+
+        parser_factory вызывается только при промахе кэша, чтобы не создавать
+        ResumeParser (клиент GigaChat, модель эмбеддингов) на каждый перезапуск скрипта.
+        Возвращает (analysis, resume_text, from_cache).
+        """
+        digest = self.content_hash(data)
+        key = self._analysis_key(digest, required_skills)
+
+        cached = self.store.get(key)
+        if cached is not None:
+            return cached["analysis"], cached["text"], True
+
+        # Одновременные одинаковые загрузки ждут первый расчет
+        with self._key_lock(key):
+            cached = self.store.get(key)
+            if cached is not None:
+                return cached["analysis"], cached["text"], True
+
+            parser = parser_factory()
+            text = self.store.get(self._text_key(digest))
+            if text is None:
+                text = self._extract_text(parser, data, filename, save_dir)
+                if text.strip():
+                    self.store.set(self._text_key(digest), text)
+
+            analysis = parser.parse_resume(text, required_skills)
+            # Пустой текст - скорее ошибка чтения файла, а навыки резервного метода
+            # (GigaChat не ответил) - временный результат: такое не запоминаем
+            if text.strip() and not analysis.get("skills_fallback"):
+                self.store.set(key, {"analysis": analysis, "text": text})
+            return analysis, text, False
+
+    @staticmethod
+    def _extract_text(parser, data, filename, save_dir):
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+            file_path = os.path.join(save_dir, os.path.basename(filename))
+            with open(file_path, "wb") as f:
+                f.write(data)
+            return parser.extract_text(file_path)
+
+        suffix = os.path.splitext(filename)[1]
+        fd, file_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            return parser.extract_text(file_path)
+        finally:
+            os.remove(file_path)
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._inflight.get(key)
+            if lock is None:
+                lock = self._inflight[key] = _KeyLock(self, key)
+            lock.users += 1
+            return lock
+
+    def _release_key(self, key_lock):
+        with self._lock:
+            key_lock.users -= 1
+            if key_lock.users == 0:
+                self._inflight.pop(key_lock.key, None)
+
+    def get_stats(self):
+        return self.store.get_stats()
+
+
+class _KeyLock:
+    """Блокировка одного ключа; удаляется из реестра, когда ее никто не ждет"""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.users = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+        self.cache._release_key(self)
+
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Общий для процесса кэш анализа резюме"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = ResumeAnalysisCache()
+    return _analysis_cache
\ No newline at end of file
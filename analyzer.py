@@ -1,17 +1,199 @@
 # services/analyzer.py
 from .gigachat_client import GigaChatClient
+from .async_gigachat_client import AsyncGigaChatClient
+from .llm_scheduler import estimate_tokens
+from .skill_normalizer import ASSESSMENT_RANK, get_skill_normalizer
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from config import Config
+import asyncio
 import json
 import re
 
+# Поля отчета analyze_interview и их типы (одинаковые во всех режимах анализа)
+ANALYSIS_FIELDS = {
+    "overall_score": int,
+    "strengths": list,
+    "weaknesses": list,
+    "skill_assessment": dict,
+    "recommendation": str,
+    "feedback": str
+}
+RECOMMENDATIONS = ("hire", "reject", "additional_interview")
+
 
 class InterviewAnalyzer:
     def __init__(self):
         self.giga_client = GigaChatClient()
+        self.async_client = None
 
-    def analyze_interview(self, conversation_history, required_skills, vacancy_name="Разработчик"):
+    def analyze_interview(self, conversation_history, required_skills, vacancy_name="Разработчик", use_cache=None):
         """Анализ результатов собеседования"""
+        if Config.ANALYSIS_MODE == "chunked":
+            return self._analyze_chunked(conversation_history, required_skills, vacancy_name, use_cache)
+
+        conversation_text = self._format_conversation(conversation_history)
+        messages = self._build_analysis_messages(
+            conversation_text[:Config.ANALYSIS_SINGLE_MAX_CHARS], required_skills, vacancy_name
+        )
+        response = self.giga_client.get_chat_response(messages, temperature=0.3, use_cache=use_cache)
+        return self._finish(self._parse_analysis_response(response, conversation_text), conversation_text)
+
+    async def analyze_interview_async(self, conversation_history, required_skills, vacancy_name="Разработчик",
+                                      use_cache=None):
+        """Асинхронный анализ результатов собеседования"""
+        if self.async_client is None:
+            self.async_client = AsyncGigaChatClient(self.giga_client)
+
+        if Config.ANALYSIS_MODE == "chunked":
+            chunks = self._split_conversation(conversation_history)
+            partials = await asyncio.gather(*(
+                self.async_client.get_chat_response(
+                    self._build_analysis_messages(chunk, required_skills, vacancy_name, (i + 1, len(chunks))),
+                    temperature=0.3, use_cache=use_cache
+                ) for i, chunk in enumerate(chunks)
+            ), return_exceptions=True)
+            return await asyncio.to_thread(self._reduce_chunks, chunks, partials, required_skills)
+
         conversation_text = self._format_conversation(conversation_history)
+        messages = self._build_analysis_messages(
+            conversation_text[:Config.ANALYSIS_SINGLE_MAX_CHARS], required_skills, vacancy_name
+        )
+        response = await self.async_client.get_chat_response(messages, temperature=0.3, use_cache=use_cache)
+        return await asyncio.to_thread(self._finish, self._parse_analysis_response(response, conversation_text),
+                                       conversation_text)
+
+    def _analyze_chunked(self, conversation_history, required_skills, vacancy_name, use_cache):
+        """Map-reduce: фрагменты диалога анализируются параллельно, отчеты сводятся локально"""
+        chunks = self._split_conversation(conversation_history)
+
+        def analyze_chunk(numbered):
+            number, chunk = numbered
+            messages = self._build_analysis_messages(chunk, required_skills, vacancy_name, (number, len(chunks)))
+            try:
+                return self.giga_client.get_chat_response(messages, temperature=0.3, use_cache=use_cache)
+            except Exception as e:
+                return e
+
+        if len(chunks) == 1:
+            partials = [analyze_chunk((1, chunks[0]))]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), Config.ANALYSIS_MAP_CONCURRENCY)) as pool:
+                partials = list(pool.map(analyze_chunk, enumerate(chunks, 1)))
+        return self._reduce_chunks(chunks, partials, required_skills)
+
+    def _split_conversation(self, history):
+        """Текст диалога фрагментами не длиннее ANALYSIS_CHUNK_TOKENS; пара вопрос-ответ не разрывается"""
+        units = []
+        for msg in history:
+            # Новая пара начинается с реплики интервьюера после ответа кандидата
+            if not units or (msg["role"] == "assistant" and units[-1][-1]["role"] == "user"):
+                units.append([])
+            units[-1].append(msg)
+
+        budget = Config.ANALYSIS_CHUNK_TOKENS
+        chunks = []
+        size = budget
+        for unit in units:
+            text = self._format_conversation(unit)
+            tokens = estimate_tokens([{"content": text}])
+            if tokens > budget:
+                # Очень длинный ответ - отдельный фрагмент, обрезанный по бюджету
+                text = text[:budget * 3]
+                tokens = budget
+            if size + tokens > budget:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(text)
+            size += tokens
+        return ["\n".join(chunk) for chunk in chunks] or [""]
 
+    def _reduce_chunks(self, chunks, responses, required_skills):
+        """Сводный отчет по отчетам фрагментов; вес фрагмента - длина его текста"""
+        partials = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception) or not response:
+                print(f"❌ Ошибка анализа фрагмента собеседования: {response}")
+                continue
+            analysis = self._parse_analysis_response(response, chunk, fallback=False)
+            if analysis is not None:
+                partials.append((len(chunk), self._finish(analysis, chunk)))
+
+        conversation_text = "\n".join(chunks)
+        if not partials:
+            return self._finish(self._generate_fallback_analysis(conversation_text), conversation_text)
+
+        total = sum(weight for weight, _ in partials)
+        strengths = Counter()
+        weaknesses = Counter()
+        votes = Counter()
+        assessment = {name: "missing" for name in get_skill_normalizer().normalize(required_skills)}
+        for weight, analysis in partials:
+            strengths.update(analysis["strengths"])
+            weaknesses.update(analysis["weaknesses"])
+            votes[analysis["recommendation"]] += weight
+            # Навык подтвержден, если он подтвержден хотя бы в одном фрагменте
+            for skill, status in analysis["skill_assessment"].items():
+                if ASSESSMENT_RANK[status] > ASSESSMENT_RANK.get(assessment.get(skill), 0):
+                    assessment[skill] = status
+
+        recommendation, weight = votes.most_common(1)[0]
+        if list(votes.values()).count(weight) > 1:
+            recommendation = "additional_interview"
+
+        return self._finish({
+            "overall_score": round(sum(weight * a["overall_score"] for weight, a in partials) / total),
+            "strengths": [text for text, _ in strengths.most_common(5)],
+            "weaknesses": [text for text, _ in weaknesses.most_common(5)],
+            "skill_assessment": assessment,
+            "recommendation": recommendation,
+            "feedback": " ".join(dict.fromkeys(a["feedback"] for _, a in partials if a["feedback"]))
+        }, conversation_text)
+
+    def _finish(self, analysis, conversation_text):
+        """Проверка схемы отчета и нормализация навыков"""
+        return self._normalize_skills(self._validate_analysis(analysis, conversation_text))
+
+    def _validate_analysis(self, analysis, conversation_text):
+        """Отчет с полями и типами ANALYSIS_FIELDS: неверные поля заменяются резервными значениями"""
+        fallback = self._generate_fallback_analysis(conversation_text)
+        if not isinstance(analysis, dict):
+            return fallback
+
+        result = dict(analysis)
+        try:
+            result["overall_score"] = min(max(int(float(analysis.get("overall_score"))), 0), 100)
+        except (TypeError, ValueError):
+            result["overall_score"] = fallback["overall_score"]
+        for field in ("strengths", "weaknesses"):
+            value = analysis.get(field)
+            result[field] = [str(item).strip() for item in value if str(item).strip()] \
+                if isinstance(value, list) else fallback[field]
+        assessment = analysis.get("skill_assessment")
+        result["skill_assessment"] = {
+            str(skill): status for skill, status in assessment.items() if status in ASSESSMENT_RANK
+        } if isinstance(assessment, dict) else {}
+        if result.get("recommendation") not in RECOMMENDATIONS:
+            result["recommendation"] = "additional_interview"
+        if not isinstance(result.get("feedback"), str):
+            result["feedback"] = fallback["feedback"]
+        return result
+
+    def _normalize_skills(self, analysis):
+        """Ключи skill_assessment - названия навыков из таксономии, синонимы сливаются"""
+        assessment = analysis.get("skill_assessment")
+        if isinstance(assessment, dict) and assessment:
+            analysis["skill_assessment"] = get_skill_normalizer().normalize_assessment(assessment)
+        return analysis
+
+    def _build_analysis_messages(self, conversation_text, required_skills, vacancy_name, part=None):
+        """Промпт для анализа собеседования; part=(номер, всего) - анализ фрагмента"""
+        # Модель отвечает теми же названиями навыков, что и в требованиях
+        required_skills = get_skill_normalizer().normalize(required_skills)
+        part_note = ""
+        if part is not None and part[1] > 1:
+            part_note = (f"Это часть {part[0]} из {part[1]} собеседования. В skill_assessment укажи "
+                         f"только навыки, о которых шла речь в этой части.")
         analysis_prompt = f"""
         Проанализируй техническое собеседование и составь детальный отчет для HR.
 
@@ -20,7 +202,8 @@ class InterviewAnalyzer:
         Ключевые навыки: {', '.join(required_skills)}
 
         ТЕКСТ СОБЕСЕДОВАНИЯ:
-        {conversation_text[:3000]}  # Ограничиваем длину
+        {conversation_text}
+        {part_note}
 
         СГЕНЕРИРУЙ ОТЧЕТ В ФОРМАТЕ JSON:
         {{
@@ -39,7 +222,7 @@ class InterviewAnalyzer:
         Будь объективным и профессиональным. Учитывай технические навыки, soft skills, логичность ответов.
         """
 
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": "Ты Senior HR-аналитик и технический рекрутер. Анализируешь собеседования и даешь экспертную оценку."
@@ -50,19 +233,19 @@ class InterviewAnalyzer:
             }
         ]
 
-        response = self.giga_client.get_chat_response(messages, temperature=0.3)
-
+    def _parse_analysis_response(self, response, conversation_text, fallback=True):
+        """Извлечение JSON-отчета из ответа модели; fallback=False - None вместо резервного отчета"""
         try:
             # Извлекаем JSON из ответа
             json_match = re.search(r'\{[\s\S]*\}', response)
             if json_match:
                 return json.loads(json_match.group())
             else:
-                return self._generate_fallback_analysis(conversation_text)
+                return self._generate_fallback_analysis(conversation_text) if fallback else None
 
         except Exception as e:
             print(f"❌ Ошибка анализа результатов: {e}")
-            return self._generate_fallback_analysis(conversation_text)
+            return self._generate_fallback_analysis(conversation_text) if fallback else None
 
     def _format_conversation(self, history):
         """Форматирование диалога"""
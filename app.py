@@ -16,6 +16,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Импорты из services
 from services import ResumeParser, InterviewAgent, InterviewAnalyzer, VoiceService
+from services.model_registry import get_model_registry
+from services.embedding_backends import get_embedding_backend
+from services.analysis_cache import get_analysis_cache
+from services.question_bank import get_question_bank
+from services.session_store import get_session_store
 from config import Config
 
 # Настройка страницы
@@ -113,6 +118,18 @@ class AppUtils:
             f.write(uploaded_file.getbuffer())
         return file_path
 
+    @staticmethod
+    def render_stream(chunks, placeholder):
+        """Постепенный вывод потокового ответа HR-аватара"""
+        text = ""
+        while True:
+            try:
+                text += next(chunks)
+            except StopIteration as stop:
+                return stop.value
+            placeholder.markdown(f'<div class="assistant-message"><b>🤖 HR-аватар:</b> {text}▌</div>',
+                                 unsafe_allow_html=True)
+
     @staticmethod
     def create_skills_chart(skills_list):
         if not skills_list:
@@ -199,11 +216,55 @@ def init_session_state():
         st.session_state.recognition_quality = ""
 
 
+def save_interview():
+    """Сохранение состояния собеседования: его продолжит любой процесс по session_id"""
+    agent = st.session_state.agent
+    if agent is None:
+        return
+    try:
+        get_session_store().save(agent.to_state(extra={"resume_analysis": st.session_state.resume_analysis}))
+    except Exception as e:
+        print(f"⚠️ Не удалось сохранить сессию собеседования: {e}")
+
+
+def restore_interview():
+    """Продолжение собеседования по ?session=<id> после перезапуска или на другом узле"""
+    if st.session_state.agent is not None:
+        return
+    session_id = st.experimental_get_query_params().get("session", [None])[0]
+    if not session_id:
+        return
+    try:
+        state = get_session_store().load(session_id)
+    except Exception as e:
+        print(f"⚠️ Не удалось загрузить сессию собеседования: {e}")
+        return
+    if state is None:
+        return
+
+    agent = InterviewAgent.from_state(state)
+    st.session_state.agent = agent
+    st.session_state.resume_analysis = state.extra.get("resume_analysis")
+    # Приветствие (первая реплика агента) в диалоге приложения не показывается
+    st.session_state.conversation = [(msg["role"], msg["content"]) for msg in agent.conversation_history[1:]]
+    st.session_state.current_step = max(st.session_state.current_step, 2)
+
+
 # Главная функция
 def main():
     init_session_state()
+    restore_interview()
     utils = AppUtils()
 
+    # Модель эмбеддингов грузится в фоне, пока пользователь загружает резюме
+    registry = get_model_registry()
+    backend = get_embedding_backend()
+    if Config.EMBEDDING_WARMUP and not registry.is_loaded(backend.registry_name):
+        registry.warm_up([backend.registry_name], background=True, loader=backend.loader)
+    # Эмбеддинги банка вопросов считаются один раз и сохраняются на диск
+    if Config.EMBEDDING_WARMUP and Config.QUESTION_BANK_RETRIEVAL:
+        get_question_bank().warm_up(background=True)
+
     st.title("🤖 HR Avatar - AI система собеседований")
     st.markdown("---")
 
@@ -225,11 +286,7 @@ def main():
     with st.sidebar:
         st.header("⚙️ Настройки")
 
-        vacancy_options = {
-            "Python Разработчик": ["Python", "Django", "PostgreSQL", "Docker", "Git"],
-            "Data Scientist": ["Python", "ML", "Pandas", "SQL", "Statistics"],
-            "DevOps Engineer": ["Docker", "Kubernetes", "AWS", "Linux", "CI/CD"]
-        }
+        vacancy_options = dict(Config.DEFAULT_VACANCIES)
 
         selected_vacancy = st.selectbox(
             "🎯 Выберите вакансию:",
@@ -252,6 +309,7 @@ def main():
         if st.button("🔄 Начать заново", key="restart_button"):
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
+            st.experimental_set_query_params()
             init_session_state()
             st.rerun()
 
@@ -273,11 +331,14 @@ def show_resume_analysis(uploaded_file, vacancy_options, selected_vacancy, utils
 
     with st.spinner("🔍 Анализируем резюме..."):
         try:
-            # Сохраняем и анализируем файл
-            file_path = utils.save_uploaded_file(uploaded_file)
-            parser = ResumeParser()
-            resume_text = parser.extract_text(file_path)
-            analysis = parser.parse_resume(resume_text, vacancy_options[selected_vacancy])
+            # Повторные запуски скрипта и одинаковые загрузки берут результат из кэша по хэшу файла
+            analysis, resume_text, _ = get_analysis_cache().analyze(
+                uploaded_file.getvalue(),
+                uploaded_file.name,
+                vacancy_options[selected_vacancy],
+                parser_factory=ResumeParser,
+                save_dir="data"
+            )
 
             st.session_state.resume_analysis = analysis
 
@@ -340,6 +401,9 @@ def show_interview_interface(vacancy_name, vacancy_options, interview_mode, util
         st.session_state.agent.start_interview()
         welcome_msg = st.session_state.agent.conversation_history[-1]["content"]
         st.session_state.conversation.append(("assistant", welcome_msg))
+        # Ссылка с session_id позволяет продолжить собеседование после перезапуска
+        st.experimental_set_query_params(session=st.session_state.agent.session_id)
+        save_interview()
         current_questions += 1  # Увеличиваем счетчик после добавления приветствия
 
     # Отображение диалога
@@ -464,9 +528,11 @@ def process_user_input(user_input):
     # Добавляем ответ пользователя
     st.session_state.conversation.append(("user", user_input))
 
-    # Обработка ответа агентом
+    # Обработка ответа агентом: вопрос выводится по мере генерации
     agent = st.session_state.agent
-    if agent.process_answer(user_input):
+    asked = AppUtils.render_stream(agent.process_answer_stream(user_input), st.empty())
+    save_interview()
+    if asked:
         last_msg = agent.conversation_history[-1]
         if last_msg["role"] == "assistant":
             st.session_state.conversation.append(("assistant", last_msg["content"]))
@@ -489,12 +555,15 @@ def show_results(utils):
         with st.spinner("📊 Анализируем результаты собеседования..."):
             try:
                 agent = st.session_state.agent
-                analyzer = InterviewAnalyzer()
-                results = analyzer.analyze_interview(
-                    agent.conversation_history,
-                    agent.required_skills,
-                    agent.vacancy_name
-                )
+                # Ответы оценивались во время собеседования: отчет собирается из готовых оценок
+                results = agent.get_results()
+                if results is None:
+                    analyzer = InterviewAnalyzer()
+                    results = analyzer.analyze_interview(
+                        agent.conversation_history,
+                        agent.required_skills,
+                        agent.vacancy_name
+                    )
                 st.session_state.interview_results = results
             except Exception as e:
                 st.error(f"❌ Ошибка анализа: {str(e)}")
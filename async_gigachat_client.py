@@ -0,0 +1,269 @@
+# services/async_gigachat_client.py
+import asyncio
+import time
+import weakref
+
+from config import Config
+from .gigachat_client import GigaChatClient, STREAM_DONE
+from .resilience import GigaChatAPIError, parse_retry_after
+from .llm_scheduler import estimate_tokens, BATCH
+
+# aiohttp для неблокирующих запросов
+try:
+    import aiohttp
+
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Семафор и HTTP-сессия общие для всех клиентов одного event loop
+_limiters = weakref.WeakKeyDictionary()
+_sessions = weakref.WeakKeyDictionary()
+
+
+def _get_limiter():
+    """Глобальный ограничитель одновременных запросов к GigaChat"""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(Config.GIGACHAT_MAX_CONCURRENCY)
+        _limiters[loop] = limiter
+    return limiter
+
+
+def _get_session():
+    """Общая aiohttp-сессия с keep-alive пулом соединений"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=Config.GIGACHAT_MAX_CONCURRENCY,
+            limit_per_host=Config.HTTP_POOL_MAXSIZE,
+            ssl=False
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def close_async_sessions():
+    """Закрытие HTTP-сессии текущего event loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+class AsyncGigaChatClient:
+    """Асинхронный клиент GigaChat.
+
+    Все экземпляры в одном event loop делят общий семафор
+    (Config.GIGACHAT_MAX_CONCURRENCY) и пул соединений, поэтому
+    запросы многих кандидатов выполняются параллельно без отдельного
+    потока на каждого.
+    """
+
+    def __init__(self, sync_client=None):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("Для асинхронного клиента GigaChat установите aiohttp")
+
+        # Авторизация и форматы запросов общие с синхронным клиентом
+        self.sync_client = sync_client or GigaChatClient()
+        self.config = self.sync_client.config
+        self.last_call_stats = {"ttft": None, "total": None}
+
+    async def get_chat_response(self, messages, temperature=0.7, max_tokens=1024, timeout=None, use_cache=None,
+                                priority=BATCH, session_id=None):
+        """Получение ответа от GigaChat.
+
+        timeout - дедлайн на весь вызов, включая ожидание в очереди семафора.
+        Отмена задачи (task.cancel()) прерывает запрос и освобождает слот.
+        use_cache, priority, session_id - как в GigaChatClient.get_chat_response.
+        """
+        cache_key = self.sync_client._cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key:
+            cached = self.sync_client.response_cache.get(cache_key)
+            if cached is not None:
+                self.last_call_stats = {"ttft": 0.0, "total": 0.0}
+                return cached
+
+        payload = self.sync_client._chat_payload(messages, temperature, max_tokens)
+        deadline = timeout or self.config.GIGACHAT_REQUEST_TIMEOUT
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(
+                self.sync_client.resilience.execute_async(
+                    lambda: self._request_completion(payload, priority, session_id), hedge=True
+                ),
+                timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            print(f"Превышено время ожидания GigaChat ({deadline} с)")
+            return None
+        except Exception as e:
+            print(f"Ошибка при запросе к GigaChat: {e}")
+            return None
+
+        elapsed = time.perf_counter() - started
+        self.last_call_stats = {"ttft": elapsed, "total": elapsed}
+        if cache_key:
+            self.sync_client.response_cache.set(cache_key, content)
+        return content
+
+    async def _request_completion(self, payload, priority, session_id):
+        """Одна попытка запроса под глобальным ограничителем"""
+        reserved = await self._wait_for_quota(payload, priority, session_id)
+        try:
+            async with _get_limiter():
+                response = await self._open_chat(payload)
+                async with response:
+                    if response.status != 200:
+                        raise GigaChatAPIError(
+                            response.status,
+                            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                        )
+                    data = await response.json()
+        except BaseException:
+            # Ошибка, таймаут или отмена: токены не израсходованы
+            self.sync_client._refund_quota(reserved)
+            raise
+
+        if self.sync_client.scheduler is not None:
+            self.sync_client.scheduler.settle(reserved, data.get('usage', {}).get('total_tokens'))
+        return data['choices'][0]['message']['content']
+
+    async def stream_chat_response(self, messages, temperature=0.7, max_tokens=1024, timeout=None,
+                                   priority=BATCH, session_id=None):
+        """Потоковое получение ответа: асинхронный генератор фрагментов текста.
+
+        timeout - дедлайн на весь вызов: очередь планировщика, семафор, открытие и чтение потока.
+        """
+        payload = self.sync_client._chat_payload(messages, temperature, max_tokens)
+        payload['stream'] = True
+        deadline = timeout or self.config.GIGACHAT_REQUEST_TIMEOUT
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+
+        def remaining():
+            return max(expires - loop.time(), 0.001)
+
+        started = time.perf_counter()
+        stats = {"ttft": None, "total": None}
+        self.last_call_stats = stats
+        limiter = _get_limiter()
+        try:
+            reserved = await asyncio.wait_for(self._wait_for_quota(payload, priority, session_id), remaining())
+        except asyncio.TimeoutError:
+            print(f"Превышено время ожидания GigaChat ({deadline} с)")
+            return
+        except Exception as e:
+            print(f"Ошибка при потоковом запросе к GigaChat: {e}")
+            return
+        try:
+            await asyncio.wait_for(limiter.acquire(), remaining())
+        except asyncio.TimeoutError:
+            self.sync_client._refund_quota(reserved)
+            print(f"Превышено время ожидания GigaChat ({deadline} с)")
+            return
+        except BaseException:
+            self.sync_client._refund_quota(reserved)
+            raise
+
+        try:
+            # Повторы возможны только до начала потока
+            try:
+                response = await asyncio.wait_for(
+                    self.sync_client.resilience.execute_async(lambda: self._open_stream(payload, remaining())),
+                    remaining()
+                )
+            except BaseException:
+                self.sync_client._refund_quota(reserved)
+                raise
+
+            async with response:
+                async for line in response.content:
+                    delta = self.sync_client._parse_stream_line(line.strip())
+                    if delta is STREAM_DONE:
+                        break
+                    if delta:
+                        if stats["ttft"] is None:
+                            stats["ttft"] = time.perf_counter() - started
+                        yield delta
+
+        except asyncio.TimeoutError:
+            print(f"Превышено время ожидания GigaChat ({deadline} с)")
+        except Exception as e:
+            print(f"Ошибка при потоковом запросе к GigaChat: {e}")
+        finally:
+            limiter.release()
+            stats["total"] = time.perf_counter() - started
+
+    async def _open_stream(self, payload, timeout):
+        """Открытие SSE-потока: ответ со статусом 200 или GigaChatAPIError"""
+        response = await self._open_chat(payload, stream=True, timeout=timeout)
+        if response.status != 200:
+            response.release()
+            raise GigaChatAPIError(
+                response.status,
+                retry_after=parse_retry_after(response.headers.get('Retry-After'))
+            )
+        return response
+
+    async def _wait_for_quota(self, payload, priority, session_id):
+        """Очередь планировщика без блокировки event loop"""
+        reserved = estimate_tokens(payload['messages'], payload['max_tokens'])
+        if self.sync_client.scheduler is not None:
+            await self.sync_client.scheduler.acquire_async(priority, session_id, reserved)
+        return reserved
+
+    async def _open_chat(self, payload, stream=False, timeout=None):
+        """Запрос к chat/completions с повторной авторизацией при 401"""
+        token = await self._get_token()
+        if not token:
+            raise GigaChatAPIError(401, "Не удалось получить access token")
+
+        request_kwargs = {}
+        if timeout:
+            request_kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(2):
+            headers = self.sync_client._chat_headers(token)
+            if stream:
+                headers['Accept'] = 'text/event-stream'
+
+            response = await _get_session().post(
+                f"{self.config.GIGACHAT_API_URL}/chat/completions",
+                headers=headers,
+                json=payload,
+                **request_kwargs
+            )
+            if response.status != 401 or attempt:
+                return response
+
+            # Токен отозван или истек раньше срока - обновляем и повторяем запрос
+            response.release()
+            token = await asyncio.to_thread(self.sync_client.token_manager.refresh, token)
+            if not token:
+                return response
+
+    async def _get_token(self):
+        """Токен из памяти; обновление при необходимости выполняется вне event loop"""
+        token = self.sync_client.token_manager.peek_token()
+        if token:
+            return token
+        return await asyncio.to_thread(self.sync_client.token_manager.get_token)
+
+    async def extract_skills_from_text(self, text, timeout=None, use_cache=None):
+        """Извлечение навыков из текста: сначала по таксономии, GigaChat - только если найдено мало"""
+        skills, _ = await self.extract_skills(text, timeout=timeout, use_cache=use_cache)
+        return skills
+
+    async def extract_skills(self, text, timeout=None, use_cache=None):
+        """(навыки, fallback), как GigaChatClient.extract_skills"""
+        local_skills = self.sync_client._local_skills(text)
+        if len(local_skills) >= Config.SKILL_EXTRACTOR_MIN_SKILLS:
+            return local_skills, False
+
+        messages = self.sync_client._skills_messages(text)
+        response = await self.get_chat_response(messages, temperature=0.3, timeout=timeout, use_cache=use_cache)
+        return self.sync_client._skills_from_response(local_skills, response, text)
\ No newline at end of file
@@ -0,0 +1,1018 @@
+# benchmark.py
+"""
+Бенчмарки производительности HR-аватара.
+
+    python benchmark.py match --candidates 10000 --vacancies 50
+    python benchmark.py index --candidates 50000 --k 20
+    python benchmark.py extract --pages 40  (или --file data/resume.pdf)
+    python benchmark.py embed --backends torch onnx
+    python benchmark.py skills --resumes 2000
+    python benchmark.py questions --interviews 500
+    python benchmark.py memory --interviews 50 --chars 1500
+    python benchmark.py sessions --sessions 10000
+    python benchmark.py server --candidates 300 --concurrency 300 --transport stream
+    python benchmark.py analysis --interviews 10 --questions 12 --prompt-delay 1.0
+    python benchmark.py resilience
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+
+from config import Config
+
+
+def synthetic_encoder(dim):
+    """Детерминированные случайные эмбеддинги вместо модели"""
+    def encode(texts):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(dim).astype(np.float32)
+            for text in texts
+        ])
+    return encode
+
+
+def ngram_encoder(dim):
+    """Эмбеддинги по хэшам символьных триграмм: похожие по написанию тексты близки"""
+    def encode(texts):
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = f"  {text.lower()}  "
+            for i in range(len(text) - 2):
+                vectors[row, zlib.crc32(text[i:i + 3].encode("utf-8")) % dim] += 1.0
+        return vectors
+    return encode
+
+
+def bench_match(args):
+    """Пакетный скоринг кандидатов по вакансиям против попарного расчета"""
+    from services.match_scoring import BatchMatchScorer
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = [f"skill_{i}" for i in range(args.vocabulary)]
+    candidates = [
+        list(rng.choice(vocabulary, rng.integers(args.min_skills, args.max_skills + 1), replace=False))
+        for _ in range(args.candidates)
+    ]
+    vacancies = [list(rng.choice(vocabulary, args.required, replace=False)) for _ in range(args.vacancies)]
+
+    if args.model:
+        scorer = BatchMatchScorer()
+    else:
+        Config.EMBEDDING_CACHE_DIR = tempfile.mkdtemp(prefix="hr_bench_")
+        scorer = BatchMatchScorer(model_name="synthetic", encode_fn=synthetic_encoder(args.dim))
+
+    # Прогрев: кодирование словаря попадает в кэш эмбеддингов
+    started = time.perf_counter()
+    scorer.embed(vocabulary)
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scores = scorer.score_matrix(candidates, vacancies)
+    batch_seconds = time.perf_counter() - started
+
+    # Попарный расчет, как в _calculate_match_score, на подвыборке
+    sample = candidates[:args.baseline]
+    started = time.perf_counter()
+    baseline = np.zeros((len(sample), len(vacancies)), dtype=np.float32)
+    for i, skills in enumerate(sample):
+        for j, required in enumerate(vacancies):
+            similarity = scorer.embed(required) @ scorer.embed(skills).T
+            baseline[i, j] = similarity.max(axis=1).mean() * 100
+    baseline_seconds = (time.perf_counter() - started) * len(candidates) / max(1, len(sample))
+
+    pairs = len(candidates) * len(vacancies)
+    print(f"Кандидатов: {len(candidates)}, вакансий: {len(vacancies)}, пар: {pairs}")
+    print(f"Кодирование словаря ({len(vocabulary)} навыков): {encode_seconds:.3f} с")
+    print(f"Пакетный скоринг:   {batch_seconds:.3f} с ({pairs / batch_seconds:,.0f} пар/с)")
+    print(f"Попарный (оценка):  {baseline_seconds:.3f} с")
+    print(f"Ускорение:          x{baseline_seconds / batch_seconds:.1f}")
+    print(f"Макс. расхождение с попарным расчетом: {np.abs(scores[:len(sample)] - baseline).max():.2e}")
+
+
+def bench_index(args):
+    """Индекс кандидатов: точный и приближенный (IVF) поиск top-k"""
+    from services.match_scoring import BatchMatchScorer
+    from services.candidate_index import CandidateIndex
+
+    workdir = tempfile.mkdtemp(prefix="hr_bench_")
+    Config.EMBEDDING_CACHE_DIR = workdir
+    scorer = BatchMatchScorer(model_name="synthetic", encode_fn=synthetic_encoder(args.dim))
+    index = CandidateIndex(path=f"{workdir}/index", scorer=scorer)
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = [f"skill_{i}" for i in range(args.vocabulary)]
+    # Кандидаты из нескольких "профессий", чтобы у кластеров была структура
+    professions = [rng.choice(vocabulary, 40, replace=False) for _ in range(args.professions)]
+    items = []
+    for i in range(args.candidates):
+        profession = professions[rng.integers(len(professions))]
+        items.append((f"candidate_{i}", list(rng.choice(profession, rng.integers(3, 12), replace=False)), None))
+
+    started = time.perf_counter()
+    index.add_many(items)
+    print(f"Добавление {len(items)} кандидатов: {time.perf_counter() - started:.2f} с")
+    started = time.perf_counter()
+    index.build_ivf(args.nlist)
+    print(f"Построение IVF ({args.nlist} кластеров): {time.perf_counter() - started:.2f} с")
+    print(f"Индекс: {index.get_stats()}")
+
+    queries = [list(rng.choice(p, 6, replace=False)) for p in professions[:args.queries]]
+    index.search(queries[0], args.k)  # загрузка таблицы
+    started = time.perf_counter()
+    exact = [index.search(q, args.k) for q in queries]
+    elapsed = (time.perf_counter() - started) / len(queries)
+    print(f"Поиск точный: {elapsed * 1000:.1f} мс на запрос")
+
+    started = time.perf_counter()
+    approximate = [index.search(q, args.k, approximate=True, nprobe=args.nprobe) for q in queries]
+    elapsed = (time.perf_counter() - started) / len(queries)
+    recall = np.mean([
+        len({r[0] for r in a} & {r[0] for r in e}) / args.k for a, e in zip(approximate, exact)
+    ])
+    print(f"Поиск IVF: {elapsed * 1000:.1f} мс на запрос, recall@{args.k} = {recall:.3f}")
+
+
+def write_sample_pdf(path, pages, lines_per_page=45):
+    """Простой многостраничный PDF с текстом резюме (без сторонних библиотек)"""
+    line = "Senior Python developer: Django, PostgreSQL, Docker, Kubernetes, CI/CD, Redis, Kafka."
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        rows = "".join(f"({line} {page}.{i}) Tj 0 -15 Td " for i in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 40 800 Td {rows}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def legacy_extract_pdf(file_path):
+    """Прежний путь ResumeParser.extract_text: конкатенация и два extract_text на страницу"""
+    import pdfplumber
+
+    text = ""
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            if page.extract_text():
+                text += page.extract_text() + "\n"
+    return text
+
+
+def bench_extract(args):
+    """Извлечение текста PDF: прежний путь против потокового и параллельного"""
+    from services import text_extraction
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(prefix="hr_bench_"), "resume.pdf")
+        write_sample_pdf(path, args.pages)
+
+    def timed(fn):
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    # Пул процессов создается заранее, чтобы не учитывать запуск воркеров
+    text_extraction._get_process_pool().submit(int).result()
+
+    legacy_time, legacy_text = timed(lambda: legacy_extract_pdf(path))
+    variants = [
+        ("потоковый", lambda: text_extraction.extract_text(path, parallel=False)),
+        (f"лимит {args.max_chars} симв.", lambda: text_extraction.extract_text(path, max_chars=args.max_chars, parallel=False)),
+        (f"пул процессов ({Config.PDF_EXTRACT_WORKERS})", lambda: text_extraction.extract_text(path, parallel=True)),
+    ]
+
+    print(f"Файл: {path}")
+    print(f"{'прежний путь':<28}{legacy_time:>8.3f} с  {len(legacy_text):>8} симв.")
+    for name, fn in variants:
+        elapsed, text = timed(fn)
+        same = "совпадает" if text == legacy_text[:len(text)] else "РАСХОДИТСЯ"
+        print(f"{name:<28}{elapsed:>8.3f} с  {len(text):>8} симв.  x{legacy_time / elapsed:.1f}  {same}")
+
+
+BENCH_SKILLS = [
+    "Python", "Django", "Flask", "FastAPI", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Docker", "Kubernetes",
+    "AWS", "GCP", "Azure", "Linux", "Git", "CI/CD", "Jenkins", "GitLab CI", "Terraform", "Ansible",
+    "Pandas", "NumPy", "scikit-learn", "PyTorch", "TensorFlow", "Machine Learning", "Deep Learning", "SQL",
+    "Statistics", "Data Analysis", "JavaScript", "TypeScript", "React", "Vue.js", "Node.js", "Java", "Spring",
+    "Kotlin", "Go", "Rust", "C++", "Kafka", "RabbitMQ", "Celery", "REST API", "GraphQL", "gRPC",
+    "Микросервисы", "Нагрузочное тестирование", "Английский язык", "Управление командой", "Agile", "Scrum"
+]
+
+
+def bench_embed_worker(args):
+    """Замер одного бэкенда в отдельном процессе: холодный старт, задержка, пропускная способность, RSS"""
+    from services.embedding_backends import create_embedding_backend
+    from services.model_registry import _current_rss
+
+    rss_start = _current_rss()
+    started = time.perf_counter()
+    backend = create_embedding_backend(args.backend)
+    backend.encode(["Python"])
+    cold_start = time.perf_counter() - started
+
+    latencies = []
+    for skill in BENCH_SKILLS[:args.latency_runs]:
+        started = time.perf_counter()
+        backend.encode([skill])
+        latencies.append(time.perf_counter() - started)
+
+    batch = (BENCH_SKILLS * (args.batch // len(BENCH_SKILLS) + 1))[:args.batch]
+    started = time.perf_counter()
+    backend.encode(batch)
+    throughput = len(batch) / (time.perf_counter() - started)
+
+    np.save(args.out, backend.encode(BENCH_SKILLS))
+    rss = _current_rss()
+    print(json.dumps({
+        "backend": backend.name,
+        "cold_start": cold_start,
+        "latency_p50": float(np.median(latencies)),
+        "throughput": throughput,
+        "rss_mb": rss / 2 ** 20 if rss else None,
+        "rss_delta_mb": (rss - rss_start) / 2 ** 20 if rss and rss_start else None
+    }))
+
+
+def bench_embed(args):
+    """Сравнение бэкендов эмбеддингов и проверка допуска относительно torch"""
+    if args.worker:
+        return bench_embed_worker(args)
+
+    workdir = tempfile.mkdtemp(prefix="hr_bench_")
+    results = {}
+    vectors = {}
+    for backend in args.backends:
+        out = os.path.join(workdir, f"{backend}.npy")
+        command = [sys.executable, os.path.abspath(__file__), "embed", "--worker", "--backend", backend,
+                   "--out", out, "--batch", str(args.batch), "--latency-runs", str(args.latency_runs)]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"❌ {backend}: {completed.stderr.strip().splitlines()[-1:]}")
+            continue
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+        vectors[backend] = np.load(out)
+
+    print(f"{'бэкенд':<8}{'старт, с':>10}{'p50, мс':>10}{'навык/с':>10}{'RSS, МБ':>10}{'+RSS, МБ':>10}")
+    for name, r in results.items():
+        rss = f"{r['rss_mb']:>10.0f}" if r["rss_mb"] else f"{'-':>10}"
+        delta = f"{r['rss_delta_mb']:>10.0f}" if r["rss_delta_mb"] else f"{'-':>10}"
+        print(f"{name:<8}{r['cold_start']:>10.2f}{r['latency_p50'] * 1000:>10.1f}{r['throughput']:>10.0f}{rss}{delta}")
+
+    if "torch" not in vectors:
+        return
+    reference = vectors["torch"]
+    rng = np.random.default_rng(0)
+    pairs = [
+        (rng.choice(len(BENCH_SKILLS), 8, replace=False), rng.choice(len(BENCH_SKILLS), 5, replace=False))
+        for _ in range(500)
+    ]
+    for name, candidate in vectors.items():
+        if name == "torch":
+            continue
+        cosine = (reference * candidate).sum(axis=1)
+        diffs = [
+            abs((reference[req] @ reference[cand].T).max(axis=1).mean()
+                - (candidate[req] @ candidate[cand].T).max(axis=1).mean()) * 100
+            for cand, req in pairs
+        ]
+        ok = cosine.min() >= 0.98 and max(diffs) <= 2.0
+        print(f"\n{name} против torch: косинус min {cosine.min():.4f}, среднее {cosine.mean():.4f}; "
+              f"match_score max |Δ| {max(diffs):.2f}, среднее {np.mean(diffs):.2f} пункта")
+        print("✅ в пределах допуска" if ok else "❌ вне допуска (косинус >= 0.98, |Δ| <= 2)")
+
+
+SKILL_SAMPLE = ["Python", "Django", "PostgreSQL", "Docker", "Git", "Redis", "Kafka", "Celery", "FastAPI"]
+
+FILLER_WORDS = (
+    "опыт работы разработка проекта команда задачи сервис поддержка внедрение система компания "
+    "участвовал в создании отвечал за развитие продукта клиентов требования интеграция данных "
+    "ответственный обучаемый результат высшее образование университет курсы сертификат"
+).split()
+
+
+def legacy_fallback_skills(text):
+    """Прежний _fallback_skill_extraction: 12 навыков, text.lower() на каждый"""
+    common_skills = ["Python", "Java", "SQL", "JavaScript", "Linux", "Docker",
+                     "Kubernetes", "AWS", "Git", "React", "PostgreSQL", "MongoDB"]
+    return [skill for skill in common_skills if skill.lower() in text.lower()]
+
+
+def synthetic_resumes(taxonomy, count, chars, skills_per_resume, seed):
+    """Резюме из случайных слов и упоминаний навыков (название или синоним): [(текст, навыки)]"""
+    rng = np.random.default_rng(seed)
+    names = list(taxonomy)
+    resumes = []
+    for _ in range(count):
+        chosen = [names[i] for i in rng.choice(len(names), skills_per_resume, replace=False)]
+        words = list(rng.choice(FILLER_WORDS, chars // 8))
+        for skill in chosen:
+            variants = [skill] + list(taxonomy[skill])
+            mention = variants[rng.integers(len(variants))]
+            words.insert(int(rng.integers(len(words) + 1)), mention.upper() if rng.random() < 0.2 else mention)
+        resumes.append((" ".join(words) + ".", chosen))
+    return resumes
+
+
+def bench_skills(args):
+    """Извлечение навыков: прежний резервный поиск, наивный поиск по таксономии и автомат"""
+    from services.skill_extractor import SkillExtractor, load_taxonomy
+
+    taxonomy = load_taxonomy(args.taxonomy)
+    started = time.perf_counter()
+    extractor = SkillExtractor(taxonomy)
+    build_time = time.perf_counter() - started
+    stats = extractor.get_stats()
+    resumes = synthetic_resumes(taxonomy, args.resumes, args.chars, args.skills, args.seed)
+    texts = [text for text, _ in resumes]
+
+    patterns = sorted({p.lower() for skill, aliases in taxonomy.items() for p in [skill] + list(aliases)})
+
+    def naive(text):
+        lowered = text.lower()
+        return [pattern for pattern in patterns if pattern in lowered]
+
+    variants = [
+        ("прежний (12 навыков)", legacy_fallback_skills),
+        (f"наивный ({len(patterns)} шабл.)", naive),
+        ("автомат", extractor.extract),
+    ]
+
+    print(f"Таксономия: {stats['skills']} навыков, {stats['patterns']} шаблонов, "
+          f"{stats['states']} состояний, построение {build_time * 1000:.0f} мс")
+    print(f"Резюме: {len(texts)} по ~{args.chars} симв., {args.skills} навыков в каждом\n")
+    print(f"{'вариант':<24}{'время, с':>10}{'резюме/с':>12}{'МБ/с':>8}")
+    megabytes = sum(len(text) for text in texts) / 2 ** 20
+    results = {}
+    for name, fn in variants:
+        started = time.perf_counter()
+        results[name] = [fn(text) for text in texts]
+        elapsed = time.perf_counter() - started
+        print(f"{name:<24}{elapsed:>10.3f}{len(texts) / elapsed:>12.0f}{megabytes / elapsed:>8.2f}")
+
+    found = results["автомат"]
+    recall = np.mean([len(set(chosen) & set(skills)) / len(chosen) for (_, chosen), skills in zip(resumes, found)])
+    local_only = np.mean([len(skills) >= Config.SKILL_EXTRACTOR_MIN_SKILLS for skills in found])
+    print(f"\nПолнота по заложенным навыкам: {recall:.3f}; "
+          f"без обращения к GigaChat (>= {Config.SKILL_EXTRACTOR_MIN_SKILLS} навыков): {local_only:.0%}")
+
+
+def bench_questions(args):
+    """Банк вопросов: задержка поиска, доля вопросов без GigaChat и повторы"""
+    import random
+    from services.question_bank import QuestionBank
+
+    backend = None
+    if not args.model:
+        class SyntheticBackend:
+            cache_name = f"ngram-{args.dim}"
+            encode = staticmethod(ngram_encoder(args.dim))
+        backend = SyntheticBackend()
+
+    started = time.perf_counter()
+    bank = QuestionBank(index_dir=tempfile.mkdtemp(prefix="hr_bench_"), backend=backend)
+    bank.load_vectors()
+    build_time = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    vacancies = list(Config.DEFAULT_VACANCIES.items())
+    skills = list(bank.normalizer.extractor.skills)
+    templates = [
+        "Я использовал {skill} в двух проектах, отвечал за архитектуру и ревью кода.",
+        "С {skill} работаю около трех лет, настраивал мониторинг и оптимизировал запросы.",
+        "Знаком с {skill} на базовом уровне, изучал по документации и пет-проектам.",
+        "Больше всего мне нравится работать с людьми и разбираться в бизнес-задачах."
+    ]
+
+    latencies = []
+    local = 0
+    generated = 0
+    repeats = 0
+    legacy_repeats = 0
+    for _ in range(args.interviews):
+        vacancy, required = rng.choice(vacancies)
+        asked = set()
+        covered = set()
+        texts = []
+        for _ in range(min(3, args.questions)):
+            question = bank.base_question(vacancy, asked)
+            asked.add(question["index"])
+            texts.append(question["text"])
+
+        # Прежний выбор базовых вопросов: random.choice с повторами
+        legacy = [rng.choice(bank.base_questions(vacancy)) for _ in range(min(3, args.questions))]
+        legacy_repeats += len(legacy) - len(set(legacy))
+
+        for _ in range(3, args.questions):
+            answer = rng.choice(templates).format(skill=rng.choice(required + skills[:50]))
+            started = time.perf_counter()
+            question, confidence = bank.find(answer, required, asked=asked, covered_skills=covered)
+            latencies.append(time.perf_counter() - started)
+            if question is not None and confidence >= Config.QUESTION_BANK_MIN_CONFIDENCE:
+                local += 1
+                asked.add(question["index"])
+                covered.update(bank.question_skills[question["index"]])
+                texts.append(question["text"])
+            else:
+                generated += 1
+        repeats += len(texts) - len(set(texts))
+
+    turns = local + generated
+    print(f"Банк: {len(bank.questions)} вопросов, эмбеддинги {'модели' if args.model else 'триграмм'}, "
+          f"построение индекса {build_time:.2f} с")
+    print(f"Поиск: p50 {np.percentile(latencies, 50) * 1000:.2f} мс, p99 {np.percentile(latencies, 99) * 1000:.2f} мс")
+    print(f"Адаптивных вопросов из банка: {local}/{turns} ({local / turns:.0%}), GigaChat: {generated}")
+    print(f"Повторы вопросов: {repeats} (прежний random.choice базовых вопросов: {legacy_repeats} "
+          f"на {args.interviews} собеседований)")
+
+
+def legacy_history_text(conversation_history):
+    """Прежняя история для промпта: последние 6 реплик целиком"""
+    return "\n".join([
+        f"{'Интервьюер' if msg['role'] == 'assistant' else 'Кандидат'}: {msg['content']}"
+        for msg in conversation_history[-6:]
+    ])
+
+
+def synthetic_answer(rng, skills, chars, required_skill):
+    """Ответ кандидата из предложений по 8-15 слов: требуемый навык и пара случайных"""
+    mentions = [required_skill] + [skills[i] for i in rng.choice(len(skills), 2, replace=False)]
+    sentences = []
+    while sum(len(sentence) for sentence in sentences) < chars:
+        words = list(rng.choice(FILLER_WORDS, int(rng.integers(8, 16))))
+        if mentions and rng.random() < 0.5:
+            words.insert(int(rng.integers(len(words) + 1)), mentions.pop())
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences + [f"Также работал с {skill}." for skill in mentions])
+
+
+def bench_memory(args):
+    """Токены промпта адаптивного вопроса по ходу собеседования: последние реплики против памяти"""
+    from services.interview_agent import InterviewAgent
+    from services.skill_extractor import get_skill_extractor
+
+    extractor = get_skill_extractor()
+    taxonomy = extractor.taxonomy
+    rng = np.random.default_rng(args.seed)
+    vacancies = list(Config.DEFAULT_VACANCIES.items())
+
+    legacy_tokens = {}
+    memory_tokens = {}
+    kept = {"legacy": 0, "memory": 0}
+    mentioned_total = 0
+    render_time = []
+    for _ in range(args.interviews):
+        vacancy, required = vacancies[rng.integers(len(vacancies))]
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent = InterviewAgent(vacancy, required, prefetch=False, evaluate=False)
+            agent.max_questions = args.questions + 1
+            agent.start_interview()
+            mentioned = set()
+            for turn in range(1, args.questions + 1):
+                answer = synthetic_answer(rng, list(taxonomy), args.chars, required[turn % len(required)])
+                agent._record_answer(answer)
+                mentioned.update(extractor.extract(answer))
+
+                started = time.perf_counter()
+                agent._build_adaptive_prompt()
+                render_time.append(time.perf_counter() - started)
+                memory_tokens.setdefault(turn, []).append(agent.last_prompt_tokens)
+                history = agent.memory.render()
+
+                legacy = legacy_history_text(agent.conversation_history)
+                agent._history_text = lambda: legacy
+                agent._build_adaptive_prompt()
+                del agent._history_text
+                legacy_tokens.setdefault(turn, []).append(agent.last_prompt_tokens)
+
+                # Навыки, которые кандидат уже называл, и остались ли они в промпте
+                mentioned_total += len(mentioned)
+                kept["legacy"] += len(mentioned & set(extractor.extract(legacy)))
+                kept["memory"] += len(mentioned & set(extractor.extract(history)))
+                agent._ask_question(f"Вопрос {turn + 1}: расскажите подробнее о последнем проекте.")
+
+    print(f"Собеседований: {args.interviews}, ответов по ~{args.chars} симв., "
+          f"бюджет истории {Config.CONVERSATION_MEMORY_TOKEN_BUDGET} токенов\n")
+    print(f"{'ответ':<8}{'последние 6 реплик':>20}{'память':>10}")
+    for turn in sorted(legacy_tokens):
+        print(f"{turn:<8}{np.mean(legacy_tokens[turn]):>20.0f}{np.mean(memory_tokens[turn]):>10.0f}")
+
+    legacy_all = [tokens for values in legacy_tokens.values() for tokens in values]
+    memory_all = [tokens for values in memory_tokens.values() for tokens in values]
+    print(f"\nТокенов промпта: среднее {np.mean(legacy_all):.0f} -> {np.mean(memory_all):.0f}, "
+          f"максимум {max(legacy_all)} -> {max(memory_all)}")
+    print(f"Упомянутые кандидатом навыки в промпте: последние 6 реплик {kept['legacy'] / mentioned_total:.0%}, "
+          f"память {kept['memory'] / mentioned_total:.0%}")
+    print(f"Сборка промпта: p50 {np.percentile(render_time, 50) * 1000:.2f} мс")
+
+
+def sample_states(count, templates, questions, chars, seed):
+    """Состояния собеседований: templates прогонов агента, размноженные с разными session_id"""
+    from services.interview_agent import InterviewAgent
+    from services.skill_extractor import get_skill_extractor
+
+    rng = np.random.default_rng(seed)
+    skills = list(get_skill_extractor().taxonomy)
+    vacancies = list(Config.DEFAULT_VACANCIES.items())
+    agents = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(templates):
+            vacancy, required = vacancies[rng.integers(len(vacancies))]
+            agent = InterviewAgent(vacancy, required, prefetch=False, evaluate=False)
+            agent.start_interview()
+            for turn in range(1, questions + 1):
+                agent._record_answer(synthetic_answer(rng, skills, chars, required[turn % len(required)]))
+                agent._ask_question(f"Вопрос {turn + 1}: расскажите подробнее о последнем проекте.")
+            agents.append(agent)
+
+    states = []
+    for i in range(count):
+        state = agents[i % templates].to_state()
+        state.session_id = f"{i:08x}{state.session_id[8:]}"
+        states.append(state)
+    return agents, states
+
+
+def bench_sessions(args):
+    """Хранилище сессий: стоимость сериализации и память на сессию"""
+    from services.interview_agent import InterviewAgent
+    from services.session_store import (InterviewState, MemorySessionStore, SQLiteSessionStore,
+                                        RedisSessionStore, MSGPACK_AVAILABLE, FORMAT_ZLIB)
+    import mock_redis
+
+    agents, states = sample_states(args.sessions, args.templates, args.questions, args.chars, args.seed)
+    print(f"Сессий: {len(states)}, {args.questions} ответов по ~{args.chars} симв. "
+          f"(msgpack {'установлен' if MSGPACK_AVAILABLE else 'не установлен'})\n")
+
+    sample = states[:min(len(states), 2000)]
+    formats = [("json", False)] + ([("msgpack", True)] if MSGPACK_AVAILABLE else [])
+    print(f"{'формат':<10}{'байт':>8}{'сжатие':>8}{'dumps, мкс':>12}{'loads, мкс':>12}")
+    for name, use_msgpack in formats:
+        started = time.perf_counter()
+        blobs = [state.dumps(use_msgpack=use_msgpack) for state in sample]
+        dumps_time = (time.perf_counter() - started) / len(sample)
+        started = time.perf_counter()
+        for blob in blobs:
+            InterviewState.loads(blob)
+        loads_time = (time.perf_counter() - started) / len(sample)
+        raw = len(zlib.decompress(blobs[0][1:])) + 1 if blobs[0][0] & FORMAT_ZLIB else len(blobs[0])
+        print(f"{name:<10}{raw:>8}{np.mean([len(blob) for blob in blobs]):>8.0f}"
+              f"{dumps_time * 1e6:>12.1f}{loads_time * 1e6:>12.1f}")
+
+    # Прежний способ: живой InterviewAgent на каждую сессию (строки не общие с исходными состояниями)
+    blobs = [state.dumps() for state in sample[:args.live]]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        live = [InterviewAgent.from_state(InterviewState.loads(blob), prefetch=False, evaluate=False)
+                for blob in blobs]
+    live_bytes = (tracemalloc.get_traced_memory()[0] - before) / len(live)
+    tracemalloc.stop()
+    del live
+
+    mock, url = mock_redis.start_in_thread()
+    workdir = tempfile.mkdtemp(prefix="hr_bench_")
+    stores = [
+        MemorySessionStore(),
+        SQLiteSessionStore(path=os.path.join(workdir, "sessions.sqlite")),
+        RedisSessionStore(url=url)
+    ]
+    print(f"\n{'хранилище':<12}{'save p50, мс':>14}{'load p50, мс':>14}{'байт/сессию':>14}")
+    print(f"{'агенты':<12}{'-':>14}{'-':>14}{live_bytes:>14.0f}   (живой InterviewAgent, {args.live} шт.)")
+    for store in stores:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        save_times = []
+        for state in states:
+            started = time.perf_counter()
+            store.save(state)
+            save_times.append(time.perf_counter() - started)
+        footprint = (tracemalloc.get_traced_memory()[0] - before) / len(states)
+        tracemalloc.stop()
+        if store.name == "sqlite":
+            footprint = os.path.getsize(store.path) / len(states)
+
+        load_times = []
+        for state in states[::max(1, len(states) // 2000)]:
+            started = time.perf_counter()
+            restored = store.load(state.session_id)
+            load_times.append(time.perf_counter() - started)
+        assert restored.conversation_history == state.conversation_history
+        print(f"{store.name:<12}{np.percentile(save_times, 50) * 1000:>14.3f}"
+              f"{np.percentile(load_times, 50) * 1000:>14.3f}{footprint:>14.0f}")
+
+    # Продолжение собеседования другим "узлом": новый агент из состояния в Redis
+    other = RedisSessionStore(url=url)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = InterviewAgent.from_state(other.load(states[0].session_id), prefetch=False, evaluate=False)
+    resume_time = time.perf_counter() - started
+    same = agent._build_adaptive_prompt() == agents[0]._build_adaptive_prompt()
+    print(f"\nВосстановление агента по session_id: {resume_time * 1000:.2f} мс, "
+          f"промпт {'совпадает' if same else 'ОТЛИЧАЕТСЯ'} с исходным агентом")
+    print(f"Заглушка Redis: {mock.get_stats()}")
+
+
+async def server_candidate(http, base_url, transport, questions, think_time, rng, results):
+    """Один кандидат через API сервера собеседований: задержки вопросов и коды отказов"""
+    async with http.post(f"{base_url}/api/interviews", json={"vacancy": "Python Разработчик"}) as response:
+        if response.status != 200:
+            results["rejected"].append(response.status)
+            return
+        session_id = (await response.json())["session_id"]
+
+    ws = await http.ws_connect(f"{base_url}/ws") if transport == "ws" else None
+    if ws is not None:
+        await ws.send_json({"type": "resume", "session_id": session_id})
+        await ws.receive_json()
+
+    for turn in range(questions):
+        await asyncio.sleep(think_time * (0.5 + rng.random()))
+        answer = f"Я использовал {rng.choice(SKILL_SAMPLE)} в двух проектах, отвечал за архитектуру и ревью кода."
+        started = time.perf_counter()
+        first = None
+        if transport == "ws":
+            await ws.send_json({"type": "answer", "answer": answer})
+            while True:
+                message = await ws.receive_json()
+                if message["type"] == "delta" and first is None:
+                    first = time.perf_counter() - started
+                if message["type"] != "delta":
+                    break
+            status = message.get("status", 200)
+            finished = message.get("finished")
+        else:
+            path = "stream" if transport == "stream" else "answer"
+            async with http.post(f"{base_url}/api/interviews/{session_id}/{path}", json={"answer": answer}) as response:
+                status = response.status
+                finished = False
+                if status == 200 and transport == "stream":
+                    async for line in response.content:
+                        if line.startswith(b"data: {") and first is None:
+                            first = time.perf_counter() - started
+                        if line.startswith(b"data: {") and b'"finished"' in line:
+                            finished = json.loads(line[6:])["finished"]
+                elif status == 200:
+                    finished = (await response.json())["finished"]
+        if status != 200:
+            results["rejected"].append(status)
+            continue
+        results["question"].append(time.perf_counter() - started)
+        if first is not None:
+            results["ttft"].append(first)
+        if finished:
+            break
+
+    if ws is not None:
+        await ws.close()
+    async with http.post(f"{base_url}/api/interviews/{session_id}/end") as response:
+        await response.read()
+    results["completed"] += 1
+
+
+def bench_server(args):
+    """Сервер собеседований под нагрузкой: одновременные кандидаты против заглушки GigaChat"""
+    import random
+    import resource
+    import threading
+    import aiohttp
+    import interview_server
+    from mock_gigachat import start_in_thread as start_mock
+    from services.session_store import MemorySessionStore
+
+    mock, target = start_mock(latency=args.latency, token_delay=args.token_delay)
+    Config.GIGACHAT_AUTH_URL = f"{target}/api/v2/oauth"
+    Config.GIGACHAT_API_URL = f"{target}/api/v1"
+    Config.TOKEN_CACHE_FILE = os.path.join(tempfile.mkdtemp(prefix="hr_bench_"), "token.json")
+    Config.LLM_CACHE_ENABLED = False
+    if args.llm_only:
+        Config.QUESTION_BANK_RETRIEVAL = False
+    if args.no_quota:
+        Config.LLM_SCHEDULER_ENABLED = False
+
+    server, base_url = interview_server.start_in_thread(
+        store=MemorySessionStore(), max_inflight=args.max_inflight, prefetch=False
+    )
+    results = {"question": [], "ttft": [], "rejected": [], "completed": 0}
+
+    async def run():
+        rng = random.Random(args.seed)
+        limiter = asyncio.Semaphore(args.concurrency)
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        timeout = aiohttp.ClientTimeout(total=120)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            async def bounded(index):
+                async with limiter:
+                    await server_candidate(http, base_url, args.transport, args.questions, args.think_time,
+                                           random.Random(rng.random()), results)
+            await asyncio.gather(*(bounded(i) for i in range(args.candidates)))
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    questions = np.array(results["question"])
+    quota = "без лимита" if not Config.LLM_SCHEDULER_ENABLED else f"{Config.LLM_REQUESTS_PER_MINUTE} запр./мин"
+    print(f"Кандидатов: {args.candidates}, одновременно {args.concurrency}, транспорт {args.transport}, "
+          f"{args.questions} ответов, обдумывание ~{args.think_time} с, заглушка {args.latency}, квота {quota}")
+    print(f"Завершено собеседований: {results['completed']}, время {elapsed:.1f} с, "
+          f"ответов в секунду {len(questions) / elapsed:.1f}")
+    print(f"Следующий вопрос: p50 {np.percentile(questions, 50):.3f} с, p95 {np.percentile(questions, 95):.3f} с, "
+          f"p99 {np.percentile(questions, 99):.3f} с")
+    if results["ttft"]:
+        print(f"Первый фрагмент вопроса: p50 {np.percentile(results['ttft'], 50):.3f} с, "
+              f"p95 {np.percentile(results['ttft'], 95):.3f} с")
+    print(f"Отказы: {len(results['rejected'])} {sorted(set(results['rejected']))}")
+    print(f"Сервер: {server.get_stats()}")
+    print(f"Заглушка: {mock.stats}; потоков процесса: {threading.active_count()}, "
+          f"пик RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} МБ")
+
+
+def analysis_schema_errors(analysis):
+    """Расхождения отчета со схемой analyze_interview"""
+    from services.analyzer import ANALYSIS_FIELDS, RECOMMENDATIONS
+    from services.skill_normalizer import ASSESSMENT_RANK
+
+    errors = [f"нет поля {field}" for field in ANALYSIS_FIELDS if field not in analysis]
+    errors += [f"{field}: {type(analysis[field]).__name__} вместо {field_type.__name__}"
+               for field, field_type in ANALYSIS_FIELDS.items()
+               if field in analysis and not isinstance(analysis[field], field_type)]
+    if not errors:
+        if not 0 <= analysis["overall_score"] <= 100:
+            errors.append(f"overall_score вне 0-100: {analysis['overall_score']}")
+        if analysis["recommendation"] not in RECOMMENDATIONS:
+            errors.append(f"recommendation: {analysis['recommendation']}")
+        errors += [f"skill_assessment[{skill}]: {status}" for skill, status in analysis["skill_assessment"].items()
+                   if status not in ASSESSMENT_RANK]
+        errors += [f"{field}: не строка" for field in ("strengths", "weaknesses")
+                   if not all(isinstance(item, str) for item in analysis[field])]
+    return errors
+
+
+def bench_analysis(args):
+    """Анализ собеседования: один запрос (по первым 3000 символам или по всему диалогу) против map-reduce"""
+    from mock_gigachat import start_in_thread as start_mock
+    from services.analyzer import InterviewAnalyzer
+    from services.skill_extractor import get_skill_extractor
+
+    mock, target = start_mock(latency=args.latency, token_delay=0, prompt_delay=args.prompt_delay)
+    Config.GIGACHAT_AUTH_URL = f"{target}/api/v2/oauth"
+    Config.GIGACHAT_API_URL = f"{target}/api/v1"
+    Config.TOKEN_CACHE_FILE = os.path.join(tempfile.mkdtemp(prefix="hr_bench_"), "token.json")
+    Config.LLM_CACHE_ENABLED = False
+
+    rng = np.random.default_rng(args.seed)
+    skills = list(get_skill_extractor().taxonomy)
+    vacancies = list(Config.DEFAULT_VACANCIES.items())
+    interviews = []
+    for _ in range(args.interviews):
+        vacancy, required = vacancies[rng.integers(len(vacancies))]
+        history = [{"role": "assistant", "content": f"Добро пожаловать на собеседование на позицию {vacancy}!"}]
+        for turn in range(args.questions):
+            history.append({"role": "assistant", "content": f"Вопрос {turn + 1}: расскажите о работе с "
+                                                            f"{required[turn % len(required)]}."})
+            history.append({"role": "user", "content": synthetic_answer(rng, skills, args.chars,
+                                                                        required[turn % len(required)])})
+        history.append({"role": "assistant", "content": "Благодарим вас за ответы! На этом собеседование завершено."})
+        interviews.append((vacancy, required, history))
+
+    analyzer = InterviewAnalyzer()
+    print(f"Собеседований: {args.interviews}, {args.questions} ответов по ~{args.chars} симв., "
+          f"заглушка {args.latency} + {args.prompt_delay} с на 1000 токенов промпта\n")
+    print(f"{'режим':<12}{'p50, с':>10}{'p95, с':>10}{'запросов':>10}{'ответов в промпте':>20}{'ошибки схемы':>15}")
+    single_max_chars = Config.ANALYSIS_SINGLE_MAX_CHARS
+    # single-all - один запрос без обрезки: полнота как у chunked, но весь диалог в одном промпте
+    for name, mode, max_chars in (("single", "single", single_max_chars), ("single-all", "single", None),
+                                  ("chunked", "chunked", None)):
+        Config.ANALYSIS_MODE = mode
+        Config.ANALYSIS_SINGLE_MAX_CHARS = max_chars
+        times = []
+        covered = 0
+        errors = []
+        requests_before = mock.stats["chat"]
+        for vacancy, required, history in interviews:
+            if mode == "single":
+                prompts = [analyzer._format_conversation(history)[:Config.ANALYSIS_SINGLE_MAX_CHARS]]
+            else:
+                prompts = analyzer._split_conversation(history)
+            covered += sum(1 for msg in history
+                           if msg["role"] == "user" and any(msg["content"] in prompt for prompt in prompts))
+
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                analysis = analyzer.analyze_interview(history, required, vacancy, use_cache=False)
+            times.append(time.perf_counter() - started)
+            errors += analysis_schema_errors(analysis)
+
+        print(f"{name:<12}{np.percentile(times, 50):>10.2f}{np.percentile(times, 95):>10.2f}"
+              f"{mock.stats['chat'] - requests_before:>10}"
+              f"{covered / (args.interviews * args.questions):>20.0%}{len(errors):>15}")
+        for error in sorted(set(errors))[:5]:
+            print(f"    {error}")
+    Config.ANALYSIS_SINGLE_MAX_CHARS = single_max_chars
+
+
+def bench_resilience(args):
+    """Автомат отключения: восстановление после пробных запросов, прерванных без ответа API"""
+    from services.llm_scheduler import QueueTimeoutError
+    from services.resilience import CircuitBreaker, ResilienceLayer, RetryPolicy
+
+    def make_layer():
+        layer = ResilienceLayer()
+        layer.retry_policy = RetryPolicy(max_retries=0)
+        layer.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=args.reset)
+        layer.hedge_enabled = False
+        return layer
+
+    def fail(error):
+        def attempt():
+            raise error
+        return attempt
+
+    async def slow_attempt():
+        await asyncio.sleep(args.reset * 10)
+
+    async def cancelled_probe(layer):
+        task = asyncio.ensure_future(layer.execute_async(slow_attempt))
+        await asyncio.sleep(0)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def timed_out_probe(layer):
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(layer.execute_async(slow_attempt), args.reset)
+
+    scenarios = [
+        ("QueueTimeoutError", lambda layer: layer.execute(fail(QueueTimeoutError("очередь")))),
+        ("KeyboardInterrupt", lambda layer: layer.execute(fail(KeyboardInterrupt()))),
+        ("отмена задачи", lambda layer: asyncio.run(cancelled_probe(layer))),
+        ("asyncio.wait_for", lambda layer: asyncio.run(timed_out_probe(layer))),
+    ]
+
+    print(f"Сброс автомата через {args.reset} с, пробный запрос прерывается без ответа API\n")
+    print(f"{'прерывание пробы':<22}{'после пробы':>14}{'следующий запрос':>20}")
+    failed = 0
+    for name, interrupt in scenarios:
+        layer = make_layer()
+        with contextlib.suppress(ConnectionError):
+            layer.execute(fail(ConnectionError("сбой")))
+        time.sleep(args.reset)
+        with contextlib.suppress(Exception, KeyboardInterrupt):
+            interrupt(layer)
+        state = layer.breaker.state
+        # Автомат должен пропустить новый пробный запрос, а его успех - замкнуть автомат
+        try:
+            layer.execute(lambda: "ok")
+            outcome = layer.breaker.state
+        except Exception as e:
+            outcome = type(e).__name__
+        failed += outcome != CircuitBreaker.CLOSED
+        print(f"{name:<22}{state:>14}{outcome:>20}")
+
+    print(f"\nАвтомат восстановился: {len(scenarios) - failed} из {len(scenarios)}")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки HR-аватара")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    match = commands.add_parser("match", help="пакетный скоринг кандидатов по вакансиям")
+    match.add_argument("--candidates", type=int, default=10000)
+    match.add_argument("--vacancies", type=int, default=50)
+    match.add_argument("--vocabulary", type=int, default=500, help="размер словаря навыков")
+    match.add_argument("--min-skills", type=int, default=3)
+    match.add_argument("--max-skills", type=int, default=15)
+    match.add_argument("--required", type=int, default=6, help="навыков в вакансии")
+    match.add_argument("--dim", type=int, default=384, help="размерность синтетических эмбеддингов")
+    match.add_argument("--baseline", type=int, default=200, help="кандидатов для попарного расчета")
+    match.add_argument("--model", action="store_true", help="реальная модель вместо синтетических векторов")
+    match.add_argument("--seed", type=int, default=0)
+    match.set_defaults(func=bench_match)
+
+    index = commands.add_parser("index", help="индекс кандидатов: top-k по вакансии")
+    index.add_argument("--candidates", type=int, default=50000)
+    index.add_argument("--vocabulary", type=int, default=2000)
+    index.add_argument("--professions", type=int, default=100)
+    index.add_argument("--queries", type=int, default=20)
+    index.add_argument("--k", type=int, default=20)
+    index.add_argument("--nlist", type=int, default=64)
+    index.add_argument("--nprobe", type=int, default=8)
+    index.add_argument("--dim", type=int, default=384)
+    index.add_argument("--seed", type=int, default=0)
+    index.set_defaults(func=bench_index)
+
+    extract = commands.add_parser("extract", help="извлечение текста из PDF")
+    extract.add_argument("--file", help="PDF для замера; по умолчанию генерируется синтетический")
+    extract.add_argument("--pages", type=int, default=40, help="страниц в синтетическом PDF")
+    extract.add_argument("--max-chars", type=int, default=2000)
+    extract.add_argument("--repeat", type=int, default=3)
+    extract.set_defaults(func=bench_extract)
+
+    embed = commands.add_parser("embed", help="бэкенды эмбеддингов: torch против onnx (int8)")
+    embed.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    embed.add_argument("--batch", type=int, default=1000, help="навыков в замере пропускной способности")
+    embed.add_argument("--latency-runs", type=int, default=50)
+    embed.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    embed.add_argument("--backend", help=argparse.SUPPRESS)
+    embed.add_argument("--out", help=argparse.SUPPRESS)
+    embed.set_defaults(func=bench_embed)
+
+    skills = commands.add_parser("skills", help="локальное извлечение навыков по таксономии")
+    skills.add_argument("--resumes", type=int, default=2000)
+    skills.add_argument("--chars", type=int, default=3000, help="примерная длина резюме")
+    skills.add_argument("--skills", type=int, default=12, help="навыков в резюме")
+    skills.add_argument("--taxonomy", help="JSON таксономии (по умолчанию Config.SKILL_TAXONOMY_FILE)")
+    skills.add_argument("--seed", type=int, default=0)
+    skills.set_defaults(func=bench_skills)
+
+    questions = commands.add_parser("questions", help="банк вопросов: поиск следующего вопроса")
+    questions.add_argument("--interviews", type=int, default=500)
+    questions.add_argument("--questions", type=int, default=15, help="вопросов в собеседовании")
+    questions.add_argument("--dim", type=int, default=384)
+    questions.add_argument("--model", action="store_true", help="реальная модель вместо синтетических векторов")
+    questions.add_argument("--seed", type=int, default=0)
+    questions.set_defaults(func=bench_questions)
+
+    memory = commands.add_parser("memory", help="размер промпта адаптивного вопроса: память собеседования")
+    memory.add_argument("--interviews", type=int, default=50)
+    memory.add_argument("--questions", type=int, default=14, help="ответов кандидата")
+    memory.add_argument("--chars", type=int, default=1500, help="примерная длина ответа")
+    memory.add_argument("--seed", type=int, default=0)
+    memory.set_defaults(func=bench_memory)
+
+    sessions = commands.add_parser("sessions", help="хранилище сессий: сериализация и память на сессию")
+    sessions.add_argument("--sessions", type=int, default=10000)
+    sessions.add_argument("--templates", type=int, default=20, help="разных прогонов собеседования")
+    sessions.add_argument("--questions", type=int, default=14, help="ответов кандидата")
+    sessions.add_argument("--chars", type=int, default=600, help="примерная длина ответа")
+    sessions.add_argument("--live", type=int, default=200, help="живых агентов для сравнения")
+    sessions.add_argument("--seed", type=int, default=0)
+    sessions.set_defaults(func=bench_sessions)
+
+    server = commands.add_parser("server", help="сервер собеседований: одновременные кандидаты")
+    server.add_argument("--candidates", type=int, default=300)
+    server.add_argument("--concurrency", type=int, default=300, help="одновременных кандидатов")
+    server.add_argument("--questions", type=int, default=6, help="ответов кандидата")
+    server.add_argument("--transport", choices=["answer", "stream", "ws"], default="stream")
+    server.add_argument("--think-time", type=float, default=1.0, help="среднее время на ответ, с")
+    server.add_argument("--max-inflight", type=int, default=None)
+    server.add_argument("--latency", default="lognormal:0.5,0.3", help="задержка заглушки GigaChat")
+    server.add_argument("--token-delay", type=float, default=0.01)
+    server.add_argument("--llm-only", action="store_true", help="без банка вопросов: каждый вопрос от LLM")
+    server.add_argument("--no-quota", action="store_true", help="без лимитов GigaChat в минуту (LLM_SCHEDULER_ENABLED)")
+    server.add_argument("--seed", type=int, default=0)
+    server.set_defaults(func=bench_server)
+
+    analysis = commands.add_parser("analysis", help="анализ собеседования: один запрос против map-reduce")
+    analysis.add_argument("--interviews", type=int, default=10)
+    analysis.add_argument("--questions", type=int, default=12, help="ответов кандидата")
+    analysis.add_argument("--chars", type=int, default=600, help="примерная длина ответа")
+    analysis.add_argument("--latency", default="fixed:1.0", help="задержка заглушки GigaChat")
+    analysis.add_argument("--prompt-delay", type=float, default=1.0, help="задержка на 1000 токенов промпта, с")
+    analysis.add_argument("--seed", type=int, default=0)
+    analysis.set_defaults(func=bench_analysis)
+
+    resilience = commands.add_parser("resilience", help="автомат отключения: прерванные пробные запросы")
+    resilience.add_argument("--reset", type=float, default=0.2, help="время до пробного запроса, с")
+    resilience.set_defaults(func=bench_resilience)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,210 @@
+# services/bulk_ingest.py
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from . import text_extraction
+from .async_gigachat_client import AsyncGigaChatClient, close_async_sessions
+from .match_scoring import BatchMatchScorer
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+def _extract_file(file_path, max_chars):
+    """Извлечение текста в дочернем процессе: (текст, секунды)"""
+    started = time.perf_counter()
+    # Файлы уже распределены по процессам - страницы внутри файла не распараллеливаем
+    text = text_extraction.extract_text(file_path, max_chars=max_chars, parallel=False)
+    return text, time.perf_counter() - started
+
+
+def load_vacancies(path=None):
+    """Вакансии {название: навыки} из JSON-файла, каталога VACANCIES_DIR или настроек по умолчанию"""
+    if path and os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    vacancies = {}
+    for file_path in sorted(glob.glob(os.path.join(path or Config.VACANCIES_DIR, "*.json"))):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            vacancies[data["name"]] = data["required_skills"]
+        except Exception as e:
+            print(f"Ошибка чтения вакансии {file_path}: {e}")
+    return vacancies or dict(Config.DEFAULT_VACANCIES)
+
+
+class IngestCheckpoint:
+    """Контрольная точка: обработанные файлы и длина выходного JSONL.
+
+    Выходной файл обрезается до сохраненной длины при возобновлении,
+    поэтому записи, попавшие в файл после последней контрольной точки, не дублируются.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.output_bytes = 0
+        self.stats = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.done = set(data.get("done", []))
+            self.output_bytes = data.get("output_bytes", 0)
+            self.stats = data.get("stats", {})
+
+    @staticmethod
+    def file_key(file_path):
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"done": sorted(self.done), "output_bytes": self.output_bytes, "stats": self.stats}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class BulkIngestor:
+    """Пакетная обработка каталога резюме.
+
+    Этапы: извлечение текста (пул процессов) -> навыки через GigaChat
+    (не больше INGEST_LLM_CONCURRENCY запросов одновременно) -> пакетный скоринг
+    по всем вакансиям. Результаты дописываются в JSONL после каждого пакета,
+    затем обновляется контрольная точка.
+    """
+
+    def __init__(self, vacancies, output_path, checkpoint_path=None, workers=None, llm_concurrency=None,
+                 batch_size=None, max_chars=None, index=None, use_cache=None):
+        self.vacancies = vacancies
+        self.output_path = output_path
+        self.checkpoint = IngestCheckpoint(checkpoint_path or output_path + ".checkpoint.json")
+        self.workers = workers or Config.INGEST_WORKERS
+        self.llm_concurrency = llm_concurrency or Config.INGEST_LLM_CONCURRENCY
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.max_chars = max_chars or Config.RESUME_TEXT_MAX_CHARS
+        self.index = index
+        self.use_cache = use_cache
+        self.scorer = BatchMatchScorer()
+        self.timings = {"extract": 0.0, "llm": 0.0, "score": 0.0, "write": 0.0}
+
+    @staticmethod
+    def find_files(input_dir):
+        files = []
+        for root, _, names in os.walk(input_dir):
+            for name in names:
+                if name.lower().endswith(RESUME_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return sorted(files)
+
+    def run(self, input_dir, progress=None):
+        """Обработка каталога. progress(done, total, stats) вызывается после каждого пакета"""
+        return asyncio.run(self._run(input_dir, progress))
+
+    async def _run(self, input_dir, progress):
+        files = self.find_files(input_dir)
+        pending = [path for path in files if IngestCheckpoint.file_key(path) not in self.checkpoint.done]
+        total = len(files)
+        done = total - len(pending)
+
+        self._truncate_output()
+        client = AsyncGigaChatClient()
+        limiter = asyncio.Semaphore(self.llm_concurrency)
+        started = time.perf_counter()
+        processed = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for i in range(0, len(pending), self.batch_size):
+                    batch = pending[i:i + self.batch_size]
+                    records = await asyncio.gather(*(self._process_file(path, pool, client, limiter) for path in batch))
+                    await asyncio.to_thread(self._score, records)
+                    await asyncio.to_thread(self._write, batch, records)
+
+                    processed += len(batch)
+                    done += len(batch)
+                    if progress:
+                        progress(done, total, self.get_stats(processed, time.perf_counter() - started))
+            finally:
+                await close_async_sessions()
+
+        return self.get_stats(processed, time.perf_counter() - started)
+
+    async def _process_file(self, path, pool, client, limiter):
+        record = {"file": path, "skills": [], "scores": {}, "chars": 0, "error": None}
+        loop = asyncio.get_running_loop()
+        try:
+            text, seconds = await loop.run_in_executor(pool, _extract_file, path, self.max_chars)
+            self.timings["extract"] += seconds
+            record["chars"] = len(text)
+            if not text.strip():
+                record["error"] = "Пустой текст"
+                return record
+
+            async with limiter:
+                llm_started = time.perf_counter()
+                record["skills"] = await client.extract_skills_from_text(text, use_cache=self.use_cache)
+                self.timings["llm"] += time.perf_counter() - llm_started
+        except Exception as e:
+            record["error"] = str(e)
+        return record
+
+    def _score(self, records):
+        started = time.perf_counter()
+        names = list(self.vacancies)
+        scored = [record for record in records if record["skills"]]
+        if scored and names:
+            matrix = self.scorer.score_matrix([r["skills"] for r in scored], [self.vacancies[n] for n in names])
+            for record, row in zip(scored, matrix):
+                record["scores"] = {name: round(float(score), 2) for name, score in zip(names, row)}
+                best = int(row.argmax())
+                record["best_vacancy"] = names[best]
+                record["best_score"] = round(float(row[best]), 2)
+
+        if self.index is not None and scored:
+            self.index.add_many([
+                (r["file"], r["skills"], {"file": r["file"], "best_vacancy": r.get("best_vacancy")}) for r in scored
+            ])
+        self.timings["score"] += time.perf_counter() - started
+
+    def _write(self, batch, records):
+        started = time.perf_counter()
+        with open(self.output_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self.checkpoint.output_bytes = f.tell()
+
+        for path in batch:
+            self.checkpoint.done.add(IngestCheckpoint.file_key(path))
+        self.checkpoint.stats = {name: round(value, 3) for name, value in self.timings.items()}
+        self.checkpoint.save()
+        self.timings["write"] += time.perf_counter() - started
+
+    def _truncate_output(self):
+        """Отбрасываем хвост выходного файла, записанный после последней контрольной точки"""
+        if not os.path.exists(self.output_path):
+            return
+        if os.path.getsize(self.output_path) > self.checkpoint.output_bytes:
+            with open(self.output_path, 'r+b') as f:
+                f.truncate(self.checkpoint.output_bytes)
+
+    def get_stats(self, processed, elapsed):
+        return {
+            "processed": processed,
+            "elapsed": round(elapsed, 2),
+            "files_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+            # Для этапов в пуле и LLM - суммарное время по файлам, а не время стены
+            "stage_seconds": {name: round(value, 2) for name, value in self.timings.items()}
+        }
\ No newline at end of file
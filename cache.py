@@ -0,0 +1,219 @@
+# services/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Ограниченный потокобезопасный LRU-кэш в памяти"""
+
+    def __init__(self, max_items=512):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            "items": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class SQLiteCache:
+    """Персистентный кэш на SQLite с TTL и вытеснением по размеру.
+
+    Значения хранятся как JSON. При превышении max_bytes удаляются
+    записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, path, table="cache", ttl=None, max_bytes=None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        cache_dir = os.path.dirname(os.path.abspath(path))
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed)")
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def get_entry(self, key):
+        """(значение, время записи) или None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            if self.ttl and created + self.ttl < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(value), created
+
+    def set(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode('utf-8')), now, now)
+            )
+            self._conn.commit()
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self):
+        """Удаление просроченных и самых старых записей сверх лимита"""
+        if self.ttl:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl,)
+            )
+            self.evictions += cursor.rowcount
+
+        if not self.max_bytes:
+            self._conn.commit()
+            return
+
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total > self.max_bytes:
+            # Освобождаем с запасом, чтобы не чистить кэш на каждой записи
+            target = self.max_bytes * 0.9
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed"
+            ).fetchall()
+            stale = []
+            for key, size in rows:
+                if total <= target:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale)
+            self.evictions += len(stale)
+        self._conn.commit()
+
+    def get_stats(self):
+        with self._lock:
+            items, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "items": items,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """Двухуровневый кэш: LRU в памяти перед персистентным SQLite"""
+
+    def __init__(self, max_items=512, path=None, table="cache", ttl=None, max_bytes=None):
+        self.memory = LRUCache(max_items)
+        self.disk = SQLiteCache(path, table=table, ttl=ttl, max_bytes=max_bytes) if path else None
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = self.memory.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            if not self.ttl or stored_at + self.ttl >= time.time():
+                return value
+            self.memory.delete(key)
+
+        if self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                # Время записи переносится из SQLite: подъем в память не продлевает TTL
+                self.memory.set(key, entry)
+                return entry[0]
+
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, (value, time.time()))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def get_stats(self):
+        return {
+            "memory": self.memory.get_stats(),
+            "disk": self.disk.get_stats() if self.disk is not None else None
+        }
\ No newline at end of file
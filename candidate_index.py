@@ -0,0 +1,286 @@
+# services/candidate_index.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from config import Config
+from .match_scoring import BatchMatchScorer
+
+
+class CandidateIndex:
+    """Персистентный индекс кандидатов для выборки top-k по вакансии.
+
+    Нормированные эмбеддинги навыков каждого кандидата лежат подряд в
+    append-only файле float32 (рваный массив), смещения и метаданные - в SQLite.
+    Удаление помечает запись (tombstone); compact() переписывает файл без удаленных.
+
+    Точный поиск - перебор NumPy с той же оценкой, что и ResumeParser.
+    Приближенный режим (IVF): кандидаты кластеризуются k-means по среднему
+    вектору навыков, запрос пересчитывается точно только в nprobe ближайших кластерах.
+    Рассчитан на одного пишущего в процессе; чтение потокобезопасно.
+    """
+
+    def __init__(self, path=None, model_name=None, scorer=None):
+        self.path = path or Config.CANDIDATE_INDEX_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.centroids_path = os.path.join(self.path, "centroids.npy")
+        self.scorer = scorer or BatchMatchScorer(model_name=model_name)
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._rows = 0
+        self._table = None
+        self.centroids = np.load(self.centroids_path) if os.path.exists(self.centroids_path) else None
+
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "id TEXT PRIMARY KEY, offset INTEGER, count INTEGER, cluster INTEGER, "
+            "deleted INTEGER DEFAULT 0, meta TEXT, updated REAL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    # --- Запись ---
+
+    def add(self, candidate_id, skills, meta=None):
+        """Добавление или замена кандидата"""
+        self.add_many([(candidate_id, skills, meta)])
+
+    def add_many(self, items):
+        """Пакетное добавление: [(candidate_id, skills, meta), ...]"""
+        items = [(str(cid), list(skills or []), meta) for cid, skills, meta in items]
+        all_skills = [skill for _, skills, _ in items for skill in skills]
+        embeddings = self.scorer.embed(all_skills) if all_skills else None
+
+        with self._lock:
+            if embeddings is not None and self.dim is None:
+                self.dim = embeddings.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+
+            offset = self._row_count()
+            records = []
+            position = 0
+            for candidate_id, skills, meta in items:
+                vectors = embeddings[position:position + len(skills)] if skills else None
+                position += len(skills)
+                cluster = self._assign_cluster(vectors) if vectors is not None else None
+                records.append((candidate_id, offset, len(skills), cluster, json.dumps(meta, ensure_ascii=False),
+                                time.time()))
+                offset += len(skills)
+
+            if embeddings is not None:
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candidates (id, offset, count, cluster, deleted, meta, updated) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                records
+            )
+            self._conn.commit()
+            self._table = None
+
+    def remove(self, candidate_id):
+        """Удаление кандидата (tombstone). True, если кандидат был в индексе"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE candidates SET deleted = 1, updated = ? WHERE id = ? AND deleted = 0",
+                (time.time(), str(candidate_id))
+            )
+            self._conn.commit()
+            self._table = None
+            return cursor.rowcount > 0
+
+    def compact(self):
+        """Перезапись файла векторов без удаленных и замененных записей"""
+        with self._lock:
+            table = self._load_table()
+            vectors = self._get_vectors()
+            tmp_path = self.vectors_path + ".tmp"
+            records = []
+            offset = 0
+            with open(tmp_path, "wb") as f:
+                for candidate_id, start, count in zip(table["ids"], table["offsets"], table["counts"]):
+                    if count:
+                        f.write(np.ascontiguousarray(vectors[start:start + count]).tobytes())
+                    records.append((int(offset), candidate_id))
+                    offset += count
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._vectors = None
+            os.replace(tmp_path, self.vectors_path)
+            self._conn.execute("DELETE FROM candidates WHERE deleted = 1")
+            self._conn.executemany("UPDATE candidates SET offset = ? WHERE id = ?", records)
+            self._conn.commit()
+            self._table = None
+
+    # --- Приближенный режим (IVF) ---
+
+    def build_ivf(self, nlist=None, iterations=10, seed=0):
+        """Кластеризация кандидатов k-means по среднему вектору навыков"""
+        with self._lock:
+            table = self._load_table()
+            pooled = self._pooled_vectors(table)
+            if not len(pooled):
+                return None
+
+            nlist = min(nlist or Config.CANDIDATE_INDEX_NLIST, len(pooled))
+            rng = np.random.default_rng(seed)
+            centroids = pooled[rng.choice(len(pooled), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(pooled @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = pooled[assignment == c]
+                    if len(members):
+                        centroid = members.mean(axis=0)
+                        centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+            assignment = np.argmax(pooled @ centroids.T, axis=1)
+            active = table["counts"] > 0
+            self._conn.executemany(
+                "UPDATE candidates SET cluster = ? WHERE id = ?",
+                [(int(c), cid) for c, cid in zip(assignment, np.asarray(table["ids"], dtype=object)[active])]
+            )
+            self._conn.commit()
+            self.centroids = centroids.astype(np.float32)
+            np.save(self.centroids_path, self.centroids)
+            self._table = None
+            return nlist
+
+    def _assign_cluster(self, vectors):
+        if self.centroids is None:
+            return None
+        pooled = vectors.mean(axis=0)
+        return int(np.argmax(self.centroids @ pooled))
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _pooled_vectors(self, table):
+        """Средний нормированный вектор навыков каждого кандидата с навыками"""
+        active = table["counts"] > 0
+        if not active.any():
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        vectors = self._get_vectors()
+        rows = self._gather_rows(table["offsets"][active], table["counts"][active])
+        sums = np.add.reduceat(vectors[rows], self._segment_starts(table["counts"][active]), axis=0)
+        return self._normalize(sums / table["counts"][active][:, None])
+
+    # --- Поиск ---
+
+    def search(self, required_skills, k=20, approximate=False, nprobe=None):
+        """Лучшие k кандидатов для вакансии: [(candidate_id, score, meta), ...]"""
+        if not required_skills:
+            return []
+        query = self.scorer.embed(list(required_skills))
+
+        with self._lock:
+            table = self._load_table()
+            if not len(table["ids"]):
+                return []
+            vectors = self._get_vectors()
+
+            candidates = np.flatnonzero(table["counts"] > 0)
+            if approximate and self.centroids is not None:
+                nprobe = nprobe or Config.CANDIDATE_INDEX_NPROBE
+                pooled_query = self._normalize(query.mean(axis=0))
+                probe = np.argsort(-(self.centroids @ pooled_query))[:nprobe]
+                candidates = candidates[np.isin(table["clusters"][candidates], probe)]
+
+            # Оценки только у кандидатов с навыками из просмотренных кластеров: остальные не попадают в top-k
+            scores = np.zeros(len(candidates), dtype=np.float32)
+            chunk_rows = Config.MATCH_SCORING_CHUNK
+            start = 0
+            while start < len(candidates):
+                # Чанк кандидатов с суммарно не более chunk_rows векторов
+                counts = table["counts"][candidates[start:]]
+                end = start + max(1, int(np.searchsorted(np.cumsum(counts), chunk_rows, side="right")))
+                chunk = candidates[start:end]
+                rows = self._gather_rows(table["offsets"][chunk], table["counts"][chunk])
+                similarity = query @ vectors[rows].T
+                best = np.maximum.reduceat(similarity, self._segment_starts(table["counts"][chunk]), axis=1)
+                scores[start:end] = best.mean(axis=0) * 100
+                start = end
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        ids, metas = table["ids"], table["metas"]
+        return [(ids[candidates[i]], round(float(scores[i]), 2), metas[candidates[i]]) for i in top]
+
+    @staticmethod
+    def _segment_starts(counts):
+        return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+    @staticmethod
+    def _gather_rows(offsets, counts):
+        """Индексы строк файла для набора сегментов (offset, count)"""
+        total = int(counts.sum())
+        starts = np.repeat(offsets - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return starts + np.arange(total)
+
+    # --- Служебное ---
+
+    def _row_count(self):
+        if self.dim is None or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * self.dim)
+
+    def _get_vectors(self):
+        rows = self._row_count()
+        if self._vectors is None or rows != self._rows:
+            self._rows = rows
+            self._vectors = (
+                np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+                if rows else np.zeros((0, self.dim or 0), dtype=np.float32)
+            )
+        return self._vectors
+
+    def _load_table(self):
+        """Живые кандидаты в порядке смещения (кэшируется до следующей записи)"""
+        if self._table is None:
+            rows = self._conn.execute(
+                "SELECT id, offset, count, cluster, meta FROM candidates WHERE deleted = 0 ORDER BY offset"
+            ).fetchall()
+            self._table = {
+                "ids": [row[0] for row in rows],
+                "offsets": np.array([row[1] for row in rows], dtype=np.int64),
+                "counts": np.array([row[2] for row in rows], dtype=np.int64),
+                "clusters": np.array([-1 if row[3] is None else row[3] for row in rows], dtype=np.int64),
+                "metas": [json.loads(row[4]) if row[4] else None for row in rows]
+            }
+        return self._table
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load_table()["ids"])
+
+    def get_stats(self):
+        with self._lock:
+            live = len(self._load_table()["ids"])
+            deleted = self._conn.execute("SELECT COUNT(*) FROM candidates WHERE deleted = 1").fetchone()[0]
+            rows = self._row_count()
+        return {
+            "candidates": live,
+            "tombstones": deleted,
+            "vectors": rows,
+            "bytes": rows * 4 * (self.dim or 0),
+            "ivf_lists": len(self.centroids) if self.centroids is not None else 0
+        }
\ No newline at end of file
@@ -10,8 +10,9 @@ class Config:
     GIGACHAT_CLIENT_ID = "cbf73482-95d9-4134-ba0b-0e31ad62dcfe"
     GIGACHAT_CLIENT_SECRET = os.getenv("GIGACHAT_CLIENT_SECRET", "")
     GIGACHAT_SCOPE = "GIGACHAT_API_PERS"
-    GIGACHAT_AUTH_URL = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
-    GIGACHAT_API_URL = "https://gigachat.devices.sberbank.ru/api/v1"
+    # URL можно переопределить, например, для локальной заглушки mock_gigachat.py
+    GIGACHAT_AUTH_URL = os.getenv("GIGACHAT_AUTH_URL", "https://ngw.devices.sberbank.ru:9443/api/v2/oauth")
+    GIGACHAT_API_URL = os.getenv("GIGACHAT_API_URL", "https://gigachat.devices.sberbank.ru/api/v1")
 
     # Пути к файлам
     DATA_DIR = "data"
@@ -23,11 +24,164 @@ class Config:
     MAX_QUESTIONS = 8
     MIN_MATCH_SCORE = 30
     VOICE_RECORD_DURATION = 15
-    TOKEN_CACHE_FILE = "gigachat_token.json"
+    TOKEN_CACHE_FILE = os.getenv("GIGACHAT_TOKEN_FILE", "gigachat_token.json")
+    TOKEN_REFRESH_AHEAD = 120  # обновлять токен за 2 минуты до истечения
+    TOKEN_RETRY_INTERVAL = 30  # повтор после неудачной авторизации, секунд
     FONT_FAMILY = "Verdana, sans-serif"
     PRIMARY_COLOR = "#2E86AB"
     SECONDARY_COLOR = "#A23B72"
 
+    # Пул HTTP-соединений к GigaChat
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # число хостов
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # соединений на хост
+    HTTP_POOL_BLOCK = True  # ждать свободное соединение вместо превышения лимита
+
+    # Запросы к GigaChat
+    GIGACHAT_MODEL = "GigaChat"
+    GIGACHAT_REQUEST_TIMEOUT = 60  # секунд на один запрос
+    GIGACHAT_MAX_CONCURRENCY = int(os.getenv("GIGACHAT_MAX_CONCURRENCY", "32"))  # одновременных async-запросов
+
+    # Устойчивость запросов к GigaChat
+    GIGACHAT_MAX_RETRIES = 3  # повторов при 429/5xx и сетевых ошибках
+    GIGACHAT_RETRY_BASE_DELAY = 0.5  # секунд, удваивается с каждой попыткой
+    GIGACHAT_RETRY_MAX_DELAY = 8
+    GIGACHAT_BREAKER_THRESHOLD = 5  # сбоев подряд до размыкания автомата
+    GIGACHAT_BREAKER_RESET = 30  # секунд до пробного запроса
+    GIGACHAT_HEDGE_ENABLED = os.getenv("GIGACHAT_HEDGE_ENABLED", "0") == "1"
+    GIGACHAT_HEDGE_WINDOW = 200  # последних запросов для расчета p95
+    GIGACHAT_HEDGE_MIN_SAMPLES = 20
+    GIGACHAT_HEDGE_WORKERS = 32
+
+    # Планировщик запросов (общая квота GigaChat)
+    LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "1") == "1"
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "600"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "500000"))
+    LLM_QUEUE_TIMEOUT = 120  # секунд ожидания в очереди
+
+    # Кэш ответов GigaChat
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+    LLM_CACHE_MAX_TEMPERATURE = 0.3  # по умолчанию кэшируются только "детерминированные" вызовы
+    LLM_CACHE_MEMORY_ITEMS = 512
+    LLM_CACHE_FILE = os.path.join(DATA_DIR, "llm_cache.sqlite")
+    LLM_CACHE_TTL = 7 * 24 * 3600  # секунд
+    LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+    # Модели эмбеддингов
+    EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE")  # None - выбор sentence-transformers (cuda/cpu)
+    EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1") == "1"  # загружать модель при старте приложения
+    EMBEDDING_KEEP_LOADED = True  # не выгружать модель, когда на нее не осталось ссылок
+    EMBEDDING_CACHE_DIR = os.path.join(DATA_DIR, "embeddings")
+    EMBEDDING_CACHE_MEMORY_ITEMS = 4096
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx (int8, CPU)
+    ONNX_MODEL_DIR = os.path.join("models", "onnx")
+    ONNX_QUANTIZE = True  # динамическая int8-квантизация весов
+    ONNX_BATCH_SIZE = 64
+    ONNX_MAX_LENGTH = 128  # навыки короткие, длиннее токенов не бывает
+    ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 - по числу ядер
+    MATCH_SCORING_CHUNK = 16384  # навыков кандидатов на один матричный шаг пакетного скоринга
+
+    # Индекс кандидатов для поиска top-k по вакансии
+    CANDIDATE_INDEX_DIR = os.path.join(DATA_DIR, "candidate_index")
+    CANDIDATE_INDEX_NLIST = 64  # кластеров в приближенном режиме (IVF)
+    CANDIDATE_INDEX_NPROBE = 8  # просматриваемых кластеров на запрос
+
+    # Извлечение текста резюме
+    RESUME_TEXT_MAX_CHARS = 20000  # в GigaChat уходят первые 2000 символов, дальше читать незачем
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PDF_PARALLEL_MIN_PAGES = 16  # с какого числа страниц разбирать PDF в пуле процессов
+    PDF_PAGES_PER_TASK = 4
+
+    # Локальное извлечение навыков по таксономии (до обращения к GigaChat)
+    SKILL_EXTRACTOR_ENABLED = os.getenv("SKILL_EXTRACTOR_ENABLED", "1") == "1"
+    SKILL_TAXONOMY_FILE = os.getenv(
+        "SKILL_TAXONOMY_FILE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+    )
+    SKILL_EXTRACTOR_MIN_SKILLS = 5  # если найдено меньше, навыки дополнительно извлекает GigaChat
+
+    # Нормализация навыков (синонимы и версии -> навык таксономии)
+    SKILL_NORMALIZER_EMBEDDINGS = os.getenv("SKILL_NORMALIZER_EMBEDDINGS", "1") == "1"  # поиск ближайшего навыка
+    SKILL_NORMALIZER_THRESHOLD = 0.85  # минимальный косинус для замены на навык таксономии
+    SKILL_NORMALIZER_CACHE_FILE = os.path.join(DATA_DIR, "skill_normalization.sqlite")
+    SKILL_NORMALIZER_MEMORY_ITEMS = 16384
+
+    # Спекулятивная подготовка следующего вопроса, пока кандидат отвечает
+    QUESTION_PREFETCH_ENABLED = os.getenv("QUESTION_PREFETCH_ENABLED", "0") == "1"
+    QUESTION_PREFETCH_VARIANTS = 3  # вариантов вопроса на разные ответы
+    QUESTION_PREFETCH_SIMILARITY = os.getenv("QUESTION_PREFETCH_SIMILARITY", "embedding")  # embedding | lexical
+    # Пороги сходства ответа и варианта (задать сразу, уточнить) для каждого способа сравнения
+    QUESTION_PREFETCH_THRESHOLDS = {"embedding": (0.55, 0.35), "lexical": (0.4, 0.2)}
+    QUESTION_PREFETCH_WORKERS = 8
+    QUESTION_PREFETCH_MAX_WAIT = 30  # секунд ожидания незавершенной предвыборки
+
+    # Банк вопросов: следующий вопрос ищется локально, GigaChat - при низкой уверенности
+    QUESTION_BANK_FILE = os.getenv(
+        "QUESTION_BANK_FILE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.json")
+    )
+    QUESTION_BANK_INDEX_DIR = os.path.join(DATA_DIR, "question_bank")
+    QUESTION_BANK_RETRIEVAL = os.getenv("QUESTION_BANK_RETRIEVAL", "1") == "1"
+    QUESTION_BANK_MIN_CONFIDENCE = 0.55  # выше веса одних навыков (0.5): нужно и сходство с ответом
+
+    # Память собеседования: сводка ответов и подтверждения навыков вместо последних реплик
+    CONVERSATION_MEMORY_TOKEN_BUDGET = int(os.getenv("CONVERSATION_MEMORY_TOKEN_BUDGET", "600"))  # на историю в промпте
+    CONVERSATION_MEMORY_RECENT_CHARS = 1200  # последний ответ кандидата в промпте, не длиннее
+    CONVERSATION_MEMORY_NOTE_CHARS = 160  # краткая запись об ответе и фраза-подтверждение навыка
+    CONVERSATION_MEMORY_EVIDENCE_PER_SKILL = 2  # последних подтверждений на навык
+    CONVERSATION_MEMORY_SUMMARY_LINES = 8  # более старые ответы сворачиваются в одну строку
+
+    # Хранилище состояний собеседований: любой процесс продолжает собеседование по session_id
+    SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")  # memory | sqlite | redis
+    SESSION_STORE_FILE = os.path.join(DATA_DIR, "sessions.sqlite")
+    SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://127.0.0.1:6379/0")
+    SESSION_TTL = 24 * 3600  # секунд без ответов кандидата, после которых сессия удаляется
+    SESSION_MSGPACK = True  # msgpack, если установлен; иначе JSON
+    SESSION_COMPRESS_MIN_BYTES = 2048  # более длинные состояния сжимаются zlib
+
+    # Сервер собеседований (interview_server.py)
+    INTERVIEW_SERVER_MAX_SESSIONS = int(os.getenv("INTERVIEW_SERVER_MAX_SESSIONS", "2000"))  # сессий в памяти
+    INTERVIEW_SERVER_MAX_INFLIGHT = int(os.getenv("INTERVIEW_SERVER_MAX_INFLIGHT", "64"))  # ответов в обработке
+    INTERVIEW_SERVER_QUEUE_TIMEOUT = 5  # секунд ожидания свободного слота, затем 503
+    INTERVIEW_SERVER_ANSWER_TIMEOUT = 30  # секунд на следующий вопрос, затем резервный вопрос
+    INTERVIEW_SERVER_IDLE_TIMEOUT = 600  # сессия без запросов выгружается в хранилище сессий
+    INTERVIEW_SERVER_EVICT_INTERVAL = 30
+
+    # Оценка ответов во время собеседования: итоговый отчет собирается из готовых оценок
+    INCREMENTAL_EVALUATION_ENABLED = os.getenv("INCREMENTAL_EVALUATION_ENABLED", "1") == "1"
+    INCREMENTAL_EVALUATION_WORKERS = 32  # оценки всех собеседований процесса; ожидание ответа GigaChat
+    INCREMENTAL_EVALUATION_ANSWER_CHARS = 2000  # ответ кандидата в промпте оценки, не длиннее
+    INCREMENTAL_EVALUATION_MAX_WAIT = 30  # секунд ожидания незавершенных оценок при подведении итогов
+    INCREMENTAL_EVALUATION_MIN_COVERAGE = 0.5  # при меньшей доле оцененных ответов - полный анализ диалога
+    INCREMENTAL_EVALUATION_HIRE_SCORE = 75  # средняя оценка для рекомендации "hire"
+    INCREMENTAL_EVALUATION_HIRE_COVERAGE = 0.5  # и доля подтвержденных требований (partial - половина)
+    INCREMENTAL_EVALUATION_REJECT_SCORE = 50  # ниже - "reject"
+
+    # Анализ собеседования (InterviewAnalyzer)
+    ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "chunked")  # chunked - фрагменты параллельно (map-reduce) | single
+    ANALYSIS_CHUNK_TOKENS = 1000  # диалога во фрагменте; пары вопрос-ответ не разрываются
+    ANALYSIS_MAP_CONCURRENCY = 8  # фрагментов анализируются одновременно
+    ANALYSIS_SINGLE_MAX_CHARS = 3000  # single: диалог в промпте обрезается до этой длины
+
+    # Кэш анализа загруженных резюме
+    ANALYSIS_CACHE_VERSION = "3"  # увеличить при изменении логики разбора резюме
+    ANALYSIS_CACHE_FILE = os.path.join(DATA_DIR, "analysis_cache.sqlite")
+    ANALYSIS_CACHE_MEMORY_ITEMS = 256
+    ANALYSIS_CACHE_TTL = 30 * 24 * 3600  # секунд
+    ANALYSIS_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+    # Пакетная обработка резюме (ingest.py)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    INGEST_LLM_CONCURRENCY = int(os.getenv("INGEST_LLM_CONCURRENCY", "8"))
+    INGEST_BATCH_SIZE = 64
+
+    # Вакансии по умолчанию
+    DEFAULT_VACANCIES = {
+        "Python Разработчик": ["Python", "Django", "PostgreSQL", "Docker", "Git"],
+        "Data Scientist": ["Python", "ML", "Pandas", "SQL", "Statistics"],
+        "DevOps Engineer": ["Docker", "Kubernetes", "AWS", "Linux", "CI/CD"]
+    }
+
     VOICE_RECORD_DURATION = 15  # Увеличили до 15 секунд
     SAMPLE_RATE = 16000
     AUDIO_BUFFER_SIZE = 4096  # Увеличили буфер
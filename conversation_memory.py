@@ -0,0 +1,218 @@
+# services/conversation_memory.py
+"""
+Память собеседования для промптов адаптивных вопросов.
+
+Вместо последних реплик диалога целиком в промпт попадают:
+- последний вопрос и ответ кандидата дословно (длинный ответ обрезается);
+- подтверждения требуемых навыков: фразы из ответов, где навык упоминался;
+- краткая запись о каждом предыдущем ответе. Старые записи сворачиваются
+  в одну строку со списком упомянутых навыков.
+
+Память обновляется один раз на каждый ответ, промпт собирается под бюджет
+CONVERSATION_MEMORY_TOKEN_BUDGET, поэтому его размер не растет с длиной
+собеседования, а навыки из ранних ответов не теряются.
+"""
+import bisect
+import re
+
+from config import Config
+from .llm_scheduler import estimate_tokens
+from .skill_extractor import get_skill_extractor
+from .skill_normalizer import get_skill_normalizer, skill_id
+
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]*")
+
+# estimate_tokens считает ~3 символа на токен: так бюджет переводится в длину текста
+CHARS_PER_TOKEN = 3
+
+
+def count_tokens(text):
+    return estimate_tokens([{"content": text}])
+
+
+def shorten(text, limit):
+    """Текст в одну строку не длиннее limit символов, обрезанный по границе слова"""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    cut = text[:limit - 1]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(",;:") + "…"
+
+
+class ConversationMemory:
+    """Сводка диалога и подтверждения навыков одного собеседования"""
+
+    def __init__(self, required_skills, budget=None, extractor=None, normalizer=None):
+        self.budget = budget or Config.CONVERSATION_MEMORY_TOKEN_BUDGET
+        self.extractor = extractor or get_skill_extractor()
+        normalizer = normalizer or get_skill_normalizer()
+        # Требуемые навыки: идентификатор -> название
+        self.required = dict(normalizer.resolve_many(list(required_skills)))
+        self.pending_question = None
+        self.last_exchange = None
+        # Краткие записи о предыдущих ответах: (текст, навыки)
+        self.notes = []
+        self.folded_count = 0
+        self.folded_skills = []
+        # Подтверждения: идентификатор навыка -> [название, [фразы]]
+        self.evidence = {}
+        self.answers = 0
+
+    def add_question(self, question):
+        self.pending_question = question
+
+    def add_answer(self, answer):
+        """Учет ответа на текущий вопрос"""
+        if self.last_exchange is not None:
+            self._add_note(*self.last_exchange)
+        self.last_exchange = (self.pending_question or "", answer)
+        self.pending_question = None
+        self.answers += 1
+        self._add_evidence(answer)
+
+    def _add_note(self, question, answer):
+        skills = self.extractor.extract(answer)
+        first = SENTENCE_RE.search(answer)
+        gist = shorten(first.group() if first else answer, Config.CONVERSATION_MEMORY_NOTE_CHARS)
+        note = f"- {shorten(question, 80)} → {gist}"
+        if skills:
+            note += f" [{', '.join(skills)}]"
+        self.notes.append((note, skills))
+
+        # Самая старая запись сворачивается: от нее остаются только навыки
+        if len(self.notes) > Config.CONVERSATION_MEMORY_SUMMARY_LINES:
+            _, old_skills = self.notes.pop(0)
+            self.folded_count += 1
+            for skill in old_skills:
+                if skill not in self.folded_skills:
+                    self.folded_skills.append(skill)
+
+    def _add_evidence(self, answer):
+        sentences = [(m.start(), m.end()) for m in SENTENCE_RE.finditer(answer)]
+        starts = [start for start, _ in sentences]
+        seen = set()
+        for skill, start, end in self.extractor.find(answer):
+            if skill in seen or not sentences:
+                continue
+            seen.add(skill)
+            sentence_start, sentence_end = sentences[max(bisect.bisect_right(starts, start) - 1, 0)]
+            phrase = self._around(answer[sentence_start:sentence_end], start - sentence_start)
+            entry = self.evidence.setdefault(skill_id(skill), [skill, []])
+            entry[1].append(phrase)
+            # Храним самые свежие подтверждения
+            del entry[1][:-Config.CONVERSATION_MEMORY_EVIDENCE_PER_SKILL]
+
+    @staticmethod
+    def _around(sentence, position):
+        """Фраза вокруг упоминания навыка, если предложение длинное"""
+        limit = Config.CONVERSATION_MEMORY_NOTE_CHARS
+        if len(sentence) > limit:
+            start = max(0, min(position - limit // 3, len(sentence) - limit))
+            sentence = sentence[start:]
+            if start:
+                sentence = "…" + sentence[sentence.find(" ") + 1:]
+        return shorten(sentence, limit)
+
+    def render(self, budget=None):
+        """Текст истории для промпта не длиннее budget токенов"""
+        budget = budget or self.budget
+        # Последний обмен репликами важнее всего: ему до половины бюджета
+        recent = self._recent_text(budget // 2)
+        left = budget - count_tokens(recent) - 1
+        coverage = self._coverage_text(left)
+        left -= count_tokens(coverage) + 1
+        summary = self._summary_text(left)
+        return "\n\n".join(part for part in (summary, coverage, recent) if part)
+
+    def _recent_text(self, budget):
+        """Последний вопрос и ответ дословно и вопрос, на который кандидат отвечает сейчас"""
+        pending = f"Интервьюер: {shorten(self.pending_question, 300)}" if self.pending_question else ""
+        if self.last_exchange is None:
+            return pending
+
+        question, answer = self.last_exchange
+        lines = [f"Интервьюер: {shorten(question, 300)}", "Кандидат: ", pending]
+        free = max(budget - count_tokens("\n".join(lines)), 0) * CHARS_PER_TOKEN
+        lines[1] += shorten(answer, max(min(Config.CONVERSATION_MEMORY_RECENT_CHARS, free), 40))
+        return "\n".join(line for line in lines if line)
+
+    def _coverage_text(self, budget):
+        """Требуемые навыки с подтверждениями; навыки без них перечисляются всегда"""
+        header = "ПОДТВЕРЖДЕНИЯ НАВЫКОВ:"
+        other = [name for key, (name, _) in self.evidence.items() if key not in self.required]
+        extra = [f"- Также упоминались: {', '.join(other)}"] if other else []
+        # Не влезает - у каждого навыка становится меньше фраз, в конце остается только отметка
+        for keep in range(Config.CONVERSATION_MEMORY_EVIDENCE_PER_SKILL, -1, -1):
+            lines = [self._coverage_line(key, name, keep) for key, name in self.required.items()] + extra
+            if count_tokens("\n".join([header] + lines)) <= budget:
+                break
+
+        if not lines:
+            return ""
+        return "\n".join([header] + lines)
+
+    def _coverage_line(self, key, name, keep):
+        entry = self.evidence.get(key)
+        if entry is None:
+            return f"- {name}: в ответах не упоминался"
+        if not keep:
+            return f"- {name}: упоминался"
+        return f"- {name}: " + "; ".join(entry[1][-keep:])
+
+    def _summary_text(self, budget):
+        """Краткие записи о предыдущих ответах, сколько влезает (сначала свежие)"""
+        header = "КРАТКО О ПРЕДЫДУЩИХ ОТВЕТАХ:"
+        used = count_tokens(header)
+        lines = []
+        for note, _ in reversed(self.notes):
+            cost = count_tokens(note) + 1
+            if used + cost > budget:
+                break
+            lines.append(note)
+            used += cost
+
+        skipped = len(self.notes) - len(lines)
+        if self.folded_count or skipped:
+            folded = list(self.folded_skills)
+            for _, skills in self.notes[:skipped]:
+                folded.extend(skill for skill in skills if skill not in folded)
+            line = f"- Ранее ({self.folded_count + skipped} отв.): " + (
+                f"упоминались {', '.join(folded)}" if folded else "без конкретных навыков"
+            )
+            if used + count_tokens(line) + 1 <= budget:
+                lines.append(line)
+
+        if not lines:
+            return ""
+        return header + "\n" + "\n".join(reversed(lines))
+
+    def get_state(self):
+        """Состояние памяти для хранилища сессий (списки и словари)"""
+        return [
+            self.pending_question,
+            list(self.last_exchange) if self.last_exchange is not None else None,
+            [[note, skills] for note, skills in self.notes],
+            self.folded_count,
+            self.folded_skills,
+            self.evidence,
+            self.answers
+        ]
+
+    def load_state(self, state):
+        (self.pending_question, last_exchange, notes, self.folded_count,
+         self.folded_skills, self.evidence, self.answers) = state
+        self.last_exchange = tuple(last_exchange) if last_exchange is not None else None
+        self.notes = [(note, skills) for note, skills in notes]
+
+    def get_stats(self):
+        return {
+            "answers": self.answers,
+            "notes": len(self.notes),
+            "folded": self.folded_count,
+            "skills_with_evidence": len(self.evidence),
+            "required_covered": sum(1 for key in self.required if key in self.evidence)
+        }
\ No newline at end of file
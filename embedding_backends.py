@@ -0,0 +1,204 @@
+# services/embedding_backends.py
+"""
+Бэкенды вычисления эмбеддингов навыков.
+
+torch - SentenceTransformer (эталон).
+onnx  - та же модель MiniLM, экспортированная в ONNX с динамической int8-квантизацией,
+        исполняется onnxruntime на CPU: быстрее холодный старт и меньше памяти.
+
+Допуск onnx относительно torch (проверяется командой `python benchmark.py embed`):
+косинус между векторами одного навыка не ниже 0.98, расхождение match_score
+не больше 2 пунктов из 100. Векторы бэкендов различаются, поэтому кэш
+эмбеддингов ведется отдельно для каждого бэкенда (cache_name).
+"""
+import importlib.util
+import os
+import threading
+
+import numpy as np
+
+from config import Config
+from .model_registry import get_model_registry
+
+# onnxruntime нужен только для бэкенда onnx
+try:
+    import onnxruntime
+
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+
+class TorchBackend:
+    """SentenceTransformer из общего реестра моделей"""
+
+    name = "torch"
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name or Config.EMBEDDING_MODEL_NAME
+        self.cache_name = self.model_name
+        # Имя в реестре моделей и функция загрузки (None - SentenceTransformer)
+        self.registry_name = self.model_name
+        self.loader = None
+
+    def encode(self, texts):
+        registry = get_model_registry()
+        model = registry.acquire(self.model_name)
+        try:
+            return np.asarray(model.encode(list(texts), convert_to_numpy=True), dtype=np.float32)
+        finally:
+            registry.release(self.model_name)
+
+
+class OnnxBackend:
+    """MiniLM в ONNX (int8) на onnxruntime: mean pooling и L2-нормировка, как в SentenceTransformer"""
+
+    name = "onnx"
+
+    def __init__(self, model_name=None, quantize=None, model_dir=None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("Для EMBEDDING_BACKEND=onnx установите onnxruntime")
+
+        self.model_name = model_name or Config.EMBEDDING_MODEL_NAME
+        self.quantize = Config.ONNX_QUANTIZE if quantize is None else quantize
+        self.model_dir = os.path.join(model_dir or Config.ONNX_MODEL_DIR, self.model_name.replace("/", "_"))
+        suffix = "onnx-int8" if self.quantize else "onnx"
+        self.cache_name = f"{self.model_name}@{suffix}"
+        self.registry_name = self.cache_name
+        self.loader = self._load_session
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def hub_name(self):
+        # SentenceTransformer принимает короткие имена моделей из sentence-transformers
+        return self.model_name if "/" in self.model_name else f"sentence-transformers/{self.model_name}"
+
+    @property
+    def model_path(self):
+        return os.path.join(self.model_dir, "model-int8.onnx" if self.quantize else "model.onnx")
+
+    def encode(self, texts):
+        # Сессия учитывается в общем реестре моделей (ссылки, время загрузки, память):
+        # пока идет вычисление, ссылка удерживается и реестр не выгрузит модель
+        registry = get_model_registry()
+        session = registry.acquire(self.registry_name, loader=self.loader)
+        try:
+            return self._encode(session, list(texts))
+        finally:
+            registry.release(self.registry_name)
+
+    def _encode(self, session, texts):
+        tokenizer = self._get_tokenizer()
+        vectors = []
+        batch_size = Config.ONNX_BATCH_SIZE
+        for i in range(0, len(texts), batch_size):
+            batch = tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=Config.ONNX_MAX_LENGTH,
+                return_tensors="np"
+            )
+            inputs = {
+                item.name: batch[item.name].astype(np.int64)
+                for item in session.get_inputs() if item.name in batch
+            }
+            token_embeddings = session.run(None, inputs)[0]
+
+            # Mean pooling по значимым токенам, затем нормировка - как у all-MiniLM-L6-v2
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            vectors.append(pooled / np.clip(norms, 1e-12, None))
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(vectors).astype(np.float32)
+
+    def _get_tokenizer(self):
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    from transformers import AutoTokenizer
+
+                    if os.path.exists(os.path.join(self.model_dir, "tokenizer_config.json")):
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+                    else:
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.hub_name)
+        return self._tokenizer
+
+    def _load_session(self):
+        if not os.path.exists(self.model_path):
+            self.export()
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if Config.ONNX_THREADS:
+            options.intra_op_num_threads = Config.ONNX_THREADS
+        return onnxruntime.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+
+    def export(self):
+        """Однократный экспорт модели в ONNX (нужны torch и onnx) и int8-квантизация"""
+        # onnxruntime не устанавливает onnx, а без него не работают экспорт и квантизация
+        if importlib.util.find_spec("onnx") is None:
+            raise ImportError("Для экспорта модели в ONNX установите пакет onnx (pip install onnx)")
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+        print(f"📦 Экспорт {self.hub_name} в ONNX...")
+
+        tokenizer = AutoTokenizer.from_pretrained(self.hub_name)
+        tokenizer.save_pretrained(self.model_dir)
+        model = AutoModel.from_pretrained(self.hub_name)
+        model.eval()
+
+        sample = tokenizer(["Python", "PostgreSQL"], padding=True, return_tensors="pt")
+        names = ["input_ids", "attention_mask", "token_type_ids"]
+        names = [name for name in names if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in names),
+                fp32_path,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+
+        if self.quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            quantize_dynamic(fp32_path, self.model_path, weight_type=QuantType.QInt8)
+
+
+BACKENDS = {"torch": TorchBackend, "onnx": OnnxBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_embedding_backend(name=None, model_name=None):
+    """Бэкенд по имени; onnx без onnxruntime заменяется на torch"""
+    name = name or Config.EMBEDDING_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд эмбеддингов: {name}")
+    if name == "onnx" and not ONNXRUNTIME_AVAILABLE:
+        print("⚠️ onnxruntime не установлен, эмбеддинги считаются через torch")
+        name = "torch"
+    return BACKENDS[name](model_name=model_name)
+
+
+def get_embedding_backend():
+    """Общий для процесса бэкенд, выбранный в Config.EMBEDDING_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_embedding_backend()
+    return _backend
\ No newline at end of file
@@ -0,0 +1,198 @@
+# services/embedding_cache.py
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+from config import Config
+from .cache import LRUCache
+
+
+def normalize_skill(skill):
+    """Ключ навыка: нижний регистр, схлопнутые пробелы"""
+    return " ".join(str(skill).strip().lower().split())
+
+
+class EmbeddingCache:
+    """Кэш эмбеддингов навыков для одной модели.
+
+    Уровни: LRU в памяти -> векторы float32 в memory-mapped файле на диске.
+    Индекс "навык -> строка файла" хранится в SQLite. Векторы сохраняются
+    нормированными, поэтому косинусное сходство - это скалярное произведение.
+    """
+
+    GROW_ROWS = 1024
+
+    def __init__(self, model_name, cache_dir=None, memory_items=None):
+        self.model_name = model_name
+        safe_name = re.sub(r"[^\w.-]+", "_", model_name)
+        self.dir = os.path.join(cache_dir or Config.EMBEDDING_CACHE_DIR, safe_name)
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+
+        self.memory = LRUCache(memory_items or Config.EMBEDDING_CACHE_MEMORY_ITEMS)
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._capacity = 0
+        self.dim = None
+        self.disk_hits = 0
+        self.encoded = 0
+
+        self._conn = sqlite3.connect(os.path.join(self.dir, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self._load_dim()
+
+    def get_many(self, skills, encode_fn):
+        """Матрица эмбеддингов (len(skills), dim); encode_fn вызывается только для новых навыков"""
+        keys = [normalize_skill(skill) for skill in skills]
+        found = {}
+        missing = []
+
+        for key in keys:
+            if key in found:
+                continue
+            vector = self.memory.get(key)
+            if vector is None:
+                vector = self._read_disk(key)
+                if vector is not None:
+                    self.disk_hits += 1
+                    self.memory.set(key, vector)
+            if vector is None:
+                missing.append(key)
+            else:
+                found[key] = vector
+
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            originals = {}
+            for skill, key in zip(skills, keys):
+                originals.setdefault(key, str(skill).strip())
+            encoded = np.asarray(encode_fn([originals[key] for key in missing]), dtype=np.float32)
+            encoded = self._normalize(encoded)
+            self.encoded += len(missing)
+            self._write_disk(missing, encoded)
+            for key, vector in zip(missing, encoded):
+                self.memory.set(key, vector)
+                found[key] = vector
+
+        if not keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _read_disk(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT row FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            # Файл создал другой процесс после нашего запуска - размерность берем из meta
+            if self.dim is None and not self._load_dim():
+                return None
+            if row[0] >= self._capacity:
+                # Файл дописал другой процесс - переоткрываем с актуальным размером
+                self._open_vectors()
+            return np.array(self._vectors[row[0]])
+
+    def _write_disk(self, keys, vectors):
+        with self._lock:
+            if self.dim is None and not self._load_dim():
+                # Если другой процесс успел записать размерность, остается она
+                self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)",
+                                   (str(vectors.shape[1]),))
+                self._conn.commit()
+                self._load_dim()
+
+            # BEGIN IMMEDIATE сериализует выделение строк между процессами
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                next_row = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings").fetchone()[0]
+                rows = []
+                for key in keys:
+                    existing = self._conn.execute("SELECT row FROM embeddings WHERE key = ?", (key,)).fetchone()
+                    if existing:
+                        rows.append(existing[0])
+                    else:
+                        rows.append(next_row)
+                        next_row += 1
+
+                self._ensure_capacity(next_row)
+                for row, vector in zip(rows, vectors):
+                    self._vectors[row] = vector
+                self._vectors.flush()
+
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, row) VALUES (?, ?)", list(zip(keys, rows))
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _load_dim(self):
+        """Размерность векторов из meta и открытие файла. False - векторов еще нет"""
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if not row:
+            return False
+        self.dim = int(row[0])
+        self._open_vectors()
+        return True
+
+    def _open_vectors(self):
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        self._capacity = size // (4 * self.dim)
+        self._vectors = None
+        if self._capacity:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+
+    def _ensure_capacity(self, rows):
+        if rows <= self._capacity:
+            return
+        self._open_vectors()
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, self.GROW_ROWS)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open_vectors()
+
+    def get_stats(self):
+        memory = self.memory.get_stats()
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "model": self.model_name,
+            "stored": stored,
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "encoded": self.encoded,
+            "hit_rate": round((memory["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+_embedding_caches = {}
+_embedding_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name=None):
+    """Общий для процесса кэш эмбеддингов модели"""
+    model_name = model_name or Config.EMBEDDING_MODEL_NAME
+    if model_name not in _embedding_caches:
+        with _embedding_caches_lock:
+            if model_name not in _embedding_caches:
+                _embedding_caches[model_name] = EmbeddingCache(model_name)
+    return _embedding_caches[model_name]
\ No newline at end of file
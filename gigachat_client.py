@@ -1,136 +1,272 @@
 # services/gigachat_client.py
-import requests
 import json
-import os
-import base64
-from datetime import datetime, timedelta
+import time
 from config import Config
+from .http_pool import get_http_pool
+from .token_manager import get_token_manager
+from .response_cache import get_response_cache
+from .resilience import get_resilience, GigaChatAPIError, parse_retry_after
+from .llm_scheduler import get_scheduler, estimate_tokens, BATCH
+from .skill_extractor import get_skill_extractor
+
+# Маркер конца SSE-потока ("data: [DONE]")
+STREAM_DONE = object()
 
 
 class GigaChatClient:
     def __init__(self):
         self.config = Config()
-        self.access_token = None
-        self.token_expires_at = None
-        self._get_access_token()
-
-    def _get_basic_auth(self):
-        """Создание Basic Auth заголовка"""
-        credentials = f"{self.config.GIGACHAT_CLIENT_ID}:{self.config.GIGACHAT_CLIENT_SECRET}"
-        return base64.b64encode(credentials.encode()).decode()
-
-    def _get_access_token(self):
-        """Получение access token с кэшированием"""
-        # Проверка кэша
-        if os.path.exists(self.config.TOKEN_CACHE_FILE):
-            try:
-                with open(self.config.TOKEN_CACHE_FILE, 'r') as f:
-                    token_data = json.load(f)
-                    expires_at = datetime.fromisoformat(token_data['expires_at'])
-                    if expires_at > datetime.now():
-                        self.access_token = token_data['access_token']
-                        return
-            except:
-                pass
-
-        # Запрос нового токена
-        self._request_new_token()
-
-    def _request_new_token(self):
-        """Запрос нового access token"""
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json',
-            'Authorization': f'Basic {self._get_basic_auth()}',
-            'RqUID': self.config.GIGACHAT_CLIENT_ID,
-        }
+        self.http_pool = get_http_pool()
+        # Токен общий для всех клиентов процесса и обновляется в фоне
+        self.token_manager = get_token_manager()
+        self.response_cache = get_response_cache() if self.config.LLM_CACHE_ENABLED else None
+        # Повторы, circuit breaker и hedged-запросы общие для всех клиентов
+        self.resilience = get_resilience()
+        # Очередь с приоритетами перед API: интерактивные вызовы идут первыми
+        self.scheduler = get_scheduler() if self.config.LLM_SCHEDULER_ENABLED else None
+        # Время до первого токена и полное время последнего вызова
+        self.last_call_stats = {"ttft": None, "total": None}
 
-        data = {'scope': self.config.GIGACHAT_SCOPE}
+    @property
+    def access_token(self):
+        """Действующий access token"""
+        return self.token_manager.get_token()
+
+    def get_chat_response(self, messages, temperature=0.7, max_tokens=1024, use_cache=None,
+                          priority=BATCH, session_id=None):
+        """Получение ответа от GigaChat.
+
+        use_cache=None - кэшировать, если temperature не выше LLM_CACHE_MAX_TEMPERATURE;
+        use_cache=False - всегда выполнять запрос.
+        priority/session_id - класс приоритета и сессия для планировщика (llm_scheduler).
+        """
+        started = time.perf_counter()
+        cache_key = self._cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                elapsed = time.perf_counter() - started
+                self.last_call_stats = {"ttft": elapsed, "total": elapsed}
+                return cached
 
+        payload = self._chat_payload(messages, temperature, max_tokens)
         try:
-            response = requests.post(
-                self.config.GIGACHAT_AUTH_URL,
-                headers=headers,
-                data=data,
-                verify=False,
-                timeout=30
+            content = self.resilience.execute(
+                lambda: self._request_completion(payload, priority, session_id), hedge=True
             )
+        except Exception as e:
+            print(f"Ошибка при запросе к GigaChat: {e}")
+            return None
 
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-                expires_in = token_data.get('expires_in', 1800)
+        elapsed = time.perf_counter() - started
+        self.last_call_stats = {"ttft": elapsed, "total": elapsed}
+        if cache_key:
+            self.response_cache.set(cache_key, content)
+        return content
 
-                # Сохранение в кэш
-                cache_data = {
-                    'access_token': self.access_token,
-                    'expires_at': (datetime.now() + timedelta(seconds=expires_in - 300)).isoformat()
-                }
+    def stream_chat_response(self, messages, temperature=0.7, max_tokens=1024, priority=BATCH, session_id=None):
+        """Потоковое получение ответа: генератор фрагментов текста по мере генерации"""
+        payload = self._chat_payload(messages, temperature, max_tokens)
+        payload['stream'] = True
 
-                with open(self.config.TOKEN_CACHE_FILE, 'w') as f:
-                    json.dump(cache_data, f)
+        started = time.perf_counter()
+        stats = {"ttft": None, "total": None}
+        self.last_call_stats = stats
+        try:
+            # Повторы возможны только до начала потока
+            response = self.resilience.execute(lambda: self._open_stream(payload, priority, session_id))
 
-            else:
-                print(f"Ошибка авторизации: {response.status_code}")
-                self.access_token = None
+            with response:
+                for line in response.iter_lines():
+                    delta = self._parse_stream_line(line)
+                    if delta is STREAM_DONE:
+                        break
+                    if delta:
+                        if stats["ttft"] is None:
+                            stats["ttft"] = time.perf_counter() - started
+                        yield delta
 
         except Exception as e:
-            print(f"Ошибка при получении токена: {e}")
-            self.access_token = None
+            print(f"Ошибка при потоковом запросе к GigaChat: {e}")
+        finally:
+            stats["total"] = time.perf_counter() - started
+
+    def _request_completion(self, payload, priority, session_id):
+        """Одна попытка запроса: текст ответа или GigaChatAPIError"""
+        reserved = self._wait_for_quota(payload, priority, session_id)
+        try:
+            response = self._post_chat(payload)
+            if response.status_code != 200:
+                raise GigaChatAPIError(
+                    response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+            data = response.json()
+        except BaseException:
+            self._refund_quota(reserved)
+            raise
+
+        if self.scheduler is not None:
+            self.scheduler.settle(reserved, data.get('usage', {}).get('total_tokens'))
+        return data['choices'][0]['message']['content']
+
+    def _open_stream(self, payload, priority, session_id):
+        """Открытие SSE-потока: ответ со статусом 200 или GigaChatAPIError"""
+        reserved = self._wait_for_quota(payload, priority, session_id)
+        try:
+            response = self._post_chat(payload, stream=True)
+        except BaseException:
+            self._refund_quota(reserved)
+            raise
+        if response.status_code != 200:
+            response.close()
+            self._refund_quota(reserved)
+            raise GigaChatAPIError(
+                response.status_code,
+                retry_after=parse_retry_after(response.headers.get('Retry-After'))
+            )
+        return response
+
+    def _wait_for_quota(self, payload, priority, session_id):
+        """Ожидание очереди планировщика. Возвращает число зарезервированных токенов"""
+        reserved = estimate_tokens(payload['messages'], payload['max_tokens'])
+        if self.scheduler is not None:
+            self.scheduler.acquire(priority, session_id, reserved, timeout=self.config.LLM_QUEUE_TIMEOUT)
+        return reserved
+
+    def _refund_quota(self, reserved):
+        """Возврат зарезервированных токенов, если запрос не дал ответа"""
+        if self.scheduler is not None:
+            self.scheduler.settle(reserved, 0)
+
+    def _post_chat(self, payload, stream=False):
+        """Запрос к chat/completions с повторной авторизацией при 401"""
+        token = self.access_token
+        if not token:
+            raise GigaChatAPIError(401, "Не удалось получить access token")
+
+        for attempt in range(2):
+            headers = self._chat_headers(token)
+            if stream:
+                headers['Accept'] = 'text/event-stream'
+
+            response = self.http_pool.post(
+                f"{self.config.GIGACHAT_API_URL}/chat/completions",
+                headers=headers,
+                json=payload,
+                verify=False,
+                timeout=self.config.GIGACHAT_REQUEST_TIMEOUT,
+                stream=stream
+            )
+            if response.status_code != 401 or attempt:
+                return response
 
-    def get_chat_response(self, messages, temperature=0.7, max_tokens=1024):
-        """Получение ответа от GigaChat"""
-        if not self.access_token:
-            print("Не удалось получить access token")
+            # Токен отозван или истек раньше срока - обновляем и повторяем запрос
+            response.close()
+            token = self.token_manager.refresh(stale_token=token)
+            if not token:
+                return response
+
+    @staticmethod
+    def _parse_stream_line(line):
+        """Разбор строки SSE: фрагмент текста, STREAM_DONE или None"""
+        if isinstance(line, bytes):
+            # Явно UTF-8: для text/event-stream requests по умолчанию берет latin-1
+            line = line.decode('utf-8', errors='replace')
+        if not line.startswith('data:'):
             return None
 
-        headers = {
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return STREAM_DONE
+
+        try:
+            choices = json.loads(data).get('choices') or [{}]
+            return choices[0].get('delta', {}).get('content')
+        except ValueError:
+            return None
+
+    def _cache_key(self, messages, temperature, max_tokens, use_cache):
+        """Ключ кэша ответа или None, если вызов не кэшируется"""
+        if self.response_cache is None or use_cache is False:
+            return None
+        if use_cache is None and temperature > self.config.LLM_CACHE_MAX_TEMPERATURE:
+            return None
+        return self.response_cache.make_key(self.config.GIGACHAT_MODEL, messages, temperature, max_tokens)
+
+    def _chat_headers(self, token):
+        """Заголовки запроса к chat/completions"""
+        return {
             'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.access_token}',
+            'Authorization': f'Bearer {token}',
             'Accept': 'application/json'
         }
 
-        payload = {
-            'model': 'GigaChat',
+    def _chat_payload(self, messages, temperature, max_tokens):
+        """Тело запроса к chat/completions"""
+        return {
+            'model': self.config.GIGACHAT_MODEL,
             'messages': messages,
             'temperature': temperature,
             'max_tokens': max_tokens
         }
 
-        try:
-            response = requests.post(
-                f"{self.config.GIGACHAT_API_URL}/chat/completions",
-                headers=headers,
-                json=payload,
-                verify=False,
-                timeout=60
-            )
+    def extract_skills_from_text(self, text, use_cache=None):
+        """Извлечение навыков из текста: сначала по таксономии, GigaChat - только если найдено мало"""
+        return self.extract_skills(text, use_cache=use_cache)[0]
 
-            if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content']
-            else:
-                print(f"Ошибка API: {response.status_code}")
-                return None
+    def extract_skills(self, text, use_cache=None):
+        """Как extract_skills_from_text, но возвращает (навыки, fallback).
+        fallback=True - GigaChat не дал ответа и навыки найдены резервным методом"""
+        local_skills = self._local_skills(text)
+        if len(local_skills) >= Config.SKILL_EXTRACTOR_MIN_SKILLS:
+            return local_skills, False
 
-        except Exception as e:
-            print(f"Ошибка при запросе к GigaChat: {e}")
-            return None
+        response = self.get_chat_response(self._skills_messages(text), temperature=0.3, use_cache=use_cache)
+        return self._skills_from_response(local_skills, response, text)
 
-    def extract_skills_from_text(self, text):
-        """Извлечение навыков из текста"""
+    def _local_skills(self, text):
+        """Навыки из таксономии (пустой список, если локальное извлечение выключено)"""
+        if not Config.SKILL_EXTRACTOR_ENABLED:
+            return []
+        return get_skill_extractor().extract(text)
+
+    @staticmethod
+    def _merge_skills(local_skills, llm_skills):
+        """Объединение без повторов: сначала найденные локально, затем добавленные моделью.
+        Синонимы из ответа модели приводятся к названиям таксономии"""
+        extractor = get_skill_extractor()
+        merged = []
+        seen = set()
+        for skill in list(local_skills) + [extractor.canonical(skill) for skill in llm_skills]:
+            key = str(skill).strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(skill)
+        return merged
+
+    def _skills_messages(self, text):
+        """Промпт для извлечения навыков"""
         prompt = f"""
         Извлеки технические навыки из текста. Верни ТОЛЬКО JSON: {{"skills": ["skill1", "skill2"]}}
 
         Текст: {text[:2000]}
         """
 
-        messages = [
+        return [
             {"role": "system", "content": "Ты эксперт по анализу резюме. Отвечай только JSON."},
             {"role": "user", "content": prompt}
         ]
 
-        response = self.get_chat_response(messages, temperature=0.3)
+    def _skills_from_response(self, local_skills, response, text):
+        """(навыки, fallback): локальные навыки вместе с навыками из ответа модели или резервного метода"""
+        llm_skills = self._parse_skills_response(response)
+        if llm_skills is None:
+            return self._merge_skills(local_skills, self._fallback_skill_extraction(text)), True
+        return self._merge_skills(local_skills, llm_skills), False
 
+    def _parse_skills_response(self, response):
+        """Разбор ответа модели со списком навыков; None - ответа нет или он не разобран"""
         if response:
             try:
                 # Очистка ответа
@@ -141,17 +277,10 @@ class GigaChatClient:
                 data = json.loads(json_str)
                 return data.get('skills', [])
             except:
-                return self._fallback_skill_extraction(text)
+                return None
 
-        return self._fallback_skill_extraction(text)
+        return None
 
     def _fallback_skill_extraction(self, text):
-        """Резервный метод извлечения навыков"""
-        common_skills = ["Python", "Java", "SQL", "JavaScript", "Linux", "Docker",
-                         "Kubernetes", "AWS", "Git", "React", "PostgreSQL", "MongoDB"]
-
-        found_skills = []
-        for skill in common_skills:
-            if skill.lower() in text.lower():
-                found_skills.append(skill)
-        return found_skills
\ No newline at end of file
+        """Резервный метод извлечения навыков - поиск по таксономии"""
+        return get_skill_extractor().extract(text)
\ No newline at end of file
@@ -0,0 +1,135 @@
+# services/http_pool.py
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import Config
+
+
+class _PoolStats:
+    """Счетчики попаданий в пул соединений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, reused):
+        with self._lock:
+            if reused:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+def _counting_pool(base_class, stats):
+    """Пул urllib3, который считает переиспользованные и новые соединения"""
+
+    class CountingPool(base_class):
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout=timeout)
+            # У живого keep-alive соединения уже есть открытый сокет
+            stats.record(getattr(conn, 'sock', None) is not None)
+            return conn
+
+    return CountingPool
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter с подсчетом попаданий в пул"""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self._stats),
+            'https': _counting_pool(HTTPSConnectionPool, self._stats),
+        }
+
+
+class HTTPConnectionPoolManager:
+    """Общий потокобезопасный пул keep-alive соединений.
+
+    Один HTTPAdapter (и его PoolManager) разделяется всеми потоками,
+    а requests.Session создается отдельно для каждого потока, так как
+    сама сессия не является потокобезопасной.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, pool_block=None):
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.pool_block = Config.HTTP_POOL_BLOCK if pool_block is None else pool_block
+
+        self._stats = _PoolStats()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = []
+        self._adapter = _PooledAdapter(
+            self._stats,
+            pool_connections=self.pool_connections,  # число хостов в пуле
+            pool_maxsize=self.pool_maxsize,  # лимит соединений на один хост
+            pool_block=self.pool_block,
+            max_retries=0
+        )
+
+    def get_session(self):
+        """Сессия текущего потока, работающая через общий пул"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            session.headers['Connection'] = 'keep-alive'
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def post(self, url, **kwargs):
+        """POST-запрос через пул соединений"""
+        return self.get_session().post(url, **kwargs)
+
+    def get_stats(self):
+        """Метрики пула: попадания, промахи и доля переиспользования"""
+        hits, misses = self._stats.hits, self._stats.misses
+        total = hits + misses
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
+
+    def close(self):
+        """Закрытие всех соединений пула"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+        self._local = threading.local()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_http_pool():
+    """Общий для процесса пул соединений"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = HTTPConnectionPoolManager()
+    return _shared_pool
\ No newline at end of file
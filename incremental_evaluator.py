@@ -0,0 +1,266 @@
+# services/incremental_evaluator.py
+"""
+Оценка ответов кандидата во время собеседования.
+
+Каждый ответ оценивается в фоне коротким запросом к GigaChat (приоритет
+BATCH): оценка 0-100, статусы навыков из требований вакансии, которые
+упоминались в вопросе или ответе, сильные и слабые стороны. Итоги
+накапливаются по мере готовности оценок.
+
+Когда собеседование заканчивается, отчет в формате
+InterviewAnalyzer.analyze_interview собирается из готовых оценок локально:
+ждать приходится только оценку последнего ответа, а не анализ всего диалога.
+Если оценить удалось меньше INCREMENTAL_EVALUATION_MIN_COVERAGE ответов,
+report() возвращает None и нужен полный анализ.
+"""
+import json
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import Config
+from .llm_scheduler import BATCH
+from .skill_extractor import get_skill_extractor
+from .skill_normalizer import ASSESSMENT_RANK, get_skill_normalizer, skill_id
+
+# Вклад статуса навыка в долю подтвержденных требований
+SKILL_POINTS = {"confirmed": 1.0, "partial": 0.5, "missing": 0.0}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_evaluation_pool():
+    """Общий пул потоков для фоновой оценки ответов"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=Config.INCREMENTAL_EVALUATION_WORKERS,
+                                           thread_name_prefix="answer-evaluation")
+    return _pool
+
+
+class IncrementalEvaluator:
+    """Оценки ответов одного собеседования и их накопленные итоги"""
+
+    def __init__(self, vacancy_name, required_skills, giga_client, session_id=None, normalizer=None):
+        self.vacancy_name = vacancy_name
+        self.giga_client = giga_client
+        self.session_id = session_id
+        self.normalizer = normalizer or get_skill_normalizer()
+        # Требуемые навыки: идентификатор -> название
+        self.required = dict(self.normalizer.resolve_many(list(required_skills)))
+        # Оценка каждого ответа по порядку; None - еще оценивается или не удалась
+        self.evaluations = []
+        self.failed = 0
+        self._futures = []
+        self._lock = threading.Lock()
+        self._reset_totals()
+
+    def _reset_totals(self):
+        self.score_total = 0
+        self.evaluated = 0
+        # Лучший статус навыка: идентификатор -> [название, статус]
+        self.skills = {}
+        self.strengths = Counter()
+        self.weaknesses = Counter()
+
+    def submit(self, question, answer):
+        """Фоновая оценка ответа на вопрос"""
+        with self._lock:
+            index = len(self.evaluations)
+            self.evaluations.append(None)
+        self._submit(index, question, answer)
+
+    def _submit(self, index, question, answer):
+        messages = self._build_prompt(question, answer, self._relevant_skills(question, answer))
+        self._futures.append(_get_evaluation_pool().submit(self._evaluate, index, messages))
+
+    def _relevant_skills(self, question, answer):
+        """Требуемые навыки, о которых шла речь; если ни одного - все требования"""
+        mentioned = {skill_id(skill) for skill in get_skill_extractor().extract(f"{question}\n{answer}")}
+        relevant = [name for key, name in self.required.items() if key in mentioned]
+        return relevant or list(self.required.values())
+
+    def _build_prompt(self, question, answer, skills):
+        prompt = f"""
+        Оцени ответ кандидата на собеседовании на позицию {self.vacancy_name}.
+
+        ВОПРОС: {question}
+        ОТВЕТ: {answer[:Config.INCREMENTAL_EVALUATION_ANSWER_CHARS]}
+
+        НАВЫКИ ДЛЯ ПРОВЕРКИ: {', '.join(skills)}
+
+        Верни ТОЛЬКО JSON:
+        {{
+            "overall_score": 70,  # Оценка ответа 0-100
+            "skill_assessment": {{"навык": "confirmed"}},  # confirmed/partial/missing
+            "strengths": ["сильная сторона"],
+            "weaknesses": ["недостаток"],
+            "feedback": "Одно предложение об ответе"
+        }}
+        """
+
+        return [
+            {"role": "system", "content": "Ты Senior HR-аналитик и технический рекрутер. Оцениваешь ответы кандидатов."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _evaluate(self, index, messages):
+        """Запрос оценки (в пуле потоков) и учет результата в итогах"""
+        try:
+            # Кандидат оценки не ждет: запросы собеседований идут первыми
+            response = self.giga_client.get_chat_response(
+                messages, temperature=0.3, priority=BATCH, session_id=self.session_id
+            )
+            evaluation = self._parse_evaluation(response)
+        except Exception as e:
+            print(f"Ошибка оценки ответа: {e}")
+            evaluation = None
+
+        with self._lock:
+            if evaluation is None:
+                self.failed += 1
+                return
+            self.evaluations[index] = evaluation
+            self._add_to_totals(evaluation)
+
+    def _parse_evaluation(self, response):
+        """Оценка из ответа модели: словарь с проверенными полями или None"""
+        if not response:
+            return None
+        try:
+            json_match = re.search(r'\{[\s\S]*\}', response)
+            data = json.loads(json_match.group()) if json_match else None
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        try:
+            score = min(max(int(float(data.get("overall_score"))), 0), 100)
+        except (TypeError, ValueError):
+            return None
+
+        assessment = data.get("skill_assessment")
+        if not isinstance(assessment, dict):
+            assessment = {}
+        assessment = {str(skill): status for skill, status in assessment.items() if status in ASSESSMENT_RANK}
+
+        return {
+            "score": score,
+            "skills": [[key, name, assessment[skill]]
+                       for skill, (key, name) in zip(assessment, self.normalizer.resolve_many(list(assessment)))
+                       if key],
+            "strengths": self._texts(data.get("strengths")),
+            "weaknesses": self._texts(data.get("weaknesses")),
+            "feedback": str(data.get("feedback") or "").strip()
+        }
+
+    @staticmethod
+    def _texts(value):
+        if not isinstance(value, list):
+            return []
+        return [str(item).strip() for item in value if str(item).strip()][:3]
+
+    def _add_to_totals(self, evaluation):
+        self.score_total += evaluation["score"]
+        self.evaluated += 1
+        for key, name, status in evaluation["skills"]:
+            current = self.skills.get(key)
+            if current is None or ASSESSMENT_RANK[status] > ASSESSMENT_RANK[current[1]]:
+                self.skills[key] = [name, status]
+        self.strengths.update(evaluation["strengths"])
+        self.weaknesses.update(evaluation["weaknesses"])
+
+    def wait(self, timeout=None):
+        """Ожидание незавершенных оценок. Возвращает число так и не завершившихся"""
+        timeout = Config.INCREMENTAL_EVALUATION_MAX_WAIT if timeout is None else timeout
+        _, not_done = wait(list(self._futures), timeout=timeout)
+        return len(not_done)
+
+    def cancel(self):
+        for future in self._futures:
+            future.cancel()
+
+    def report(self, timeout=None):
+        """Отчет в формате InterviewAnalyzer.analyze_interview или None, если оценок мало"""
+        self.wait(timeout)
+        with self._lock:
+            answers = len(self.evaluations)
+            if not self.evaluated or self.evaluated < answers * Config.INCREMENTAL_EVALUATION_MIN_COVERAGE:
+                return None
+
+            score = round(self.score_total / self.evaluated)
+            # Все требования вакансии, затем прочие навыки, проявившиеся в ответах
+            assessment = {name: self.skills[key][1] if key in self.skills else "missing"
+                          for key, name in self.required.items()}
+            for key, (name, status) in self.skills.items():
+                if key not in self.required:
+                    assessment.setdefault(name, status)
+
+            missing = [name for key, name in self.required.items() if assessment[name] == "missing"]
+            strengths = [text for text, _ in self.strengths.most_common(5)]
+            weaknesses = [text for text, _ in self.weaknesses.most_common(5)]
+            weaknesses += [f"Не подтвержден навык {name}" for name in missing][:max(5 - len(weaknesses), 0)]
+            feedbacks = [e["feedback"] for e in self.evaluations if e is not None and e["feedback"]]
+
+        coverage = sum(SKILL_POINTS[assessment[name]] for name in self.required.values()) / max(len(self.required), 1)
+        if score >= Config.INCREMENTAL_EVALUATION_HIRE_SCORE and coverage >= Config.INCREMENTAL_EVALUATION_HIRE_COVERAGE:
+            recommendation = "hire"
+        elif score < Config.INCREMENTAL_EVALUATION_REJECT_SCORE:
+            recommendation = "reject"
+        else:
+            recommendation = "additional_interview"
+
+        return {
+            "overall_score": score,
+            "strengths": strengths,
+            "weaknesses": weaknesses,
+            "skill_assessment": assessment,
+            "recommendation": recommendation,
+            "feedback": self._feedback(score, answers, assessment, missing, feedbacks)
+        }
+
+    @staticmethod
+    def _feedback(score, answers, assessment, missing, feedbacks):
+        confirmed = [name for name, status in assessment.items() if status == "confirmed"]
+        parts = [f"Средняя оценка ответов: {score}/100 (ответов: {answers})."]
+        if confirmed:
+            parts.append(f"Подтверждены навыки: {', '.join(confirmed)}.")
+        if missing:
+            parts.append(f"Не удалось подтвердить: {', '.join(missing)}.")
+        # Замечания по первому и последнему ответам
+        for text in dict.fromkeys(feedbacks[:1] + feedbacks[-1:]):
+            parts.append(text if text.endswith((".", "!", "?")) else text + ".")
+        return " ".join(parts)
+
+    def get_state(self):
+        """Готовые оценки для хранилища сессий (None - оценка не получена)"""
+        with self._lock:
+            return list(self.evaluations)
+
+    def load_state(self, evaluations, exchanges):
+        """Оценки из хранилища; неоцененные ответы (пары вопрос-ответ из exchanges) оцениваются заново"""
+        with self._lock:
+            self.evaluations = list(evaluations or [])
+            self._reset_totals()
+            for evaluation in self.evaluations:
+                if evaluation is not None:
+                    self._add_to_totals(evaluation)
+            # Ответы, данные до включения оценки, тоже учитываются
+            self.evaluations += [None] * (len(exchanges) - len(self.evaluations))
+            pending = [i for i, evaluation in enumerate(self.evaluations) if evaluation is None]
+        for index in pending:
+            self._submit(index, *exchanges[index])
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "answers": len(self.evaluations),
+                "evaluated": self.evaluated,
+                "failed": self.failed,
+                "pending": sum(1 for future in self._futures if not future.done())
+            }
\ No newline at end of file
@@ -0,0 +1,70 @@
+# ingest.py
+"""
+Пакетная обработка каталога резюме (PDF/DOCX/TXT).
+
+    python ingest.py resumes/ --output data/ingest.jsonl
+    python ingest.py resumes/ --output data/ingest.jsonl --vacancies data/vacancies --index
+
+Прерванный запуск продолжается с места остановки по контрольной точке
+(<output>.checkpoint.json). Без контрольной точки выходной файл перезаписывается.
+"""
+import argparse
+import sys
+
+from config import Config
+from services.bulk_ingest import BulkIngestor, load_vacancies
+
+
+def print_progress(done, total, stats):
+    remaining = total - done
+    rate = stats["files_per_second"]
+    eta = remaining / rate if rate else 0
+    stages = ", ".join(f"{name} {seconds:.1f} с" for name, seconds in stats["stage_seconds"].items())
+    sys.stdout.write(
+        f"\r📄 {done}/{total}  {rate:.2f} файл/с  осталось ~{eta:.0f} с  [{stages}]"
+    )
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная обработка резюме")
+    parser.add_argument("input_dir", help="каталог с резюме")
+    parser.add_argument("--output", default="data/ingest.jsonl", help="JSONL с результатами")
+    parser.add_argument("--checkpoint", help="файл контрольной точки (по умолчанию <output>.checkpoint.json)")
+    parser.add_argument("--vacancies", help="JSON {вакансия: [навыки]} или каталог с JSON вакансий")
+    parser.add_argument("--workers", type=int, default=Config.INGEST_WORKERS, help="процессов извлечения текста")
+    parser.add_argument("--llm-concurrency", type=int, default=Config.INGEST_LLM_CONCURRENCY,
+                        help="одновременных запросов к GigaChat")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE)
+    parser.add_argument("--index", action="store_true", help="добавлять кандидатов в индекс для поиска top-k")
+    args = parser.parse_args()
+
+    vacancies = load_vacancies(args.vacancies)
+    index = None
+    if args.index:
+        from services.candidate_index import CandidateIndex
+        index = CandidateIndex()
+
+    ingestor = BulkIngestor(
+        vacancies,
+        args.output,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        batch_size=args.batch_size,
+        index=index
+    )
+
+    already = len(ingestor.checkpoint.done)
+    print(f"🚀 Вакансий: {len(vacancies)}, уже обработано по контрольной точке: {already}")
+    stats = ingestor.run(args.input_dir, progress=print_progress)
+
+    print(f"\n✅ Обработано {stats['processed']} файлов за {stats['elapsed']} с "
+          f"({stats['files_per_second']} файл/с)")
+    for name, seconds in stats["stage_seconds"].items():
+        print(f"   {name:<8} {seconds:>8.2f} с")
+    print(f"💾 Результаты: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
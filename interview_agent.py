@@ -1,16 +1,84 @@
 # services/interview_agent.py
 from .gigachat_client import GigaChatClient
-import random
+from .async_gigachat_client import AsyncGigaChatClient
+from .llm_scheduler import INTERACTIVE, estimate_tokens
+from .conversation_memory import ConversationMemory
+from .incremental_evaluator import IncrementalEvaluator
+from .question_prefetch import QuestionPrefetcher
+from .question_bank import get_question_bank
+from .session_store import InterviewState
+from config import Config
+import asyncio
+import uuid
 
 
 class InterviewAgent:
-    def __init__(self, vacancy_name, required_skills):
+    FALLBACK_QUESTION = "Расскажите подробнее о вашем опыте работы."
+
+    def __init__(self, vacancy_name, required_skills, prefetch=None, evaluate=None):
         self.giga_client = GigaChatClient()
+        self.async_client = None
+        self.session_id = uuid.uuid4().hex
         self.vacancy_name = vacancy_name
         self.required_skills = required_skills
         self.conversation_history = []
         self.question_count = 0
         self.max_questions = 15
+        self.last_call_stats = {"ttft": None, "total": None}
+        self.last_prompt_tokens = None
+        # История для промпта: сводка ответов и подтверждения навыков
+        self.memory = ConversationMemory(required_skills)
+        # Вопросы берутся из банка без повторов; навыки, о которых уже спрашивали
+        self.question_bank = get_question_bank()
+        self.asked_questions = set()
+        self.covered_skills = set()
+        # Варианты следующего вопроса готовятся в фоне, пока кандидат отвечает
+        if prefetch is None:
+            prefetch = Config.QUESTION_PREFETCH_ENABLED
+        self.prefetcher = QuestionPrefetcher(self) if prefetch else None
+        # Ответы оцениваются в фоне, итоговый отчет готов сразу после собеседования
+        if evaluate is None:
+            evaluate = Config.INCREMENTAL_EVALUATION_ENABLED
+        self.evaluator = IncrementalEvaluator(
+            vacancy_name, required_skills, self.giga_client, self.session_id
+        ) if evaluate else None
+
+    def to_state(self, extra=None):
+        """Состояние собеседования для хранилища сессий (без клиентов и моделей)"""
+        if self.evaluator is not None:
+            extra = dict(extra or {}, evaluation=self.evaluator.get_state())
+        return InterviewState(
+            self.session_id,
+            self.vacancy_name,
+            self.required_skills,
+            conversation_history=self.conversation_history,
+            question_count=self.question_count,
+            max_questions=self.max_questions,
+            asked_questions=self.asked_questions,
+            covered_skills=self.covered_skills,
+            memory=self.memory.get_state(),
+            extra=extra
+        )
+
+    @classmethod
+    def from_state(cls, state, prefetch=None, evaluate=None):
+        """Агент, продолжающий сохраненное собеседование (в любом процессе или на любом узле)"""
+        agent = cls(state.vacancy_name, state.required_skills, prefetch=prefetch, evaluate=evaluate)
+        agent.session_id = state.session_id
+        agent.conversation_history = [dict(msg) for msg in state.conversation_history]
+        agent.question_count = state.question_count
+        agent.max_questions = state.max_questions
+        agent.asked_questions = set(state.asked_questions)
+        agent.covered_skills = set(state.covered_skills)
+        if state.memory is not None:
+            agent.memory.load_state(state.memory)
+        if agent.evaluator is not None:
+            agent.evaluator.session_id = agent.session_id
+            agent.evaluator.load_state(state.extra.get("evaluation"), agent._exchanges())
+        # Предвыборка прежнего процесса потеряна: если кандидат еще отвечает, запускаем заново
+        if agent.conversation_history and agent.conversation_history[-1]["role"] == "assistant":
+            agent._start_prefetch()
+        return agent
 
     def start_interview(self):
         """Начало собеседования"""
@@ -36,9 +104,92 @@ class InterviewAgent:
             "role": "assistant",
             "content": first_question
         })
+        self.memory.add_question(first_question)
+        self.covered_skills.update(self.question_bank.skills_of(first_question))
 
     def process_answer(self, answer):
         """Обработка ответа кандидата"""
+        status = self._record_answer(answer)
+        if status is not None:
+            return status
+
+        # Генерируем следующий вопрос
+        next_question = self._generate_next_question()
+        return self._ask_question(next_question)
+
+    def process_answer_stream(self, answer):
+        """Обработка ответа с потоковой генерацией следующего вопроса.
+
+        Генератор отдает фрагменты вопроса по мере генерации, а по завершении
+        возвращает (через StopIteration.value) тот же результат, что process_answer.
+        """
+        status = self._record_answer(answer)
+        if status is not None:
+            return status
+
+        prepared = self._retrieve_question() if self.question_count >= 3 else None
+        prepared = prepared or self._take_prefetched()
+        if prepared:
+            yield prepared
+            return self._ask_question(prepared)
+
+        parts = []
+        for delta in self._stream_next_question():
+            parts.append(delta)
+            yield delta
+
+        next_question = self._clean_response("".join(parts)) if parts else self.FALLBACK_QUESTION
+        if not parts:
+            yield next_question
+        return self._ask_question(next_question)
+
+    async def process_answer_async(self, answer):
+        """Асинхронная обработка ответа кандидата"""
+        status = self._record_answer(answer)
+        if status is not None:
+            return status
+
+        next_question = await self._generate_next_question_async()
+        return self._ask_question(next_question)
+
+    async def process_answer_stream_async(self, answer, on_delta):
+        """Асинхронная обработка ответа с потоковой генерацией следующего вопроса.
+
+        Фрагменты вопроса передаются корутине on_delta по мере генерации
+        (ее ожидание - естественное ограничение скорости для медленного клиента).
+        Возвращает тот же результат, что process_answer_async.
+        """
+        status = self._record_answer(answer)
+        if status is not None:
+            return status
+
+        if self.question_count < 3:
+            prepared = self._get_base_question()
+        else:
+            prepared = await asyncio.to_thread(lambda: self._retrieve_question() or self._take_prefetched())
+        if prepared:
+            await on_delta(prepared)
+            return self._ask_question(prepared)
+
+        if self.async_client is None:
+            self.async_client = AsyncGigaChatClient(self.giga_client)
+
+        parts = []
+        async for delta in self.async_client.stream_chat_response(
+                self._build_adaptive_prompt(), temperature=0.7, priority=INTERACTIVE, session_id=self.session_id):
+            delta = delta.replace("*", "")
+            if delta:
+                parts.append(delta)
+                await on_delta(delta)
+        self.last_call_stats = self.async_client.last_call_stats
+
+        next_question = self._clean_response("".join(parts)) if parts else self.FALLBACK_QUESTION
+        if not parts:
+            await on_delta(next_question)
+        return self._ask_question(next_question)
+
+    def _record_answer(self, answer):
+        """Сохранение ответа. Возвращает итог обработки или None, если нужен следующий вопрос"""
         if not answer or len(answer.strip()) < 3:
             print("HR-аватар: Пожалуйста, ответьте более развернуто.")
             return True
@@ -48,6 +199,9 @@ class InterviewAgent:
             "role": "user",
             "content": answer.strip()
         })
+        self.memory.add_answer(answer.strip())
+        if self.evaluator is not None:
+            self.evaluator.submit(self.memory.last_exchange[0], answer.strip())
 
         self.question_count += 1
 
@@ -55,54 +209,80 @@ class InterviewAgent:
         if self.question_count >= self.max_questions:
             return False
 
-        # Генерируем следующий вопрос
-        next_question = self._generate_next_question()
+        return None
+
+    def _ask_question(self, next_question):
+        """Добавление вопроса в диалог"""
         if next_question:
             print(f"HR-аватар: {next_question}")
             self.conversation_history.append({
                 "role": "assistant",
                 "content": next_question
             })
+            self.memory.add_question(next_question)
+            self.covered_skills.update(self.question_bank.skills_of(next_question))
+            self._start_prefetch()
             return True
 
         return False
 
+    def _exchanges(self):
+        """Пары (вопрос, ответ) в порядке ответов кандидата"""
+        exchanges = []
+        question = ""
+        for msg in self.conversation_history:
+            if msg["role"] == "assistant":
+                question = msg["content"]
+            else:
+                exchanges.append((question, msg["content"]))
+        return exchanges
+
+    def _start_prefetch(self):
+        """Запуск предвыборки, если следующий вопрос будет адаптивным"""
+        if self.prefetcher is not None and 3 <= self.question_count + 1 < self.max_questions:
+            self.prefetcher.start()
+
+    def _take_prefetched(self):
+        """Подготовленный вопрос для последнего ответа или None"""
+        if self.prefetcher is None or self.question_count < 3:
+            return None
+        question = self.prefetcher.take(self.conversation_history[-1]["content"])
+        if question:
+            self.last_call_stats = {"ttft": self.prefetcher.last_wait, "total": self.prefetcher.last_wait}
+        return question
+
     def _get_base_questions(self):
-        """Базовые вопросы для разных позиций"""
-        base_questions = {
-            "Python Разработчик": [
-                "Расскажите о вашем опыте работы с Python.",
-                "Какие фреймворки Django/Flask/FastAPI вы использовали?",
-                "Какой у вас опыт работы с базами данных?",
-                "Опишите самый сложный технический проект.",
-                "Как вы тестируете свой код?",
-                "Какой опыт работы с Docker и Kubernetes?",
-                "Расскажите о вашем опыте работы в команде.",
-                "Как вы решаете сложные технические проблемы?",
-                "Почему вы хотите работать именно в нашей компании?",
-                "Какие ваши карьерные цели на ближайшие 2-3 года?"
-            ],
-            "Data Scientist": [
-                "Расскажите о вашем опыте в машинном обучении.",
-                "Какие библиотеки для анализа данных вы используете?",
-                "Опишите процесс работы над ML проектом.",
-                "Как вы оцениваете качество моделей?",
-                "Какой опыт работы с большими данными?"
-            ]
-        }
-
-        return base_questions.get(self.vacancy_name, [
-            "Расскажите о вашем профессиональном опыте.",
-            "Какие технологии и инструменты вы используете?",
-            "Опишите ваш последний проект.",
-            "Как вы решаете сложные задачи?",
-            "Почему вы interested в этой позиции?"
-        ])
+        """Базовые вопросы для разных позиций (из банка вопросов)"""
+        return self.question_bank.base_questions(self.vacancy_name)
 
     def _get_base_question(self):
-        """Получение базового вопроса"""
-        questions = self._get_base_questions()
-        return random.choice(questions)
+        """Получение базового вопроса, который еще не задавался"""
+        question = self.question_bank.base_question(self.vacancy_name, self.asked_questions)
+        if question is None:
+            return self.FALLBACK_QUESTION
+        self.asked_questions.add(question["index"])
+        return question["text"]
+
+    def _retrieve_question(self):
+        """Вопрос из банка для последнего ответа или None, если уверенность поиска низкая"""
+        if not Config.QUESTION_BANK_RETRIEVAL:
+            return None
+        question, confidence = self.question_bank.find(
+            self.conversation_history[-1]["content"],
+            self.required_skills,
+            asked=self.asked_questions,
+            covered_skills=self.covered_skills
+        )
+        if question is None or confidence < Config.QUESTION_BANK_MIN_CONFIDENCE:
+            return None
+
+        self.asked_questions.add(question["index"])
+        self.covered_skills.update(self.question_bank.question_skills[question["index"]])
+        # Подготовленные варианты больше не нужны
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+        self.last_call_stats = {"ttft": None, "total": None}
+        return question["text"]
 
     def _generate_next_question(self):
         """Генерация адаптивного вопроса"""
@@ -110,22 +290,71 @@ class InterviewAgent:
         if self.question_count < 3:
             return self._get_base_question()
 
+        # Сначала банк вопросов (локально, миллисекунды), затем подготовленные варианты
+        prepared = self._retrieve_question() or self._take_prefetched()
+        if prepared:
+            return prepared
+
         # Адаптивные вопросы через GigaChat
         prompt = self._build_adaptive_prompt()
-        response = self.giga_client.get_chat_response(prompt, temperature=0.7)
+        response = self.giga_client.get_chat_response(
+            prompt, temperature=0.7, priority=INTERACTIVE, session_id=self.session_id
+        )
+        self.last_call_stats = self.giga_client.last_call_stats
 
         if response:
             return self._clean_response(response)
 
         # Fallback вопрос
-        return "Расскажите подробнее о вашем опыте работы."
+        return self.FALLBACK_QUESTION
+
+    def _stream_next_question(self):
+        """Потоковая генерация адаптивного вопроса"""
+        if self.question_count < 3:
+            yield self._get_base_question()
+            return
+
+        prompt = self._build_adaptive_prompt()
+        for delta in self.giga_client.stream_chat_response(
+                prompt, temperature=0.7, priority=INTERACTIVE, session_id=self.session_id):
+            # Маркеры формата убираем сразу, чтобы не показывать их на экране
+            delta = delta.replace("*", "")
+            if delta:
+                yield delta
+
+        self.last_call_stats = self.giga_client.last_call_stats
+
+    async def _generate_next_question_async(self):
+        """Асинхронная генерация адаптивного вопроса"""
+        if self.question_count < 3:
+            return self._get_base_question()
+
+        # Поиск в банке и ожидание предвыборки не блокируют event loop
+        prepared = await asyncio.to_thread(lambda: self._retrieve_question() or self._take_prefetched())
+        if prepared:
+            return prepared
+
+        if self.async_client is None:
+            self.async_client = AsyncGigaChatClient(self.giga_client)
+
+        prompt = self._build_adaptive_prompt()
+        response = await self.async_client.get_chat_response(
+            prompt, temperature=0.7, priority=INTERACTIVE, session_id=self.session_id
+        )
+        self.last_call_stats = self.async_client.last_call_stats
+
+        if response:
+            return self._clean_response(response)
+
+        return self.FALLBACK_QUESTION
+
+    def _history_text(self):
+        """История диалога для промпта в пределах CONVERSATION_MEMORY_TOKEN_BUDGET"""
+        return self.memory.render()
 
     def _build_adaptive_prompt(self):
         """Построение промпта для адаптивного вопроса"""
-        history_text = "\n".join([
-            f"{'Интервьюер' if msg['role'] == 'assistant' else 'Кандидат'}: {msg['content']}"
-            for msg in self.conversation_history[-6:]
-        ])
+        history_text = self._history_text()
 
         prompt = f"""
         Ты - опытный технический рекрутер. Проводишь собеседование на {self.vacancy_name}.
@@ -144,7 +373,7 @@ class InterviewAgent:
         Верни ТОЛЬКО текст вопроса без дополнительных объяснений.
         """
 
-        return [
+        messages = [
             {
                 "role": "system",
                 "content": "Ты экспертный IT-рекрутер с глубоким пониманием технических навыков."
@@ -154,6 +383,8 @@ class InterviewAgent:
                 "content": prompt
             }
         ]
+        self.last_prompt_tokens = estimate_tokens(messages)
+        return messages
 
     def _clean_response(self, response):
         """Очистка ответа от лишнего текста"""
@@ -176,6 +407,9 @@ class InterviewAgent:
         Хорошего дня!
         """
 
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+
         print(f"HR-аватар: {thank_you_message.strip()}")
         self.conversation_history.append({
             "role": "assistant",
@@ -184,6 +418,12 @@ class InterviewAgent:
 
         return self.conversation_history
 
+    def get_results(self, timeout=None):
+        """Отчет по готовым оценкам ответов или None, если нужен полный анализ диалога"""
+        if self.evaluator is None:
+            return None
+        return self.evaluator.report(timeout)
+
     def get_progress(self):
         """Получение прогресса собеседования"""
         return self.question_count
@@ -0,0 +1,397 @@
+# interview_server.py
+"""
+Асинхронный сервер собеседований: много сессий InterviewAgent в одном процессе.
+
+HTTP API (JSON):
+    POST /api/interviews                     {"vacancy": "...", "skills": [...]} -> session_id и первый вопрос
+    GET  /api/interviews/{session_id}        состояние собеседования
+    POST /api/interviews/{session_id}/answer {"answer": "..."} -> следующий вопрос
+    POST /api/interviews/{session_id}/stream {"answer": "..."} -> следующий вопрос по мере генерации (SSE)
+    POST /api/interviews/{session_id}/end    история диалога и отчет (results), сессия закрывается
+    GET  /api/stats
+
+WebSocket /ws - те же действия сообщениями {"type": "start" | "resume" | "answer" | "end", ...};
+вопрос приходит фрагментами {"type": "delta"}, затем {"type": "question"}.
+
+Ограничения нагрузки:
+- не больше INTERVIEW_SERVER_MAX_SESSIONS сессий в памяти, иначе 503;
+- не больше INTERVIEW_SERVER_MAX_INFLIGHT ответов в обработке; кто не дождался
+  слота за INTERVIEW_SERVER_QUEUE_TIMEOUT секунд, получает 503 с Retry-After;
+- один ответ сессии в обработке одновременно (повторный - 409);
+- следующий вопрос не дольше INTERVIEW_SERVER_ANSWER_TIMEOUT, иначе резервный вопрос;
+- состояние сессии сохраняется в хранилище сессий после каждого ответа, поэтому
+  собеседование продолжает любой процесс (в том числе после падения этого);
+- сессии без запросов дольше INTERVIEW_SERVER_IDLE_TIMEOUT выгружаются из памяти
+  и восстанавливаются из хранилища при следующем запросе.
+
+Запуск (против заглушки GigaChat - см. mock_gigachat.py):
+    python interview_server.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from aiohttp import web, WSMsgType
+
+from config import Config
+from services.interview_agent import InterviewAgent
+from services.async_gigachat_client import close_async_sessions
+from services.session_store import get_session_store
+
+
+def json_error(error_class, message, **headers):
+    return error_class(text=json.dumps({"error": message}, ensure_ascii=False),
+                       content_type="application/json", headers=headers or None)
+
+
+class Session:
+    """Агент собеседования и его блокировка: один ответ в обработке"""
+
+    __slots__ = ("agent", "lock", "last_active", "unloading")
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        # Состояние записывается в хранилище перед выгрузкой из памяти
+        self.unloading = False
+
+
+class InterviewServer:
+    """Сессии собеседований в памяти процесса с выгрузкой в хранилище сессий"""
+
+    def __init__(self, store=None, max_sessions=None, max_inflight=None, queue_timeout=None,
+                 answer_timeout=None, idle_timeout=None, evict_interval=None, prefetch=None):
+        self.store = store if store is not None else get_session_store()
+        self.max_sessions = max_sessions or Config.INTERVIEW_SERVER_MAX_SESSIONS
+        self.max_inflight = max_inflight or Config.INTERVIEW_SERVER_MAX_INFLIGHT
+        self.queue_timeout = queue_timeout or Config.INTERVIEW_SERVER_QUEUE_TIMEOUT
+        self.answer_timeout = answer_timeout or Config.INTERVIEW_SERVER_ANSWER_TIMEOUT
+        self.idle_timeout = idle_timeout or Config.INTERVIEW_SERVER_IDLE_TIMEOUT
+        self.evict_interval = evict_interval or Config.INTERVIEW_SERVER_EVICT_INTERVAL
+        self.prefetch = prefetch
+        self.sessions = {}
+        self._slots = None
+        self._evictor = None
+        self.stats = {
+            "started": 0, "answers": 0, "ended": 0, "restored": 0, "evicted": 0,
+            "timeouts": 0, "rejected_full": 0, "rejected_busy": 0, "conflicts": 0, "inflight": 0
+        }
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post("/api/interviews", self.handle_start)
+        app.router.add_get("/api/interviews/{session_id}", self.handle_get)
+        app.router.add_post("/api/interviews/{session_id}/answer", self.handle_answer)
+        app.router.add_post("/api/interviews/{session_id}/stream", self.handle_stream)
+        app.router.add_post("/api/interviews/{session_id}/end", self.handle_end)
+        app.router.add_get("/api/stats", self.handle_stats)
+        app.router.add_get("/ws", self.handle_ws)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app):
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._evictor = asyncio.create_task(self._evict_idle())
+
+    async def _on_cleanup(self, app):
+        self._evictor.cancel()
+        # Незавершенные собеседования сохраняются: их продолжит следующий процесс
+        for session_id in list(self.sessions):
+            await self._unload(session_id)
+        await close_async_sessions()
+
+    # Сессии
+
+    async def start(self, vacancy, skills):
+        if len(self.sessions) >= self.max_sessions:
+            self.stats["rejected_full"] += 1
+            raise json_error(web.HTTPServiceUnavailable, "Достигнут лимит сессий", **{"Retry-After": "5"})
+
+        # Нормализация навыков и банк вопросов - синхронный код, не блокируем event loop
+        agent = await asyncio.to_thread(self._new_agent, vacancy, skills)
+        self.sessions[agent.session_id] = Session(agent)
+        await self._save(agent)
+        self.stats["started"] += 1
+        return agent
+
+    def _new_agent(self, vacancy, skills):
+        agent = InterviewAgent(vacancy, skills, prefetch=self.prefetch)
+        agent.start_interview()
+        return agent
+
+    async def get(self, session_id):
+        """Сессия в памяти или восстановленная из хранилища"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            state = await asyncio.to_thread(self.store.load, session_id)
+            if state is None:
+                raise json_error(web.HTTPNotFound, "Собеседование не найдено")
+            # Пока загружали, сессию мог восстановить параллельный запрос
+            session = self.sessions.get(session_id)
+            if session is None:
+                agent = await asyncio.to_thread(InterviewAgent.from_state, state, self.prefetch)
+                session = self.sessions.setdefault(session_id, Session(agent))
+                self.stats["restored"] += 1
+        session.last_active = time.monotonic()
+        return session
+
+    async def answer(self, session, answer, on_delta=None):
+        """Ответ кандидата и следующий вопрос (on_delta - для потоковой выдачи)"""
+        if session.lock.locked() and not session.unloading:
+            self.stats["conflicts"] += 1
+            raise json_error(web.HTTPConflict, "Предыдущий ответ еще обрабатывается")
+
+        async with session.lock:
+            if session.unloading:
+                # Пока ждали, сессия выгружена: продолжаем с сохраненного состояния
+                session = await self.get(session.agent.session_id)
+                return await self.answer(session, answer, on_delta)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected_busy"] += 1
+                raise json_error(web.HTTPServiceUnavailable, "Сервер перегружен, повторите ответ позже",
+                                 **{"Retry-After": "1"})
+
+            agent = session.agent
+            count = agent.question_count
+            timed_out = False
+            self.stats["inflight"] += 1
+            try:
+                if on_delta is None:
+                    status = await asyncio.wait_for(agent.process_answer_async(answer), self.answer_timeout)
+                else:
+                    status = await asyncio.wait_for(agent.process_answer_stream_async(answer, on_delta),
+                                                    self.answer_timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                timed_out = True
+                # Ответ уже записан, а вопрос не успел сгенерироваться
+                status = agent.question_count < agent.max_questions
+                if status and agent.conversation_history[-1]["role"] == "user":
+                    agent._ask_question(agent.FALLBACK_QUESTION)
+                    if on_delta is not None:
+                        await on_delta(agent.FALLBACK_QUESTION)
+            finally:
+                self.stats["inflight"] -= 1
+                self._slots.release()
+                session.last_active = time.monotonic()
+            # Сохраняем под блокировкой сессии: следующий ответ не изменит состояние во время записи
+            await self._save(agent)
+
+        self.stats["answers"] += 1
+        result = self._describe(agent)
+        result["finished"] = not status
+        result["timeout"] = timed_out
+        if agent.question_count == count and status:
+            # Слишком короткий ответ не засчитан
+            result["question"] = None
+            result["message"] = "Пожалуйста, ответьте более развернуто."
+        return result
+
+    async def end(self, session_id):
+        session = await self.get(session_id)
+        async with session.lock:
+            history = session.agent.end_interview()
+            # Отчет из оценок, полученных во время собеседования (None - нужен полный анализ)
+            results = await asyncio.to_thread(session.agent.get_results)
+        self.sessions.pop(session_id, None)
+        await asyncio.to_thread(self.store.delete, session_id)
+        self.stats["ended"] += 1
+        return {"conversation_history": history, "results": results}
+
+    @staticmethod
+    def _describe(agent):
+        last = agent.conversation_history[-1] if agent.conversation_history else None
+        return {
+            "session_id": agent.session_id,
+            "question": last["content"] if last and last["role"] == "assistant" else None,
+            "question_count": agent.question_count,
+            "max_questions": agent.max_questions
+        }
+
+    async def _save(self, agent):
+        try:
+            await asyncio.to_thread(self.store.save, agent.to_state())
+            return True
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить сессию {agent.session_id}: {e}")
+            return False
+
+    async def _unload(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        # Пока состояние записывается, сессия остается в памяти, а ответы ждут блокировку
+        session.unloading = True
+        async with session.lock:
+            if session.agent.prefetcher is not None:
+                session.agent.prefetcher.cancel()
+            if await self._save(session.agent):
+                if self.sessions.get(session_id) is session:
+                    del self.sessions[session_id]
+            else:
+                session.unloading = False
+
+    async def _evict_idle(self):
+        """Выгрузка простаивающих сессий в хранилище"""
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            deadline = time.monotonic() - self.idle_timeout
+            idle = [
+                session_id for session_id, session in self.sessions.items()
+                if session.last_active < deadline and not session.lock.locked()
+            ]
+            for session_id in idle:
+                await self._unload(session_id)
+            self.stats["evicted"] += len(idle)
+
+    def get_stats(self):
+        return dict(self.stats, sessions=len(self.sessions), store=self.store.name)
+
+    # HTTP
+
+    @staticmethod
+    async def _read_json(request):
+        try:
+            return await request.json()
+        except ValueError:
+            raise json_error(web.HTTPBadRequest, "Тело запроса должно быть JSON")
+
+    async def handle_start(self, request):
+        body = await self._read_json(request)
+        vacancy = body.get("vacancy")
+        skills = body.get("skills") or Config.DEFAULT_VACANCIES.get(vacancy)
+        if not vacancy or not skills:
+            raise json_error(web.HTTPBadRequest, "Нужны vacancy и skills (или вакансия из DEFAULT_VACANCIES)")
+        agent = await self.start(vacancy, skills)
+        result = self._describe(agent)
+        result["welcome"] = agent.conversation_history[0]["content"]
+        return web.json_response(result)
+
+    async def handle_get(self, request):
+        session = await self.get(request.match_info["session_id"])
+        result = self._describe(session.agent)
+        result["conversation_history"] = session.agent.conversation_history
+        return web.json_response(result)
+
+    async def handle_answer(self, request):
+        session = await self.get(request.match_info["session_id"])
+        body = await self._read_json(request)
+        return web.json_response(await self.answer(session, str(body.get("answer", ""))))
+
+    async def handle_stream(self, request):
+        session = await self.get(request.match_info["session_id"])
+        body = await self._read_json(request)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+
+        async def on_delta(delta):
+            if not response.prepared:
+                await response.prepare(request)
+            # write ждет, пока клиент примет данные: медленный клиент не копит буфер на сервере
+            await response.write(f"data: {json.dumps({'delta': delta}, ensure_ascii=False)}\n\n".encode())
+
+        result = await self.answer(session, str(body.get("answer", "")), on_delta=on_delta)
+        if not response.prepared:
+            await response.prepare(request)
+        await response.write(f"data: {json.dumps(result, ensure_ascii=False)}\n\ndata: [DONE]\n\n".encode())
+        await response.write_eof()
+        return response
+
+    async def handle_end(self, request):
+        return web.json_response(await self.end(request.match_info["session_id"]))
+
+    async def handle_stats(self, request):
+        return web.json_response(self.get_stats())
+
+    # WebSocket
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        session_id = None
+
+        async def on_delta(delta):
+            await ws.send_json({"type": "delta", "delta": delta})
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(message.data)
+                kind = data.get("type")
+                if kind == "start":
+                    vacancy = data.get("vacancy")
+                    agent = await self.start(vacancy, data.get("skills") or Config.DEFAULT_VACANCIES.get(vacancy))
+                    session_id = agent.session_id
+                    result = self._describe(agent)
+                    result["welcome"] = agent.conversation_history[0]["content"]
+                    await ws.send_json(dict(result, type="question"))
+                elif kind == "resume":
+                    session = await self.get(data.get("session_id"))
+                    session_id = session.agent.session_id
+                    await ws.send_json(dict(self._describe(session.agent), type="question"))
+                elif kind == "answer":
+                    session = await self.get(data.get("session_id") or session_id)
+                    session_id = session.agent.session_id
+                    result = await self.answer(session, str(data.get("answer", "")),
+                                               on_delta=on_delta if data.get("stream", True) else None)
+                    await ws.send_json(dict(result, type="question"))
+                elif kind == "end":
+                    result = await self.end(data.get("session_id") or session_id)
+                    await ws.send_json(dict(result, type="end"))
+                    break
+                else:
+                    await ws.send_json({"type": "error", "status": 400, "error": f"Неизвестный тип: {kind}"})
+            except web.HTTPException as e:
+                await ws.send_json({"type": "error", "status": e.status, "error": json.loads(e.text)["error"]})
+            except (ValueError, TypeError, AttributeError) as e:
+                await ws.send_json({"type": "error", "status": 400, "error": str(e)})
+
+        await ws.close()
+        return ws
+
+
+def start_in_thread(host="127.0.0.1", port=0, **options):
+    """Запуск сервера в фоновом потоке. Возвращает (server, base_url)"""
+    server = InterviewServer(**options)
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(server.create_app())
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, host, port)
+        loop.run_until_complete(site.start())
+        address["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True, name="interview-server").start()
+    ready.wait()
+    return server, f"http://{host}:{address['port']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер собеседований HR-аватара")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-sessions", type=int, help="сессий в памяти (INTERVIEW_SERVER_MAX_SESSIONS)")
+    parser.add_argument("--max-inflight", type=int, help="ответов в обработке (INTERVIEW_SERVER_MAX_INFLIGHT)")
+    parser.add_argument("--prefetch", action="store_true", help="готовить следующий вопрос, пока кандидат отвечает")
+    args = parser.parse_args()
+
+    server = InterviewServer(max_sessions=args.max_sessions, max_inflight=args.max_inflight,
+                             prefetch=args.prefetch or None)
+    print(f"🎤 Сервер собеседований: http://{args.host}:{args.port} (сессии: {server.store.name})")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
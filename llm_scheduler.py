@@ -0,0 +1,247 @@
+# services/llm_scheduler.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+
+from config import Config
+
+# Классы приоритета: меньше - важнее
+INTERACTIVE = 0  # живое собеседование, кандидат ждет вопрос
+BATCH = 1  # фоновый скрининг и анализ
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class QueueTimeoutError(Exception):
+    """Заявка не дождалась своей очереди"""
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Грубая оценка токенов запроса: ~3 символа на токен плюс лимит ответа"""
+    chars = sum(len(message.get("content", "")) for message in messages)
+    return chars // 3 + max_tokens
+
+
+class TokenBucket:
+    """Token bucket: rate единиц в минуту, запас не больше capacity"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount):
+        """Сколько секунд ждать, пока в корзине наберется amount"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Ticket:
+    """Заявка на запрос к LLM в очереди планировщика"""
+    __slots__ = ("priority", "session_id", "tokens", "enqueued_at", "event", "notify")
+
+    def __init__(self, priority, session_id, tokens):
+        self.priority = priority
+        self.session_id = session_id
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+        self.notify = None
+
+    def grant(self):
+        self.event.set()
+        if self.notify is not None:
+            self.notify()
+
+
+class LLMScheduler:
+    """Планировщик запросов к GigaChat с учетом лимитов квоты.
+
+    - два token bucket: запросы в минуту и токены в минуту;
+    - строгий приоритет: интерактивные вызовы всегда идут раньше фоновых;
+    - внутри класса приоритета сессии обслуживаются по кругу (round-robin),
+      поэтому пачка запросов одной сессии не блокирует остальные.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.request_bucket = TokenBucket(requests_per_minute or Config.LLM_REQUESTS_PER_MINUTE)
+        self.token_bucket = TokenBucket(tokens_per_minute or Config.LLM_TOKENS_PER_MINUTE)
+        self._queues = {INTERACTIVE: OrderedDict(), BATCH: OrderedDict()}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._metrics = {
+            priority: {"granted": 0, "max_depth": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for priority in self._queues
+        }
+
+    def acquire(self, priority=BATCH, session_id=None, tokens=0, timeout=None):
+        """Блокирующее ожидание разрешения на запрос"""
+        ticket = self._submit(priority, session_id, tokens)
+        if ticket.event.is_set():
+            return
+        if not ticket.event.wait(timeout):
+            self._cancel(ticket)
+            raise QueueTimeoutError("Превышено время ожидания в очереди к GigaChat")
+
+    async def acquire_async(self, priority=BATCH, session_id=None, tokens=0):
+        """Ожидание разрешения без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
+
+        ticket = _Ticket(priority, session_id, tokens)
+        ticket.notify = lambda: loop.call_soon_threadsafe(wake)
+        self._submit(priority, session_id, tokens, ticket)
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(ticket)
+            raise
+
+    def settle(self, reserved_tokens, used_tokens):
+        """Возврат неиспользованной части зарезервированных токенов"""
+        if used_tokens is None or used_tokens >= reserved_tokens:
+            return
+        with self._cond:
+            self.token_bucket.refund(reserved_tokens - used_tokens)
+            self._cond.notify()
+
+    def _submit(self, priority, session_id, tokens, ticket=None):
+        ticket = ticket or _Ticket(priority, session_id, tokens)
+        with self._cond:
+            # Быстрый путь: очередь пуста и квота есть
+            if not self._has_waiting() and self._wait_time(ticket) == 0:
+                self._admit(ticket)
+                ticket.grant()
+                return ticket
+
+            sessions = self._queues[priority]
+            sessions.setdefault(session_id, deque()).append(ticket)
+            metrics = self._metrics[priority]
+            metrics["max_depth"] = max(metrics["max_depth"], self._depth(priority))
+            self._ensure_dispatcher()
+            self._cond.notify()
+        return ticket
+
+    def _cancel(self, ticket):
+        """Снятие заявки, которую перестали ждать (таймаут, отмена задачи)"""
+        with self._cond:
+            sessions = self._queues[ticket.priority]
+            queue = sessions.get(ticket.session_id)
+            if queue and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del sessions[ticket.session_id]
+                return
+
+            # Разрешение выдано одновременно с таймаутом: запрос не будет отправлен, квота возвращается
+            self.request_bucket.refund(1)
+            self.token_bucket.refund(ticket.tokens)
+            self._cond.notify()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                ticket = self._peek()
+                if ticket is None:
+                    self._cond.wait()
+                    continue
+
+                wait = self._wait_time(ticket)
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                self._pop(ticket)
+                self._admit(ticket)
+            ticket.grant()
+
+    def _peek(self):
+        """Следующая заявка: высший приоритет, затем первая сессия в круге"""
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def _pop(self, ticket):
+        sessions = self._queues[ticket.priority]
+        queue = sessions.pop(ticket.session_id)
+        queue.popleft()
+        if queue:
+            # Сессия уходит в конец круга
+            sessions[ticket.session_id] = queue
+
+    def _admit(self, ticket):
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(ticket.tokens)
+        waited = time.monotonic() - ticket.enqueued_at
+        metrics = self._metrics[ticket.priority]
+        metrics["granted"] += 1
+        metrics["wait_total"] += waited
+        metrics["wait_max"] = max(metrics["wait_max"], waited)
+
+    def _wait_time(self, ticket):
+        return max(self.request_bucket.time_until(1), self.token_bucket.time_until(ticket.tokens))
+
+    def _has_waiting(self):
+        return any(self._queues.values())
+
+    def _depth(self, priority):
+        return sum(len(queue) for queue in self._queues[priority].values())
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True, name="llm-scheduler")
+            self._dispatcher.start()
+
+    def get_stats(self):
+        """Глубина очередей и время ожидания по классам приоритета"""
+        with self._cond:
+            stats = {}
+            for priority, metrics in self._metrics.items():
+                granted = metrics["granted"]
+                stats[PRIORITY_NAMES[priority]] = {
+                    "queue_depth": self._depth(priority),
+                    "max_depth": metrics["max_depth"],
+                    "waiting_sessions": len(self._queues[priority]),
+                    "granted": granted,
+                    "avg_wait": round(metrics["wait_total"] / granted, 4) if granted else 0.0,
+                    "max_wait": round(metrics["wait_max"], 4)
+                }
+            return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Общий для процесса планировщик запросов"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
\ No newline at end of file
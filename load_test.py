@@ -0,0 +1,305 @@
+# load_test.py
+"""
+Нагрузочный тест полного сценария: ResumeParser -> InterviewAgent -> InterviewAnalyzer.
+
+N одновременных кандидатов проходят разбор резюме, собеседование и анализ.
+По каждому этапу выводятся пропускная способность и p50/p95/p99 задержки.
+
+Пример (заглушка поднимается в этом же процессе):
+    python load_test.py --candidates 50 --concurrency 20 --questions 5 --latency lognormal:0.5,0.3
+
+Предвыборка следующего вопроса, пока кандидат думает над ответом:
+    python load_test.py --questions 8 --think-time 1.5 --prefetch
+
+Оценка ответов во время собеседования вместо анализа всего диалога в конце:
+    python load_test.py --questions 8 --think-time 1.5 --evaluate
+
+Против внешней заглушки или стенда:
+    python mock_gigachat.py --port 8090 &
+    python load_test.py --target http://127.0.0.1:8090
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+SKILL_POOL = [
+    "Python", "Django", "Flask", "FastAPI", "PostgreSQL", "MySQL", "MongoDB", "Redis",
+    "Docker", "Kubernetes", "AWS", "Linux", "Git", "CI/CD", "Pandas", "NumPy"
+]
+
+ANSWER_TEMPLATES = [
+    "Я использовал {skill} в двух проектах, отвечал за архитектуру и ревью кода.",
+    "С {skill} работаю около трех лет, настраивал мониторинг и оптимизировал запросы.",
+    "В последнем проекте на {skill} мы сократили время ответа сервиса вдвое.",
+    "Знаком с {skill} на базовом уровне, изучал по документации и пет-проектам."
+]
+
+
+def percentile(samples, percent):
+    """Перцентиль по отсортированной выборке (nearest-rank)"""
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, max(0, int(round(len(samples) * percent / 100.0)) - 1))
+    return samples[index]
+
+
+class StageMetrics:
+    """Потокобезопасный сбор задержек и ошибок по этапам"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def error(self, stage):
+        with self._lock:
+            self.errors[stage] += 1
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage)
+            raise
+        self.add(stage, time.perf_counter() - started)
+
+    def report(self, elapsed):
+        lines = [
+            f"{'этап':<12}{'кол-во':>8}{'ошибки':>8}{'в сек':>9}{'p50, с':>9}{'p95, с':>9}{'p99, с':>9}",
+            "-" * 64
+        ]
+        for stage in ("resume", "question", "ttft", "analysis", "candidate"):
+            samples = self.samples.get(stage, [])
+            if not samples and not self.errors.get(stage):
+                continue
+            throughput = len(samples) / elapsed if elapsed else 0.0
+            values = [percentile(samples, p) for p in (50, 95, 99)]
+            cells = "".join(f"{value:>9.3f}" if value is not None else f"{'-':>9}" for value in values)
+            lines.append(f"{stage:<12}{len(samples):>8}{self.errors.get(stage, 0):>8}{throughput:>9.2f}{cells}")
+        return "\n".join(lines)
+
+
+def make_candidate(index, vacancy_skills):
+    """Синтетический кандидат: текст резюме и генератор ответов"""
+    rng = random.Random(index)
+    skills = rng.sample(SKILL_POOL, rng.randint(4, 8))
+    resume = (
+        f"Кандидат №{index}. Backend-разработчик, опыт {rng.randint(1, 10)} лет.\n"
+        f"Навыки: {', '.join(skills)}.\n"
+        f"Участвовал в разработке высоконагруженных сервисов на {skills[0]} и {skills[1]}."
+    )
+    answers = [rng.choice(ANSWER_TEMPLATES).format(skill=rng.choice(skills + vacancy_skills)) for _ in range(50)]
+    return resume, answers
+
+
+class LoadTest:
+    """Прогон N кандидатов через полный сценарий"""
+
+    def __init__(self, args):
+        from services import ResumeParser, InterviewAnalyzer
+
+        self.args = args
+        self.metrics = StageMetrics()
+        self.vacancy_skills = ["Python", "Django", "PostgreSQL", "Docker", "Redis"]
+        # Модель эмбеддингов тяжелая - один парсер и анализатор на весь прогон
+        self.parser = ResumeParser()
+        self.analyzer = InterviewAnalyzer()
+
+    def _new_agent(self):
+        from services import InterviewAgent
+
+        agent = InterviewAgent("Python-разработчик", self.vacancy_skills, prefetch=self.args.prefetch,
+                               evaluate=self.args.evaluate)
+        agent.max_questions = self.args.questions
+        return agent
+
+    def run_candidate(self, index):
+        resume, answers = make_candidate(index, self.vacancy_skills)
+        started = time.perf_counter()
+
+        with self.metrics.measure("resume"):
+            self.parser.parse_resume(resume, self.vacancy_skills)
+
+        agent = self._new_agent()
+        agent.start_interview()
+        for answer in answers:
+            # Кандидат обдумывает и набирает ответ - в это время работает предвыборка
+            if self.args.think_time:
+                time.sleep(self.args.think_time)
+            with self.metrics.measure("question"):
+                if self.args.stream:
+                    # Базовые вопросы идут без LLM - TTFT считаем только для сгенерированных
+                    agent.last_call_stats = {"ttft": None, "total": None}
+                    has_next = self._consume_stream(agent.process_answer_stream(answer))
+                    if agent.last_call_stats.get("ttft") is not None:
+                        self.metrics.add("ttft", agent.last_call_stats["ttft"])
+                else:
+                    has_next = agent.process_answer(answer)
+            if not has_next:
+                break
+
+        with self.metrics.measure("analysis"):
+            history = agent.end_interview()
+            if agent.get_results() is None:
+                self.analyzer.analyze_interview(history, self.vacancy_skills)
+
+        self.metrics.add("candidate", time.perf_counter() - started)
+
+    @staticmethod
+    def _consume_stream(chunks):
+        while True:
+            try:
+                next(chunks)
+            except StopIteration as stop:
+                return stop.value
+
+    async def run_candidate_async(self, index):
+        resume, answers = make_candidate(index, self.vacancy_skills)
+        started = time.perf_counter()
+
+        with self.metrics.measure("resume"):
+            await self.parser.parse_resume_async(resume, self.vacancy_skills)
+
+        agent = self._new_agent()
+        agent.start_interview()
+        for answer in answers:
+            if self.args.think_time:
+                await asyncio.sleep(self.args.think_time)
+            with self.metrics.measure("question"):
+                has_next = await agent.process_answer_async(answer)
+            if not has_next:
+                break
+
+        with self.metrics.measure("analysis"):
+            history = agent.end_interview()
+            if await asyncio.to_thread(agent.get_results) is None:
+                await self.analyzer.analyze_interview_async(history, self.vacancy_skills)
+
+        self.metrics.add("candidate", time.perf_counter() - started)
+
+    def run_threads(self):
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            futures = [pool.submit(self._guarded, self.run_candidate, i) for i in range(self.args.candidates)]
+            for future in futures:
+                future.result()
+
+    async def run_async(self):
+        from services.async_gigachat_client import close_async_sessions
+
+        limiter = asyncio.Semaphore(self.args.concurrency)
+
+        async def bounded(index):
+            async with limiter:
+                try:
+                    await self.run_candidate_async(index)
+                except Exception:
+                    self.metrics.error("candidate")
+
+        await asyncio.gather(*(bounded(i) for i in range(self.args.candidates)))
+        await close_async_sessions()
+
+    def _guarded(self, fn, index):
+        try:
+            fn(index)
+        except Exception:
+            self.metrics.error("candidate")
+
+    def run(self):
+        # Вывод агента (вопросы, приветствия) при нагрузке только мешает
+        output = open(os.devnull, "w") if not self.args.verbose else None
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            if self.args.mode == "async":
+                asyncio.run(self.run_async())
+            else:
+                self.run_threads()
+        elapsed = time.perf_counter() - started
+        if output:
+            output.close()
+        return elapsed
+
+
+def print_service_stats():
+    """Метрики общих компонентов клиента"""
+    from services.http_pool import get_http_pool
+    from services.resilience import get_resilience
+    from services.llm_scheduler import get_scheduler
+    from services.question_prefetch import get_prefetch_stats
+    from services.question_bank import get_question_bank
+
+    print(f"\nПул соединений: {get_http_pool().get_stats()}")
+    print(f"Устойчивость:   {get_resilience().get_stats()}")
+    if Config.LLM_SCHEDULER_ENABLED:
+        print(f"Планировщик:    {get_scheduler().get_stats()}")
+    print(f"Банк вопросов:  {get_question_bank().get_stats()}")
+    if get_prefetch_stats().started:
+        print(f"Предвыборка:    {get_prefetch_stats().get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HR-аватара")
+    parser.add_argument("--candidates", type=int, default=20, help="число кандидатов")
+    parser.add_argument("--concurrency", type=int, default=10, help="одновременных кандидатов")
+    parser.add_argument("--questions", type=int, default=5, help="вопросов на собеседование")
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads")
+    parser.add_argument("--stream", action="store_true", help="потоковая генерация вопросов (threads)")
+    parser.add_argument("--prefetch", action="store_true", help="готовить следующий вопрос, пока кандидат отвечает")
+    parser.add_argument("--evaluate", action="store_true", help="оценивать ответы во время собеседования")
+    parser.add_argument("--think-time", type=float, default=0.0, help="секунд на обдумывание ответа")
+    parser.add_argument("--target", help="URL уже запущенной заглушки; по умолчанию поднимается локально")
+    parser.add_argument("--latency", default="lognormal:0.5,0.3", help="задержка локальной заглушки")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="не отключать кэш ответов LLM")
+    parser.add_argument("--verbose", action="store_true", help="не скрывать вывод агента")
+    args = parser.parse_args()
+
+    mock = None
+    target = args.target
+    if not target:
+        from mock_gigachat import start_in_thread
+
+        mock, target = start_in_thread(
+            latency=args.latency,
+            token_delay=args.token_delay,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate
+        )
+
+    # Настройки меняем до создания клиентов: общие компоненты читают Config при создании
+    Config.GIGACHAT_AUTH_URL = f"{target}/api/v2/oauth"
+    Config.GIGACHAT_API_URL = f"{target}/api/v1"
+    Config.TOKEN_CACHE_FILE = os.path.join(tempfile.mkdtemp(prefix="hr_load_"), "token.json")
+    if not args.cache:
+        Config.LLM_CACHE_ENABLED = False
+
+    print(f"🚀 {args.candidates} кандидатов, параллельно {args.concurrency}, режим {args.mode}, API {target}")
+    test = LoadTest(args)
+    elapsed = test.run()
+
+    print(f"\nВремя прогона: {elapsed:.2f} с, кандидатов в секунду: {args.candidates / elapsed:.2f}\n")
+    print(test.metrics.report(elapsed))
+    print_service_stats()
+    if mock:
+        print(f"Заглушка:       {mock.stats}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -64,7 +64,13 @@ def conduct_interview(agent, voice_service=None):
                 break
 
             # Обработка ответа
-            if not agent.process_answer(answer):
+            if voice_service:
+                # Вопрос озвучивается по предложениям, пока генерируется продолжение
+                has_next = voice_service.speak_stream(agent.process_answer_stream(answer))
+            else:
+                has_next = agent.process_answer(answer)
+
+            if not has_next:
                 break
 
             question_count += 1
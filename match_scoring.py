@@ -0,0 +1,120 @@
+# services/match_scoring.py
+import numpy as np
+
+from config import Config
+from .embedding_cache import get_embedding_cache, normalize_skill
+from .embedding_backends import create_embedding_backend, get_embedding_backend
+from .skill_normalizer import get_skill_normalizer
+
+
+class BatchMatchScorer:
+    """Пакетный расчет соответствия: много кандидатов x много вакансий.
+
+    Оценка та же, что в ResumeParser._calculate_match_score: для каждого
+    требуемого навыка берется максимальное косинусное сходство с навыками
+    кандидата, затем среднее по требованиям, в процентах.
+
+    Каждый уникальный навык кодируется один раз. Сходство считается одной
+    матрицей "требуемые навыки x навыки кандидатов", максимум по навыкам
+    кандидата - сегментным np.maximum.reduceat по рваному (ragged) массиву,
+    усреднение по вакансиям - умножением на разреженную по смыслу матрицу весов.
+
+    Навыки приводятся к таксономии нормализатором, поэтому синонимы одного
+    навыка кодируются один раз и считаются одним навыком.
+    """
+
+    def __init__(self, model_name=None, encode_fn=None, chunk_size=None, backend=None, normalizer=None):
+        if encode_fn is not None:
+            # Внешняя функция кодирования (бенчмарки): кэш ведется под model_name,
+            # нормализация - только с явно переданным нормализатором
+            self.cache_name = model_name or Config.EMBEDDING_MODEL_NAME
+            self.normalizer = normalizer
+        else:
+            if backend is None:
+                backend = create_embedding_backend(model_name=model_name) if model_name else get_embedding_backend()
+            encode_fn = backend.encode
+            self.cache_name = backend.cache_name
+            self.normalizer = normalizer or get_skill_normalizer()
+        self._encode_fn = encode_fn
+        # Сколько навыков кандидатов обрабатывать за раз (ограничивает память)
+        self.chunk_size = chunk_size or Config.MATCH_SCORING_CHUNK
+
+    def resolve_many(self, skills):
+        """[(ключ навыка, название для эмбеддинга)]"""
+        if self.normalizer is None:
+            return [(normalize_skill(skill), skill) for skill in skills]
+        return self.normalizer.resolve_many(skills)
+
+    def embed(self, skills):
+        """Нормированные эмбеддинги навыков через общий кэш, строка на каждый навык"""
+        names = [name for _, name in self.resolve_many(list(skills))]
+        return get_embedding_cache(self.cache_name).get_many(names, self._encode_fn)
+
+    def score_matrix(self, candidates_skills, vacancies_skills):
+        """Матрица оценок (кандидаты x вакансии) в процентах, float32"""
+        n_candidates = len(candidates_skills)
+        n_vacancies = len(vacancies_skills)
+        scores = np.zeros((n_candidates, n_vacancies), dtype=np.float32)
+        if not n_candidates or not n_vacancies:
+            return scores
+
+        # Словарь уникальных навыков: синонимы одного навыка получают один номер
+        surfaces = list(dict.fromkeys(s for skills in list(candidates_skills) + list(vacancies_skills) for s in skills))
+        resolved = dict(zip(surfaces, self.resolve_many(surfaces)))
+        vocabulary = {}
+        originals = []
+
+        def index_of(skill):
+            key, name = resolved[skill]
+            if key not in vocabulary:
+                vocabulary[key] = len(originals)
+                originals.append(name)
+            return vocabulary[key]
+
+        candidate_ids = [[index_of(s) for s in skills] for skills in candidates_skills]
+        vacancy_ids = [[index_of(s) for s in skills] for skills in vacancies_skills]
+        if not originals:
+            return scores
+
+        embeddings = get_embedding_cache(self.cache_name).get_many(originals, self._encode_fn)
+
+        # Уникальные требуемые навыки и веса вакансий: weights[j, r] = доля навыка r в вакансии j
+        required = sorted({i for ids in vacancy_ids for i in ids})
+        if not required:
+            return scores
+        required_pos = {skill: pos for pos, skill in enumerate(required)}
+        weights = np.zeros((n_vacancies, len(required)), dtype=np.float32)
+        for j, ids in enumerate(vacancy_ids):
+            for i in ids:
+                weights[j, required_pos[i]] += 1.0 / len(ids)
+
+        required_embeddings = embeddings[required]
+
+        # Кандидаты без навыков получают 0, как и в одиночном расчете
+        active = [c for c, ids in enumerate(candidate_ids) if ids]
+        start = 0
+        while start < len(active):
+            # Набираем кандидатов, пока не превысим chunk_size навыков
+            end = start
+            total = 0
+            while end < len(active) and (total == 0 or total + len(candidate_ids[active[end]]) <= self.chunk_size):
+                total += len(candidate_ids[active[end]])
+                end += 1
+            chunk = active[start:end]
+
+            flat = np.fromiter((i for c in chunk for i in candidate_ids[c]), dtype=np.int64, count=total)
+            lengths = np.fromiter((len(candidate_ids[c]) for c in chunk), dtype=np.int64, count=len(chunk))
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+            # (требуемые навыки x навыки кандидатов чанка)
+            similarity = required_embeddings @ embeddings[flat].T
+            best = np.maximum.reduceat(similarity, offsets, axis=1)
+
+            scores[chunk] = (weights @ best).T * 100
+            start = end
+
+        return scores
+
+    def score(self, candidate_skills, required_skills):
+        """Оценка одного кандидата по одной вакансии"""
+        return float(self.score_matrix([candidate_skills], [required_skills])[0, 0])
\ No newline at end of file
@@ -0,0 +1,245 @@
+# mock_gigachat.py
+"""
+Локальная замена GigaChat API для нагрузочного тестирования.
+
+Реализует эндпоинты, которые использует клиент:
+    POST /api/v2/oauth
+    POST /api/v1/chat/completions  (в том числе stream=true, SSE)
+
+Запуск:
+    python mock_gigachat.py --port 8090 --latency lognormal:0.8,0.4 --error-rate 0.02
+
+Клиент переключается на заглушку через переменные окружения:
+    GIGACHAT_AUTH_URL=http://127.0.0.1:8090/api/v2/oauth
+    GIGACHAT_API_URL=http://127.0.0.1:8090/api/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from aiohttp import web
+
+SKILL_VOCABULARY = [
+    "Python", "Django", "Flask", "FastAPI", "PostgreSQL", "MySQL", "MongoDB", "Redis",
+    "Docker", "Kubernetes", "AWS", "Linux", "Git", "CI/CD", "Pandas", "NumPy",
+    "ML", "SQL", "Statistics", "JavaScript", "React", "Java", "Kafka", "Terraform"
+]
+
+QUESTION_TEMPLATES = [
+    "Расскажите, как вы использовали {skill} в последнем проекте?",
+    "Какие сложности возникали у вас при работе с {skill} и как вы их решали?",
+    "Как бы вы спроектировали решение с {skill} под высокую нагрузку?",
+    "Какие лучшие практики {skill} вы применяете в команде?"
+]
+
+
+class LatencyModel:
+    """Распределение задержки: fixed:S, uniform:A,B, normal:MEAN,STD, lognormal:MEDIAN,SIGMA"""
+
+    def __init__(self, spec="fixed:0"):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+
+    def sample(self):
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return random.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, random.gauss(*self.params))
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return random.lognormvariate(0, sigma) * median
+        raise ValueError(f"Неизвестное распределение задержки: {self.kind}")
+
+
+class MockGigaChat:
+    """Заглушка GigaChat с настраиваемыми задержками, ошибками и ответами"""
+
+    def __init__(self, latency="fixed:0.2", token_delay=0.02, error_rate=0.0, rate_limit_rate=0.0,
+                 token_ttl=1800, responses=None, prompt_delay=0.0):
+        self.latency = LatencyModel(latency)
+        self.token_delay = token_delay
+        # Чтение промпта: секунд на 1000 токенов (длинный промпт отвечается дольше)
+        self.prompt_delay = prompt_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.token_ttl = token_ttl
+        # Шаблонные ответы: подстрока промпта -> текст ответа
+        self.responses = responses or {}
+        self.tokens = {}
+        self.stats = {"oauth": 0, "chat": 0, "stream": 0, "errors": 0, "rate_limited": 0, "unauthorized": 0}
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_post("/api/v2/oauth", self.handle_oauth)
+        app.router.add_post("/api/v1/chat/completions", self.handle_chat)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def handle_oauth(self, request):
+        self.stats["oauth"] += 1
+        token = uuid.uuid4().hex
+        expires_at = time.time() + self.token_ttl
+        self.tokens[token] = expires_at
+        return web.json_response({
+            "access_token": token,
+            "expires_at": int(expires_at * 1000),
+            "expires_in": self.token_ttl
+        })
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def handle_chat(self, request):
+        token = request.headers.get("Authorization", "").replace("Bearer ", "")
+        if self.tokens.get(token, 0) < time.time():
+            self.stats["unauthorized"] += 1
+            return web.json_response({"message": "Token has expired"}, status=401)
+
+        body = await request.json()
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 3
+        await asyncio.sleep(self.latency.sample() + self.prompt_delay * prompt_tokens / 1000)
+
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers={"Retry-After": "1"})
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"message": "Internal Server Error"}, status=random.choice([500, 503]))
+
+        content = self.build_response(body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 3
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            self.stats["stream"] += 1
+            return await self._stream(request, content, body.get("model", "GigaChat"))
+
+        self.stats["chat"] += 1
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant", "content": content}, "index": 0, "finish_reason": "stop"}],
+            "created": int(time.time()),
+            "model": body.get("model", "GigaChat"),
+            "object": "chat.completion",
+            "usage": usage
+        })
+
+    async def _stream(self, request, content, model):
+        """Ответ в формате SSE, по одному слову на событие"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        for word in re.findall(r"\S+\s*", content):
+            chunk = {"choices": [{"delta": {"content": word}, "index": 0}], "model": model}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            await asyncio.sleep(self.token_delay)
+
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def build_response(self, messages):
+        """Канонический или шаблонный ответ по типу промпта"""
+        prompt = "\n".join(m.get("content", "") for m in messages)
+
+        for marker, template in self.responses.items():
+            if marker in prompt:
+                return template.format(skill=random.choice(SKILL_VOCABULARY))
+
+        found = [skill for skill in SKILL_VOCABULARY if skill.lower() in prompt.lower()]
+
+        if "ВАРИАНТОВ СЛЕДУЮЩЕГО ВОПРОСА" in prompt:
+            skills = random.sample(found or SKILL_VOCABULARY, min(3, len(found or SKILL_VOCABULARY)))
+            return json.dumps({"variants": [
+                {
+                    "expects": f"Кандидат рассказывает об опыте работы с {skill}",
+                    "question": random.choice(QUESTION_TEMPLATES).format(skill=skill)
+                } for skill in skills
+            ]}, ensure_ascii=False)
+
+        if "Извлеки технические навыки" in prompt:
+            return json.dumps({"skills": found or random.sample(SKILL_VOCABULARY, 5)}, ensure_ascii=False)
+
+        if "СГЕНЕРИРУЙ ОТЧЕТ" in prompt or "Оцени ответ" in prompt:
+            skills = found or random.sample(SKILL_VOCABULARY, 3)
+            return json.dumps({
+                "overall_score": random.randint(40, 95),
+                "strengths": skills[:2],
+                "weaknesses": skills[2:4] or ["Мало практических примеров"],
+                "skill_assessment": {
+                    skill: random.choice(["confirmed", "partial", "missing"]) for skill in skills[:5]
+                },
+                "recommendation": random.choice(["hire", "reject", "additional_interview"]),
+                "feedback": "Кандидат уверенно отвечает на базовые вопросы."
+            }, ensure_ascii=False)
+
+        return random.choice(QUESTION_TEMPLATES).format(skill=random.choice(found or SKILL_VOCABULARY))
+
+
+def start_in_thread(host="127.0.0.1", port=0, **options):
+    """Запуск заглушки в фоновом потоке. Возвращает (mock, base_url)"""
+    mock = MockGigaChat(**options)
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(mock.create_app())
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, host, port)
+        loop.run_until_complete(site.start())
+        address["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True, name="mock-gigachat").start()
+    ready.wait()
+    return mock, f"http://{host}:{address['port']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка GigaChat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4",
+                        help="fixed:S | uniform:A,B | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="пауза между SSE-событиями, с")
+    parser.add_argument("--prompt-delay", type=float, default=0.0, help="задержка на 1000 токенов промпта, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--token-ttl", type=int, default=1800)
+    parser.add_argument("--responses", help="JSON-файл {подстрока промпта: шаблон ответа с {skill}}")
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+
+    mock = MockGigaChat(
+        latency=args.latency,
+        token_delay=args.token_delay,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        token_ttl=args.token_ttl,
+        responses=responses,
+        prompt_delay=args.prompt_delay
+    )
+    print(f"🧪 Заглушка GigaChat: http://{args.host}:{args.port}")
+    web.run_app(mock.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
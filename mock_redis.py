@@ -0,0 +1,232 @@
+# mock_redis.py
+"""
+Локальная замена Redis для хранилища сессий (SESSION_STORE=redis) без установки Redis.
+
+Протокол RESP2, одно пространство ключей, данные только в памяти. Команды:
+    PING, AUTH, SELECT, GET, SET [EX s | PX ms], DEL, EXISTS, EXPIRE, TTL, SCAN [MATCH p] [COUNT n],
+    DBSIZE, FLUSHDB, INFO
+
+Запуск:
+    python mock_redis.py --port 6379
+
+Приложение переключается на него через переменные окружения:
+    SESSION_STORE=redis
+    SESSION_REDIS_URL=redis://127.0.0.1:6379/0
+"""
+import argparse
+import asyncio
+import fnmatch
+import threading
+import time
+
+
+class MockRedis:
+    """Ключи и значения в памяти с временем жизни"""
+
+    def __init__(self):
+        # ключ -> (значение, момент истечения или None)
+        self.data = {}
+        self.commands = 0
+        self.connections = 0
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+    def _purge(self):
+        now = time.time()
+        for key in [key for key, (_, expires) in self.data.items() if expires is not None and expires <= now]:
+            del self.data[key]
+
+    def execute(self, args):
+        """Выполнение команды: значение ответа или исключение с текстом ошибки"""
+        self.commands += 1
+        command = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if handler is None:
+            raise ValueError(f"ERR unknown command '{command}'")
+        return handler(*args[1:])
+
+    def cmd_ping(self, message=None):
+        return message if message is not None else Simple("PONG")
+
+    def cmd_auth(self, *_):
+        return Simple("OK")
+
+    def cmd_select(self, _db):
+        return Simple("OK")
+
+    def cmd_get(self, key):
+        entry = self._get(key)
+        return entry[0] if entry is not None else None
+
+    def cmd_set(self, key, value, *options):
+        expires = None
+        options = [option.upper() for option in options]
+        for i, option in enumerate(options[:-1]):
+            if option == b"EX":
+                expires = time.time() + int(options[i + 1])
+            elif option == b"PX":
+                expires = time.time() + int(options[i + 1]) / 1000
+        self.data[key] = (value, expires)
+        return Simple("OK")
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self.data[key]
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._get(key) is not None)
+
+    def cmd_expire(self, key, seconds):
+        entry = self._get(key)
+        if entry is None:
+            return 0
+        self.data[key] = (entry[0], time.time() + int(seconds))
+        return 1
+
+    def cmd_ttl(self, key):
+        entry = self._get(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int(entry[1] - time.time())
+
+    def cmd_scan(self, cursor, *options):
+        """Ключи по шаблону порциями; курсор - позиция в отсортированном списке ключей"""
+        pattern, count = None, 10
+        options = list(options)
+        for i, option in enumerate(options[:-1]):
+            if option.upper() == b"MATCH":
+                pattern = options[i + 1]
+            elif option.upper() == b"COUNT":
+                count = int(options[i + 1])
+        self._purge()
+        keys = sorted(self.data)
+        start = int(cursor)
+        batch = keys[start:start + count]
+        end = start + count
+        if pattern is not None:
+            batch = [key for key in batch if fnmatch.fnmatchcase(key.decode('utf-8', 'replace'), pattern.decode())]
+        return [str(end if end < len(keys) else 0), batch]
+
+    def cmd_dbsize(self):
+        self._purge()
+        return len(self.data)
+
+    def cmd_flushdb(self, *_):
+        self.data.clear()
+        return Simple("OK")
+
+    def cmd_info(self, *_):
+        used = sum(len(key) + len(value) for key, (value, _) in self.data.items())
+        return (f"# Memory\r\nused_memory:{used}\r\n# Keyspace\r\ndb0:keys={len(self.data)}\r\n"
+                f"# Stats\r\ntotal_commands_processed:{self.commands}\r\n").encode()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                try:
+                    reply = encode(self.execute(args))
+                except (ValueError, TypeError, IndexError) as e:
+                    message = str(e) if str(e).startswith("ERR") else f"ERR {e}"
+                    reply = f"-{message}\r\n".encode()
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def get_stats(self):
+        return {"keys": len(self.data), "commands": self.commands, "connections": self.connections}
+
+
+class Simple(str):
+    """Простая строка ответа (+OK), в отличие от bulk-строки"""
+
+
+async def read_command(reader):
+    """Команда клиента: список аргументов (bytes) или None при закрытии соединения"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline-команда (например, PING из telnet)
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:])
+        data = await reader.readexactly(length + 2)
+        args.append(data[:-2])
+    return args
+
+
+def encode(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, Simple):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if isinstance(value, bytes):
+        return f"${len(value)}\r\n".encode() + value + b"\r\n"
+    return f"*{len(value)}\r\n".encode() + b"".join(encode(item) for item in value)
+
+
+def start_in_thread(host="127.0.0.1", port=0):
+    """Запуск сервера в фоновом потоке. Возвращает (mock, url)"""
+    mock = MockRedis()
+    ready = threading.Event()
+    address = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(asyncio.start_server(mock.handle, host, port))
+        address["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True, name="mock-redis").start()
+    ready.wait()
+    return mock, f"redis://{host}:{address['port']}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена Redis для хранилища сессий")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    mock = MockRedis()
+
+    async def serve():
+        server = await asyncio.start_server(mock.handle, args.host, args.port)
+        print(f"🧪 Заглушка Redis: redis://{args.host}:{args.port}/0")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"\nСтатистика: {mock.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
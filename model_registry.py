@@ -0,0 +1,166 @@
+# services/model_registry.py
+import os
+import threading
+import time
+
+from config import Config
+
+
+def _current_rss():
+    """Резидентная память процесса в байтах (Linux), иначе None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _parameter_bytes(model):
+    """Объем весов модели в байтах"""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+class _ModelEntry:
+    """Загруженная модель и ее учетные данные"""
+
+    def __init__(self):
+        self.model = None
+        self.refs = 0
+        self.lock = threading.Lock()
+        self.load_seconds = None
+        self.param_bytes = None
+        self.rss_delta = None
+        self.loads = 0
+
+
+class ModelRegistry:
+    """Реестр моделей SentenceTransformer, общих для всего процесса.
+
+    Модель загружается один раз при первом обращении; потребители берут ее
+    через acquire() и возвращают через release(). Пока есть ссылки, модель
+    не выгружается. При EMBEDDING_KEEP_LOADED она остается в памяти и без ссылок,
+    чтобы повторное создание ResumeParser (перезапуск скрипта Streamlit) не
+    загружало веса заново.
+    """
+
+    def __init__(self, keep_loaded=None):
+        self.keep_loaded = Config.EMBEDDING_KEEP_LOADED if keep_loaded is None else keep_loaded
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    def _entry(self, name):
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _ModelEntry()
+            return self._entries[name]
+
+    def acquire(self, name=None, loader=None):
+        """Модель по имени (загружается при первом вызове), счетчик ссылок +1.
+
+        loader - функция загрузки для моделей не SentenceTransformer (например, сессии ONNX).
+        """
+        name = name or Config.EMBEDDING_MODEL_NAME
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.model is None:
+                self._load(name, entry, loader)
+            entry.refs += 1
+            return entry.model
+
+    def release(self, name=None):
+        """Возврат ссылки на модель"""
+        name = name or Config.EMBEDDING_MODEL_NAME
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.refs > 0:
+                entry.refs -= 1
+            if entry.refs == 0 and not self.keep_loaded:
+                entry.model = None
+
+    def warm_up(self, names=None, background=False, loader=None):
+        """Предзагрузка моделей при старте, чтобы первый запрос не ждал"""
+        names = names or [Config.EMBEDDING_MODEL_NAME]
+
+        def load_all():
+            for name in names:
+                entry = self._entry(name)
+                with entry.lock:
+                    if entry.model is None:
+                        self._load(name, entry, loader)
+
+        if not background:
+            load_all()
+            return None
+
+        with self._lock:
+            # Повторный вызов (перезапуск скрипта Streamlit) не плодит потоки
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(target=load_all, daemon=True, name="model-warmup")
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _load(self, name, entry, loader=None):
+        rss_before = _current_rss()
+        started = time.perf_counter()
+        print(f"📦 Загрузка модели эмбеддингов {name}...")
+        if loader is not None:
+            model = loader()
+        else:
+            from sentence_transformers import SentenceTransformer
+
+            if Config.EMBEDDING_DEVICE:
+                model = SentenceTransformer(name, device=Config.EMBEDDING_DEVICE)
+            else:
+                model = SentenceTransformer(name)
+
+        entry.model = model
+        entry.loads += 1
+        entry.load_seconds = time.perf_counter() - started
+        entry.param_bytes = _parameter_bytes(model)
+        rss_after = _current_rss()
+        if rss_before is not None and rss_after is not None:
+            entry.rss_delta = rss_after - rss_before
+
+    def is_loaded(self, name=None):
+        entry = self._entries.get(name or Config.EMBEDDING_MODEL_NAME)
+        return entry is not None and entry.model is not None
+
+    def get_stats(self):
+        """Учет памяти и ссылок по моделям"""
+        with self._lock:
+            entries = dict(self._entries)
+
+        models = {}
+        for name, entry in entries.items():
+            models[name] = {
+                "loaded": entry.model is not None,
+                "refs": entry.refs,
+                "loads": entry.loads,
+                "load_seconds": round(entry.load_seconds, 3) if entry.load_seconds is not None else None,
+                "param_bytes": entry.param_bytes,
+                "rss_delta_bytes": entry.rss_delta
+            }
+
+        return {
+            "models": models,
+            "param_bytes_total": sum(m["param_bytes"] or 0 for m in models.values() if m["loaded"]),
+            "process_rss_bytes": _current_rss()
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Общий для процесса реестр моделей"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
\ No newline at end of file
@@ -0,0 +1,217 @@
+# services/question_bank.py
+"""
+Банк вопросов собеседования: поиск следующего вопроса без обращения к GigaChat.
+
+Корпус (question_bank.json) - вопросы с навыками и вакансиями. Эмбеддинги
+вопросов считаются один раз и хранятся в float16 в QUESTION_BANK_INDEX_DIR;
+поиск - одно умножение матрицы на вектор ответа. Уже заданные вопросы
+исключаются маской, поэтому в одном собеседовании вопросы не повторяются.
+
+Оценка вопроса складывается из совпадения его навыков с непроверенными
+требованиями и навыками из последнего ответа и из косинуса между вопросом
+и ответом (поровну). Совпадение навыков дает не больше 0.5, а порог
+QUESTION_BANK_MIN_CONFIDENCE выше: вопрос должен еще и подходить к ответу
+по смыслу. Если лучшая оценка ниже порога или эмбеддинги недоступны,
+вопрос генерирует GigaChat.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+
+import numpy as np
+
+from config import Config
+from .embedding_backends import get_embedding_backend
+from .skill_extractor import get_skill_extractor
+from .skill_normalizer import get_skill_normalizer
+
+# Вес совпадения навыков вопроса: и непроверенный, и упомянут в ответе / только непроверенный / только в ответе
+TAG_BOTH = 1.0
+TAG_UNVERIFIED = 0.75
+TAG_ANSWER = 0.5
+
+
+class QuestionBank:
+    """Корпус вопросов с индексом по навыкам и эмбеддингам"""
+
+    def __init__(self, path=None, index_dir=None, backend=None, normalizer=None):
+        self.path = path or Config.QUESTION_BANK_FILE
+        self.index_dir = index_dir or Config.QUESTION_BANK_INDEX_DIR
+        self.backend = backend
+        self.normalizer = normalizer or get_skill_normalizer()
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            raw = f.read()
+        self.questions = json.loads(raw)["questions"]
+        self.fingerprint = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+        self.texts = [q["text"] for q in self.questions]
+        self.question_skills = [set() for _ in self.questions]
+
+        # Обратные индексы: навык -> номера вопросов, вакансия -> общие вопросы
+        skill_questions = {}
+        general = {}
+        self._adaptive = np.zeros(len(self.questions), dtype=bool)
+        for i, question in enumerate(self.questions):
+            question["index"] = i
+            if question.get("kind") == "general":
+                for vacancy in question.get("vacancies") or [""]:
+                    general.setdefault(vacancy, []).append(i)
+                continue
+            self._adaptive[i] = True
+            for skill in question.get("skills", []):
+                key = self.normalizer.skill_id(skill)
+                self.question_skills[i].add(key)
+                skill_questions.setdefault(key, []).append(i)
+        self._skill_questions = {key: np.array(ids, dtype=np.int64) for key, ids in skill_questions.items()}
+        self._general = general
+
+        self._vectors = None
+        self._semantic = True
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self.retrieved = 0
+        self.low_confidence = 0
+
+    def base_questions(self, vacancy_name):
+        """Общие вопросы вакансии (или вопросы по умолчанию)"""
+        ids = self._general.get(vacancy_name) or self._general.get("", [])
+        return [self.texts[i] for i in ids]
+
+    def base_question(self, vacancy_name, asked=()):
+        """Случайный еще не заданный общий вопрос вакансии: словарь вопроса или None"""
+        for vacancy in (vacancy_name, ""):
+            free = [i for i in self._general.get(vacancy, []) if i not in asked]
+            if free:
+                return self.questions[random.choice(free)]
+        return None
+
+    def skills_of(self, text):
+        """Идентификаторы навыков, которые упоминаются в тексте"""
+        return {self.normalizer.skill_id(skill) for skill in get_skill_extractor().extract(text)}
+
+    def find(self, last_answer, required_skills, asked=(), covered_skills=()):
+        """Самый подходящий незаданный вопрос: (словарь вопроса, уверенность 0..1) или (None, 0.0)"""
+        answer_skills = self.skills_of(last_answer or "")
+        unverified = {self.normalizer.skill_id(skill) for skill in required_skills} - set(covered_skills)
+
+        tags = np.zeros(len(self.questions), dtype=np.float32)
+        for skill in answer_skills:
+            self._raise(tags, skill, TAG_ANSWER)
+        for skill in unverified:
+            self._raise(tags, skill, TAG_UNVERIFIED)
+        for skill in answer_skills & unverified:
+            self._raise(tags, skill, TAG_BOTH)
+
+        # Без эмбеддингов сходство с ответом не подтверждено и считается нулевым
+        semantic = self._similarity(last_answer) if last_answer else None
+        scores = 0.5 * tags
+        if semantic is not None:
+            scores += 0.5 * np.clip(semantic, 0.0, 1.0)
+
+        # Общие и уже заданные вопросы не участвуют
+        scores = np.where(self._adaptive, scores, -1.0)
+        if asked:
+            scores[np.fromiter(asked, dtype=np.int64, count=len(asked))] = -1.0
+
+        best = int(np.argmax(scores))
+        confidence = float(scores[best])
+        if confidence < 0:
+            return None, 0.0
+        if confidence < Config.QUESTION_BANK_MIN_CONFIDENCE:
+            self.low_confidence += 1
+        else:
+            self.retrieved += 1
+        return self.questions[best], confidence
+
+    def _raise(self, tags, skill, weight):
+        ids = self._skill_questions.get(skill)
+        if ids is not None:
+            tags[ids] = np.maximum(tags[ids], weight)
+
+    def _similarity(self, text):
+        """Косинус текста со всеми вопросами или None, если эмбеддинги недоступны"""
+        vectors = self.load_vectors()
+        if vectors is None:
+            return None
+        try:
+            query = np.asarray(self._backend().encode([text]), dtype=np.float32)[0]
+        except Exception as e:
+            print(f"⚠️ Банк вопросов работает без эмбеддингов: {e}")
+            self._semantic = False
+            return None
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        return vectors @ query
+
+    def _backend(self):
+        return self.backend or get_embedding_backend()
+
+    def index_path(self):
+        safe_name = re.sub(r"[^\w.-]+", "_", self._backend().cache_name)
+        return os.path.join(self.index_dir, f"{safe_name}-{self.fingerprint}.npy")
+
+    def load_vectors(self):
+        """Нормированные эмбеддинги вопросов (float16): с диска или расчет и сохранение"""
+        if self._vectors is None and self._semantic:
+            with self._lock:
+                if self._vectors is None and self._semantic:
+                    try:
+                        self._vectors = self._load_or_build()
+                    except Exception as e:
+                        print(f"⚠️ Банк вопросов работает без эмбеддингов: {e}")
+                        self._semantic = False
+        return self._vectors
+
+    def warm_up(self, background=False):
+        """Загрузка или построение индекса заранее, чтобы первый поиск не ждал"""
+        if not background:
+            self.load_vectors()
+            return None
+        with self._lock:
+            # Повторный вызов (перезапуск скрипта Streamlit) не плодит потоки
+            if self._warmup_thread is None:
+                self._warmup_thread = threading.Thread(target=self.load_vectors, daemon=True,
+                                                       name="question-bank-warmup")
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _load_or_build(self):
+        path = self.index_path()
+        if os.path.exists(path):
+            return np.load(path, mmap_mode="r")
+
+        vectors = np.asarray(self._backend().encode(self.texts), dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        vectors = vectors.astype(np.float16)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, vectors)
+        os.replace(tmp_path, path)
+        return vectors
+
+    def get_stats(self):
+        return {
+            "questions": len(self.questions),
+            "semantic": self._semantic and self._vectors is not None,
+            "retrieved": self.retrieved,
+            "low_confidence": self.low_confidence
+        }
+
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Общий для процесса банк вопросов"""
+    global _question_bank
+    if _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = QuestionBank()
+    return _question_bank
\ No newline at end of file
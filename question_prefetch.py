@@ -0,0 +1,260 @@
+# services/question_prefetch.py
+"""
+Спекулятивная подготовка следующего адаптивного вопроса.
+
+Пока кандидат отвечает, в фоне генерируется несколько вариантов следующего
+вопроса по текущей истории диалога. Каждый вариант описывает ответ, после
+которого он уместен. Когда ответ получен, выбирается самый близкий вариант.
+Если сходство не ниже первого порога QUESTION_PREFETCH_THRESHOLDS, вопрос
+задается сразу (попадание), не ниже второго - вариант уточняется под ответ
+коротким запросом, иначе вопрос генерируется заново, как без предвыборки (промах).
+
+Сходство - косинус эмбеддингов ответа и варианта; если модель недоступна
+или QUESTION_PREFETCH_SIMILARITY=lexical - косинус по словам и навыкам
+(у него свои пороги: значения в среднем ниже).
+"""
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import Config
+from .embedding_backends import get_embedding_backend
+from .llm_scheduler import INTERACTIVE, BATCH
+from .skill_extractor import get_skill_extractor
+
+WORD_RE = re.compile(r"\w{3,}")
+
+
+class PrefetchStats:
+    """Метрики предвыборки: доля попаданий и сэкономленное время ожидания"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.refined = 0
+        self.misses = 0
+        self.errors = 0
+        self.latency_saved = 0.0
+        self.waited = 0.0
+
+    def record_start(self):
+        with self._lock:
+            self.started += 1
+
+    def record(self, outcome, saved=0.0, waited=0.0):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.latency_saved += saved
+            self.waited += waited
+
+    def get_stats(self):
+        with self._lock:
+            turns = self.hits + self.refined + self.misses + self.errors
+            return {
+                "started": self.started,
+                "turns": turns,
+                "hits": self.hits,
+                "refined": self.refined,
+                "misses": self.misses,
+                "errors": self.errors,
+                # Предвыборки, не дождавшиеся ответа (конец собеседования, отмена)
+                "unused": self.started - turns,
+                "hit_rate": round(self.hits / turns, 4) if turns else 0.0,
+                "refine_rate": round(self.refined / turns, 4) if turns else 0.0,
+                "latency_saved": round(self.latency_saved, 3),
+                "latency_saved_per_turn": round(self.latency_saved / turns, 3) if turns else 0.0,
+                "avg_wait": round(self.waited / turns, 3) if turns else 0.0
+            }
+
+
+_stats = PrefetchStats()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_prefetch_stats():
+    """Метрики предвыборки по всем собеседованиям процесса"""
+    return _stats
+
+
+def _get_prefetch_pool():
+    """Общий пул потоков для фоновой генерации вариантов"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=Config.QUESTION_PREFETCH_WORKERS,
+                                           thread_name_prefix="question-prefetch")
+    return _pool
+
+
+class QuestionPrefetcher:
+    """Варианты следующего вопроса одного собеседования"""
+
+    def __init__(self, agent, variants=None, accept=None, refine=None, similarity=None):
+        self.agent = agent
+        self.variants = variants or Config.QUESTION_PREFETCH_VARIANTS
+        self.similarity = similarity or Config.QUESTION_PREFETCH_SIMILARITY
+        self._accept_override = accept
+        self._refine_override = refine
+        self.stats = get_prefetch_stats()
+        self.last_wait = None
+        self._future = None
+
+    def start(self):
+        """Фоновая генерация вариантов по текущей истории (вопрос уже задан)"""
+        self.cancel()
+        messages = self._build_prefetch_prompt()
+        self._future = _get_prefetch_pool().submit(self._generate, messages)
+        self.stats.record_start()
+
+    def cancel(self):
+        future, self._future = self._future, None
+        if future is not None:
+            future.cancel()
+
+    def take(self, answer):
+        """Вопрос после ответа кандидата из подготовленных вариантов или None"""
+        future, self._future = self._future, None
+        if future is None:
+            return None
+
+        started = time.perf_counter()
+        try:
+            # Генерация началась раньше, поэтому дождаться ее быстрее, чем начинать заново
+            variants, generation_time = future.result(timeout=Config.QUESTION_PREFETCH_MAX_WAIT)
+        except Exception as e:
+            print(f"Ошибка предвыборки вопроса: {e}")
+            self.stats.record("errors", waited=time.perf_counter() - started)
+            return None
+
+        waited = time.perf_counter() - started
+        if not variants:
+            self.stats.record("misses", saved=-waited, waited=waited)
+            return None
+
+        scores = self._similarities(answer, [f"{v['expects']} {v['question']}" for v in variants])
+        best = int(np.argmax(scores))
+        question = variants[best]["question"]
+
+        accept, refine = self.thresholds()
+        if scores[best] >= accept:
+            self.last_wait = waited
+            # Без предвыборки кандидат ждал бы генерацию целиком
+            self.stats.record("hits", saved=generation_time - waited, waited=waited)
+            return question
+
+        if scores[best] >= refine:
+            refine_started = time.perf_counter()
+            refined = self._refine(question, answer)
+            waited += time.perf_counter() - refine_started
+            self.last_wait = waited
+            self.stats.record("refined", saved=generation_time - waited, waited=waited)
+            return refined
+
+        self.stats.record("misses", saved=-waited, waited=waited)
+        return None
+
+    def thresholds(self):
+        """(задать сразу, уточнить) для текущего способа сравнения"""
+        accept, refine = Config.QUESTION_PREFETCH_THRESHOLDS[self.similarity]
+        if self._accept_override is not None:
+            accept = self._accept_override
+        if self._refine_override is not None:
+            refine = self._refine_override
+        return accept, refine
+
+    def _generate(self, messages):
+        """Запрос вариантов (в пуле потоков). Возвращает (варианты, секунды)"""
+        started = time.perf_counter()
+        # Спекулятивный запрос уступает очередь запросам, которых ждут прямо сейчас
+        response = self.agent.giga_client.get_chat_response(
+            messages, temperature=0.7, priority=BATCH, session_id=self.agent.session_id
+        )
+        return self._parse_variants(response), time.perf_counter() - started
+
+    def _build_prefetch_prompt(self):
+        """Промпт для вариантов следующего вопроса"""
+        prompt = f"""
+        Ты - опытный технический рекрутер. Проводишь собеседование на {self.agent.vacancy_name}.
+
+        ТРЕБУЕМЫЕ НАВЫКИ: {', '.join(self.agent.required_skills)}
+
+        ИСТОРИЯ ДИАЛОГА:
+        {self.agent._history_text()}
+
+        Кандидат еще отвечает на последний вопрос. Подготовь {self.variants} ВАРИАНТОВ СЛЕДУЮЩЕГО ВОПРОСА
+        для разных возможных ответов. Для каждого варианта кратко опиши ответ, после которого он уместен.
+
+        Верни ТОЛЬКО JSON: {{"variants": [{{"expects": "описание ответа", "question": "текст вопроса"}}]}}
+        """
+
+        return [
+            {"role": "system", "content": "Ты экспертный IT-рекрутер с глубоким пониманием технических навыков."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _parse_variants(self, response):
+        if not response:
+            return []
+        try:
+            json_match = re.search(r'\{[\s\S]*\}', response)
+            data = json.loads(json_match.group()) if json_match else {}
+        except ValueError:
+            return []
+
+        variants = []
+        for item in data.get("variants", []):
+            if isinstance(item, dict) and item.get("question"):
+                question = self.agent._clean_response(str(item["question"]))
+                variants.append({"question": question, "expects": str(item.get("expects", ""))})
+        return variants[:self.variants]
+
+    def _refine(self, question, answer):
+        """Короткий запрос: подготовленный вопрос подстраивается под ответ"""
+        prompt = f"""
+        Подготовленный вопрос: {question}
+        Ответ кандидата на предыдущий вопрос: {answer[:1000]}
+
+        Уточни подготовленный вопрос так, чтобы он опирался на ответ кандидата.
+        Верни ТОЛЬКО текст вопроса.
+        """
+        response = self.agent.giga_client.get_chat_response(
+            [{"role": "user", "content": prompt}],
+            temperature=0.3, priority=INTERACTIVE, session_id=self.agent.session_id
+        )
+        return self.agent._clean_response(response) if response else question
+
+    def _similarities(self, answer, texts):
+        """Сходство ответа с каждым вариантом, 0..1"""
+        if self.similarity == "embedding":
+            try:
+                vectors = np.asarray(get_embedding_backend().encode([answer] + texts), dtype=np.float32)
+                vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+                return vectors[1:] @ vectors[0]
+            except Exception as e:
+                print(f"⚠️ Сходство вариантов считается по словам: {e}")
+                self.similarity = "lexical"
+        answer_bag = self._bag(answer)
+        return np.array([self._cosine(answer_bag, self._bag(text)) for text in texts], dtype=np.float32)
+
+    @staticmethod
+    def _bag(text):
+        """Слова текста; навыки из таксономии весят больше обычных слов"""
+        bag = Counter(WORD_RE.findall(text.lower()))
+        for skill in get_skill_extractor().extract(text):
+            bag["skill:" + skill] += 3
+        return bag
+
+    @staticmethod
+    def _cosine(a, b):
+        dot = sum(count * b[word] for word, count in a.items() if word in b)
+        norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+        return dot / norm if norm else 0.0
\ No newline at end of file
@@ -0,0 +1,323 @@
+# services/resilience.py
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import Config
+from .llm_scheduler import QueueTimeoutError
+
+
+class GigaChatAPIError(Exception):
+    """Неуспешный HTTP-ответ GigaChat"""
+
+    def __init__(self, status, message=None, retry_after=None):
+        super().__init__(message or f"Ошибка API: {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен: API недоступен и автомат разомкнут"""
+
+
+def parse_retry_after(value):
+    """Значение заголовка Retry-After в секундах"""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Экспоненциальная задержка с полным джиттером для 429/5xx и сетевых ошибок"""
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None):
+        self.max_retries = Config.GIGACHAT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay or Config.GIGACHAT_RETRY_BASE_DELAY
+        self.max_delay = max_delay or Config.GIGACHAT_RETRY_MAX_DELAY
+
+    def is_retryable(self, error):
+        if isinstance(error, (CircuitOpenError, QueueTimeoutError)):
+            return False
+        if isinstance(error, GigaChatAPIError):
+            return error.status == 429 or error.status >= 500
+        # Обрыв соединения, таймаут и прочие сетевые ошибки
+        return True
+
+    def get_delay(self, attempt, error=None):
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Автомат отключения: после серии сбоев запросы сразу отклоняются.
+
+    Через reset_timeout пропускается один пробный запрос (half-open):
+    успех замыкает автомат, сбой снова размыкает его.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or Config.GIGACHAT_BREAKER_THRESHOLD
+        self.reset_timeout = reset_timeout or Config.GIGACHAT_BREAKER_RESET
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.short_circuits = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self.short_circuits += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened_count += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        """Пробный запрос завершился, ничего не сказав о доступности API: пропускаем следующий"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Скользящее окно задержек успешных запросов"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class ResilienceLayer:
+    """Повторы, автомат отключения и дублирующие (hedged) запросы к GigaChat"""
+
+    def __init__(self):
+        self.retry_policy = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker(Config.GIGACHAT_HEDGE_WINDOW)
+        self.hedge_enabled = Config.GIGACHAT_HEDGE_ENABLED
+        self._hedge_pool = None
+        self._lock = threading.Lock()
+        self.metrics = {"calls": 0, "retries": 0, "failures": 0, "hedges": 0, "hedge_wins": 0}
+
+    def execute(self, attempt_fn, hedge=False):
+        """Синхронный вызов attempt_fn с повторами. Бросает последнюю ошибку"""
+        self._count("calls")
+        for attempt in range(self.retry_policy.max_retries + 1):
+            probe = self._check_breaker()
+            started = time.perf_counter()
+            try:
+                delay = self._hedge_delay() if hedge else None
+                result = self._run_hedged(attempt_fn, delay) if delay else attempt_fn()
+            except Exception as e:
+                if not self._handle_error(e, attempt, probe):
+                    raise
+                time.sleep(self.retry_policy.get_delay(attempt, e))
+                continue
+            except BaseException:
+                # Прерванный пробный запрос (KeyboardInterrupt, SystemExit) освобождает автомат
+                self._release_probe(probe)
+                raise
+
+            self._handle_success(time.perf_counter() - started)
+            return result
+
+    async def execute_async(self, attempt_fn, hedge=False):
+        """Асинхронный вариант execute; attempt_fn возвращает корутину"""
+        self._count("calls")
+        for attempt in range(self.retry_policy.max_retries + 1):
+            probe = self._check_breaker()
+            started = time.perf_counter()
+            try:
+                delay = self._hedge_delay() if hedge else None
+                result = await (self._run_hedged_async(attempt_fn, delay) if delay else attempt_fn())
+            except Exception as e:
+                if not self._handle_error(e, attempt, probe):
+                    raise
+                await asyncio.sleep(self.retry_policy.get_delay(attempt, e))
+                continue
+            except BaseException:
+                # Отмена (asyncio.wait_for, таймаут ответа сервера) тоже освобождает пробный запрос
+                self._release_probe(probe)
+                raise
+
+            self._handle_success(time.perf_counter() - started)
+            return result
+
+    def _check_breaker(self):
+        """Разрешение автомата на попытку. True - попытка пробная (half-open)"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("GigaChat временно недоступен (circuit breaker разомкнут)")
+        return self.breaker.state == CircuitBreaker.HALF_OPEN
+
+    def _release_probe(self, probe):
+        if probe:
+            self.breaker.release_probe()
+
+    def _handle_error(self, error, attempt, probe=False):
+        """Учет ошибки. True - запрос стоит повторить"""
+        retryable = self.retry_policy.is_retryable(error)
+        if retryable:
+            self.breaker.record_failure()
+        elif isinstance(error, GigaChatAPIError):
+            # Ошибка клиента (4xx) - сервис при этом доступен
+            self.breaker.record_success()
+        else:
+            # Запрос не дошел до API (QueueTimeoutError): о доступности сервиса ничего не известно
+            self._release_probe(probe)
+
+        if not retryable or attempt >= self.retry_policy.max_retries:
+            self._count("failures")
+            return False
+
+        self._count("retries")
+        return True
+
+    def _handle_success(self, elapsed):
+        self.breaker.record_success()
+        self.latency.add(elapsed)
+
+    def _hedge_delay(self):
+        """Задержка перед дублирующим запросом: p95 наблюдаемых задержек"""
+        if not self.hedge_enabled or len(self.latency) < Config.GIGACHAT_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(95)
+
+    def _run_hedged(self, attempt_fn, delay):
+        """Если ответа нет дольше delay, отправляем дубликат и берем первый успешный"""
+        pool = self._get_hedge_pool()
+        primary = pool.submit(attempt_fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count("hedges")
+        hedged = pool.submit(attempt_fn)
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _run_hedged_async(self, attempt_fn, delay):
+        primary = asyncio.ensure_future(attempt_fn())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._count("hedges")
+            hedged = asyncio.ensure_future(attempt_fn())
+            tasks.append(hedged)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedged:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Проигравший запрос отменяем, чтобы он не занимал слот семафора
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _get_hedge_pool(self):
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=Config.GIGACHAT_HEDGE_WORKERS,
+                    thread_name_prefix="gigachat-hedge"
+                )
+            return self._hedge_pool
+
+    def _count(self, name):
+        with self._lock:
+            self.metrics[name] += 1
+
+    def get_stats(self):
+        """Метрики: повторы, состояние автомата, дубли и их победы"""
+        with self._lock:
+            stats = dict(self.metrics)
+        p95 = self.latency.percentile(95)
+        stats.update({
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.opened_count,
+            "short_circuits": self.breaker.short_circuits,
+            "latency_p95": round(p95, 3) if p95 is not None else None
+        })
+        return stats
+
+
+_resilience = None
+_resilience_lock = threading.Lock()
+
+
+def get_resilience():
+    """Общий для процесса слой устойчивости (один автомат на API)"""
+    global _resilience
+    if _resilience is None:
+        with _resilience_lock:
+            if _resilience is None:
+                _resilience = ResilienceLayer()
+    return _resilience
\ No newline at end of file
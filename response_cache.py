@@ -0,0 +1,58 @@
+# services/response_cache.py
+import hashlib
+import json
+import threading
+
+from config import Config
+from .cache import TieredCache
+
+
+class ResponseCache:
+    """Кэш ответов GigaChat с адресацией по содержимому запроса.
+
+    Ключ - SHA-256 от модели, сообщений, temperature и max_tokens,
+    поэтому одинаковые промпты (повторная загрузка того же резюме,
+    перезапуск скрипта Streamlit) не требуют нового запроса к API.
+    """
+
+    def __init__(self, max_items=None, path=None, ttl=None, max_bytes=None):
+        self.store = TieredCache(
+            max_items=max_items or Config.LLM_CACHE_MEMORY_ITEMS,
+            path=path or Config.LLM_CACHE_FILE,
+            table="llm_responses",
+            ttl=ttl or Config.LLM_CACHE_TTL,
+            max_bytes=max_bytes or Config.LLM_CACHE_MAX_BYTES
+        )
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens):
+        """Хэш параметров запроса"""
+        raw = json.dumps(
+            [model, messages, temperature, max_tokens],
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, response):
+        self.store.set(key, response)
+
+    def get_stats(self):
+        return self.store.get_stats()
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Общий для процесса кэш ответов"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
\ No newline at end of file
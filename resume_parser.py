@@ -1,49 +1,88 @@
 # services/resume_parser.py
-import pdfplumber
-import docx
-from sentence_transformers import SentenceTransformer, util
-import torch
+import asyncio
+import threading
 from .gigachat_client import GigaChatClient
+from .async_gigachat_client import AsyncGigaChatClient
+from .model_registry import get_model_registry
+from .embedding_cache import get_embedding_cache
+from .embedding_backends import get_embedding_backend
+from .skill_normalizer import get_skill_normalizer
+from . import text_extraction
 from config import Config
 
 
 class ResumeParser:
     def __init__(self):
         self.giga_client = GigaChatClient()
-        self.skill_model = SentenceTransformer('all-MiniLM-L6-v2')
         self.config = Config()
+        self.async_client = None
+        self._skill_model = None
+        self._model_lock = threading.Lock()
 
-    def extract_text(self, file_path):
-        """Извлечение текста из PDF или DOCX"""
-        text = ""
+    @property
+    def skill_model(self):
+        """Общая для процесса модель эмбеддингов, берется из реестра при первом обращении"""
+        if self._skill_model is None:
+            with self._model_lock:
+                if self._skill_model is None:
+                    self._skill_model = get_model_registry().acquire(self.config.EMBEDDING_MODEL_NAME)
+        return self._skill_model
+
+    def close(self):
+        """Освобождение ссылки на модель"""
+        if self._skill_model is not None:
+            self._skill_model = None
+            get_model_registry().release(self.config.EMBEDDING_MODEL_NAME)
+
+    def __del__(self):
         try:
-            if file_path.endswith('.pdf'):
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        if page.extract_text():
-                            text += page.extract_text() + "\n"
-            elif file_path.endswith('.docx'):
-                doc = docx.Document(file_path)
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            elif file_path.endswith('.txt'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-        except Exception as e:
-            print(f"Ошибка чтения файла: {e}")
-        return text
+            self.close()
+        except Exception:
+            pass
 
-    def parse_resume(self, resume_text, vacancy_requirements):
+    def extract_text(self, file_path, max_chars=None, pages=None):
+        """Извлечение текста из PDF, DOCX или TXT.
+
+        Документ читается постранично и только до лимита символов
+        (по умолчанию RESUME_TEXT_MAX_CHARS); длинные PDF разбираются в пуле процессов.
+        """
+        if max_chars is None:
+            max_chars = self.config.RESUME_TEXT_MAX_CHARS
+        return text_extraction.extract_text(file_path, max_chars=max_chars, pages=pages)
+
+    def parse_resume(self, resume_text, vacancy_requirements, use_cache=None):
         """Анализ резюме и расчет соответствия вакансии"""
         # Извлечение навыков
-        skills = self.giga_client.extract_skills_from_text(resume_text)
+        skills, fallback = self.giga_client.extract_skills(resume_text, use_cache=use_cache)
+        skills = get_skill_normalizer().normalize(skills)
 
         # Расчет соответствия
         match_score = self._calculate_match_score(skills, vacancy_requirements)
 
+        return self._build_analysis(skills, match_score, fallback)
+
+    async def parse_resume_async(self, resume_text, vacancy_requirements, use_cache=None):
+        """Асинхронный анализ резюме для параллельной обработки кандидатов"""
+        if self.async_client is None:
+            self.async_client = AsyncGigaChatClient(self.giga_client)
+
+        skills, fallback = await self.async_client.extract_skills(resume_text, use_cache=use_cache)
+        # Для новых записей навыков нормализатор может обратиться к модели эмбеддингов
+        skills = await asyncio.to_thread(get_skill_normalizer().normalize, skills)
+
+        # Эмбеддинги считаются на CPU - не блокируем event loop
+        match_score = await asyncio.to_thread(self._calculate_match_score, skills, vacancy_requirements)
+
+        return self._build_analysis(skills, match_score, fallback)
+
+    def _build_analysis(self, skills, match_score, fallback=False):
+        """Формирование результата анализа резюме.
+        skills_fallback - GigaChat не ответил, навыки найдены резервным методом"""
         return {
             "skills": skills,
             "match_score": match_score,
-            "recommendation": "Пригласить на собеседование" if match_score > 50 else "Рассмотреть дополнительно"
+            "recommendation": "Пригласить на собеседование" if match_score > 50 else "Рассмотреть дополнительно",
+            "skills_fallback": fallback
         }
 
     def _calculate_match_score(self, candidate_skills, required_skills):
@@ -52,15 +91,22 @@ class ResumeParser:
             return 0.0
 
         try:
-            # Преобразование навыков в эмбеддинги
-            candidate_embeddings = self.skill_model.encode(candidate_skills, convert_to_tensor=True)
-            required_embeddings = self.skill_model.encode(required_skills, convert_to_tensor=True)
+            # Синонимы одного навыка дают один эмбеддинг
+            normalizer = get_skill_normalizer()
+            candidate_skills = normalizer.normalize(candidate_skills)
+            required_skills = normalizer.normalize(required_skills)
+
+            # Эмбеддинги из кэша; модель вызывается только для новых навыков
+            backend = get_embedding_backend()
+            cache = get_embedding_cache(backend.cache_name)
+            candidate_embeddings = cache.get_many(candidate_skills, backend.encode)
+            required_embeddings = cache.get_many(required_skills, backend.encode)
 
-            # Расчет косинусного сходства
-            cos_scores = util.pytorch_cos_sim(required_embeddings, candidate_embeddings)
-            max_scores = cos_scores.max(dim=1)[0]
+            # Векторы нормированы - косинусное сходство равно скалярному произведению
+            cos_scores = required_embeddings @ candidate_embeddings.T
+            max_scores = cos_scores.max(axis=1)
 
-            score = max_scores.mean().item() * 100
+            score = float(max_scores.mean()) * 100
             return round(score, 2)
 
         except Exception as e:
@@ -0,0 +1,408 @@
+# services/session_store.py
+"""
+Хранилище состояний собеседований.
+
+Состояние собеседования (InterviewState) - только данные: история диалога,
+счетчики, заданные вопросы, память для промптов. Клиенты GigaChat и модели
+в него не входят, поэтому любой процесс или узел восстанавливает агента
+по session_id (InterviewAgent.from_state) и продолжает собеседование.
+
+Сериализация - msgpack, если установлен, иначе компактный JSON; длинные
+состояния сжимаются zlib. Первый байт записи - формат, поэтому узлы
+с msgpack и без него читают записи друг друга (msgpack нужен для чтения
+записей в msgpack).
+
+Хранилища (Config.SESSION_STORE):
+    memory - словарь в памяти процесса (один узел, без перезапусков);
+    sqlite - файл SQLite (несколько процессов одного узла, переживает перезапуск);
+    redis  - Redis или совместимый сервер по протоколу RESP (несколько узлов),
+             для локальной разработки - mock_redis.py.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+from config import Config
+
+# msgpack нужен только для компактной бинарной сериализации
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+STATE_VERSION = 1
+
+# Флаги первого байта записи
+FORMAT_MSGPACK = 1
+FORMAT_ZLIB = 2
+
+ROLE_CODES = {"assistant": 0, "user": 1}
+ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class SessionStoreError(Exception):
+    """Ошибка хранилища или формата записи"""
+
+
+class InterviewState:
+    """Сериализуемое состояние одного собеседования"""
+
+    __slots__ = (
+        "session_id", "vacancy_name", "required_skills", "conversation_history",
+        "question_count", "max_questions", "asked_questions", "covered_skills",
+        "memory", "extra", "updated_at"
+    )
+
+    def __init__(self, session_id, vacancy_name, required_skills, conversation_history=None,
+                 question_count=0, max_questions=15, asked_questions=None, covered_skills=None,
+                 memory=None, extra=None, updated_at=None):
+        self.session_id = session_id
+        self.vacancy_name = vacancy_name
+        self.required_skills = list(required_skills)
+        self.conversation_history = conversation_history or []
+        self.question_count = question_count
+        self.max_questions = max_questions
+        self.asked_questions = set(asked_questions or ())
+        self.covered_skills = set(covered_skills or ())
+        # Состояние ConversationMemory и данные приложения (например, анализ резюме)
+        self.memory = memory
+        self.extra = extra or {}
+        self.updated_at = updated_at or time.time()
+
+    def to_list(self):
+        """Компактное представление: позиции вместо имен полей, роли - числами"""
+        return [
+            STATE_VERSION,
+            self.session_id,
+            self.vacancy_name,
+            self.required_skills,
+            [[ROLE_CODES.get(msg["role"], msg["role"]), msg["content"]] for msg in self.conversation_history],
+            self.question_count,
+            self.max_questions,
+            sorted(self.asked_questions),
+            sorted(self.covered_skills),
+            self.memory,
+            self.extra,
+            self.updated_at
+        ]
+
+    @classmethod
+    def from_list(cls, data):
+        if not data or data[0] != STATE_VERSION:
+            raise SessionStoreError(f"Неподдерживаемая версия состояния: {data[0] if data else None}")
+        (_, session_id, vacancy_name, required_skills, history, question_count, max_questions,
+         asked_questions, covered_skills, memory, extra, updated_at) = data
+        return cls(
+            session_id, vacancy_name, required_skills,
+            conversation_history=[{"role": ROLES.get(role, role), "content": content} for role, content in history],
+            question_count=question_count,
+            max_questions=max_questions,
+            asked_questions=asked_questions,
+            covered_skills=covered_skills,
+            memory=memory,
+            extra=extra,
+            updated_at=updated_at
+        )
+
+    def dumps(self, use_msgpack=None):
+        """Запись для хранилища: байт формата и данные"""
+        if use_msgpack is None:
+            use_msgpack = MSGPACK_AVAILABLE and Config.SESSION_MSGPACK
+        flags = 0
+        if use_msgpack:
+            payload = msgpack.packb(self.to_list(), use_bin_type=True)
+            flags |= FORMAT_MSGPACK
+        else:
+            payload = json.dumps(self.to_list(), ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+        if len(payload) >= Config.SESSION_COMPRESS_MIN_BYTES:
+            payload = zlib.compress(payload, 1)
+            flags |= FORMAT_ZLIB
+        return bytes([flags]) + payload
+
+    @classmethod
+    def loads(cls, data):
+        flags, payload = data[0], data[1:]
+        if flags & FORMAT_ZLIB:
+            payload = zlib.decompress(payload)
+        if flags & FORMAT_MSGPACK:
+            if not MSGPACK_AVAILABLE:
+                raise SessionStoreError("Состояние записано в msgpack: установите msgpack")
+            return cls.from_list(msgpack.unpackb(payload, raw=False))
+        return cls.from_list(json.loads(payload))
+
+
+class SessionStore:
+    """Общая часть хранилищ: сериализация, TTL и метрики"""
+
+    name = None
+
+    def __init__(self, ttl=None):
+        self.ttl = Config.SESSION_TTL if ttl is None else ttl
+        self.saves = 0
+        self.loads = 0
+        self.misses = 0
+        self.bytes_written = 0
+
+    def save(self, state):
+        state.updated_at = time.time()
+        data = state.dumps()
+        self._write(state.session_id, data)
+        self.saves += 1
+        self.bytes_written += len(data)
+        return len(data)
+
+    def load(self, session_id):
+        """Состояние собеседования или None, если его нет или оно устарело"""
+        data = self._read(session_id)
+        if data is None:
+            self.misses += 1
+            return None
+        self.loads += 1
+        return InterviewState.loads(data)
+
+    def delete(self, session_id):
+        self._remove(session_id)
+
+    def _expired(self, updated_at):
+        return bool(self.ttl) and updated_at + self.ttl < time.time()
+
+    def get_stats(self):
+        return {
+            "store": self.name,
+            "sessions": len(self),
+            "saves": self.saves,
+            "loads": self.loads,
+            "misses": self.misses,
+            "avg_bytes": round(self.bytes_written / self.saves) if self.saves else 0
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """Записи в словаре процесса"""
+
+    name = "memory"
+
+    def __init__(self, ttl=None):
+        super().__init__(ttl)
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def _write(self, session_id, data):
+        with self._lock:
+            self._items[session_id] = (data, time.time())
+
+    def _read(self, session_id):
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is not None and self._expired(entry[1]):
+                del self._items[session_id]
+                entry = None
+        return entry[0] if entry is not None else None
+
+    def _remove(self, session_id):
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Записи в SQLite: общий файл для процессов одного узла"""
+
+    name = "sqlite"
+
+    def __init__(self, path=None, ttl=None):
+        super().__init__(ttl)
+        self.path = path or Config.SESSION_STORE_FILE
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data BLOB, updated REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated)")
+        self._conn.commit()
+
+    def _write(self, session_id, data):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated) VALUES (?, ?, ?)",
+                (session_id, sqlite3.Binary(data), now)
+            )
+            # Устаревшие сессии удаляются не чаще раза в минуту
+            if self.ttl and now - self._last_purge > 60:
+                self._conn.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
+                self._last_purge = now
+            self._conn.commit()
+
+    def _read(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or self._expired(row[1]):
+            return None
+        return bytes(row[0])
+
+    def _remove(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RespClient:
+    """Минимальный клиент протокола Redis (RESP2): одно соединение, команды по очереди"""
+
+    def __init__(self, url=None, timeout=5.0):
+        parsed = urlparse(url or Config.SESSION_REDIS_URL)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip("/") or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._reader.close()
+                self._sock.close()
+                self._sock = None
+
+    def execute(self, *args):
+        """Команда и ответ сервера; при обрыве соединения - одна повторная попытка"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call(*args)
+                except (OSError, EOFError):
+                    if self._sock is not None:
+                        self._sock.close()
+                        self._sock = None
+                    if attempt:
+                        raise
+
+    def _call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(f"${len(arg)}\r\n".encode() + arg + b"\r\n")
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise EOFError("Соединение с Redis закрыто")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise SessionStoreError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise SessionStoreError(f"Неизвестный ответ Redis: {line!r}")
+
+
+class RedisSessionStore(SessionStore):
+    """Записи в Redis (или совместимом сервере): сессии доступны всем узлам"""
+
+    name = "redis"
+    PREFIX = "hr:session:"
+
+    def __init__(self, url=None, ttl=None):
+        super().__init__(ttl)
+        self.client = RespClient(url)
+
+    def _write(self, session_id, data):
+        if self.ttl:
+            self.client.execute("SET", self.PREFIX + session_id, data, "EX", int(self.ttl))
+        else:
+            self.client.execute("SET", self.PREFIX + session_id, data)
+
+    def _read(self, session_id):
+        return self.client.execute("GET", self.PREFIX + session_id)
+
+    def _remove(self, session_id):
+        self.client.execute("DEL", self.PREFIX + session_id)
+
+    def __len__(self):
+        # База Redis может быть общей: считаются только ключи сессий, а не DBSIZE
+        count = 0
+        cursor = b"0"
+        while True:
+            cursor, keys = self.client.execute("SCAN", cursor, "MATCH", self.PREFIX + "*", "COUNT", 1000)
+            count += len(keys)
+            if cursor == b"0":
+                return count
+
+    def close(self):
+        self.client.close()
+
+
+STORES = {"memory": MemorySessionStore, "sqlite": SQLiteSessionStore, "redis": RedisSessionStore}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def create_session_store(name=None, **options):
+    """Хранилище по имени из STORES"""
+    name = name or Config.SESSION_STORE
+    if name not in STORES:
+        raise ValueError(f"Неизвестное хранилище сессий: {name}")
+    return STORES[name](**options)
+
+
+def get_session_store():
+    """Общее для процесса хранилище, выбранное в Config.SESSION_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_session_store()
+    return _store
\ No newline at end of file
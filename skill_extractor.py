@@ -0,0 +1,151 @@
+# services/skill_extractor.py
+"""
+Локальное извлечение навыков по словарю (таксономии) без обращения к GigaChat.
+
+Все названия навыков и их синонимы собираются в автомат Ахо-Корасик,
+текст резюме просматривается за один проход независимо от размера словаря.
+Совпадение засчитывается только на границах слов: "Java" не находится
+в "JavaScript", "SQL" - в "PostgreSQL".
+
+Таксономия - JSON {"version": 1, "skills": {"Навык": ["синоним", ...]}}.
+"""
+import json
+import threading
+
+from config import Config
+
+# Пробельные символы, которые в тексте считаются обычным пробелом
+WHITESPACE = "\t\n\r\x0b\x0c\xa0"
+
+
+def load_taxonomy(path=None):
+    """Словарь {навык: [синонимы]} из JSON-файла таксономии"""
+    with open(path or Config.SKILL_TAXONOMY_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("skills", data)
+
+
+class SkillExtractor:
+    """Поиск навыков из таксономии в тексте за один линейный проход"""
+
+    def __init__(self, taxonomy=None, path=None):
+        self.taxonomy = taxonomy if taxonomy is not None else load_taxonomy(path)
+        self.skills = list(self.taxonomy)
+        self._build()
+
+    def _build(self):
+        # Бор: переходы по символам, для каждого узла - совпавшие шаблоны (длина, навык)
+        goto = [{}]
+        outputs = [[]]
+        self._canonical = {}
+        self.pattern_count = 0
+        for index, skill in enumerate(self.skills):
+            patterns = {skill.lower()} | {alias.lower() for alias in self.taxonomy[skill]}
+            for pattern in patterns:
+                pattern = " ".join(pattern.split())
+                if not pattern:
+                    continue
+                self._canonical.setdefault(pattern, skill)
+                state = 0
+                for ch in pattern:
+                    next_state = goto[state].get(ch)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][ch] = next_state
+                        goto.append({})
+                        outputs.append([])
+                    state = next_state
+                outputs[state].append((len(pattern), index))
+                self.pattern_count += 1
+
+        # Суффиксные ссылки в порядке обхода в ширину и полная таблица переходов:
+        # при поиске на каждый символ текста приходится один поиск в словаре
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = list(goto[0].values())
+        for state in queue:
+            outputs[state].extend(outputs[fail[state]])
+            # Переходы, ведущие в корень, не храним: .get(ch, 0)
+            transitions = dict(delta[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                transitions[ch] = child
+                queue.append(child)
+            delta[state] = transitions
+
+        # Переводы строк, табуляции и неразрывные пробелы ведут себя как пробел
+        for transitions in delta:
+            target = transitions.get(" ")
+            if target is not None:
+                for ch in WHITESPACE:
+                    transitions[ch] = target
+
+        self._delta = delta
+        self._outputs = outputs
+
+    @staticmethod
+    def _is_word_char(ch):
+        return ch.isalnum() or ch == "_"
+
+    def find(self, text):
+        """Найденные навыки с позициями: [(навык, начало, конец)] в порядке появления"""
+        lowered = text.lower()
+        delta = self._delta
+        outputs = self._outputs
+        is_word = self._is_word_char
+        last = len(lowered) - 1
+        found = []
+        state = 0
+        for position, ch in enumerate(lowered):
+            state = delta[state].get(ch, 0)
+            if state and outputs[state]:
+                for length, index in outputs[state]:
+                    start = position - length + 1
+                    if start > 0 and is_word(lowered[start - 1]):
+                        continue
+                    if position < last and is_word(lowered[position + 1]):
+                        continue
+                    found.append((self.skills[index], start, position + 1))
+        return found
+
+    def extract(self, text):
+        """Уникальные навыки в порядке первого упоминания"""
+        if not text:
+            return []
+        skills = []
+        seen = set()
+        for skill, _, _ in self.find(text):
+            if skill not in seen:
+                seen.add(skill)
+                skills.append(skill)
+        return skills
+
+    def lookup(self, skill):
+        """Название навыка из таксономии для названия или синонима, None - если такого нет"""
+        return self._canonical.get(" ".join(str(skill).lower().split()))
+
+    def canonical(self, skill):
+        """Название навыка из таксономии для синонима; неизвестный навык возвращается как есть"""
+        return self.lookup(skill) or skill
+
+    def get_stats(self):
+        return {
+            "skills": len(self.skills),
+            "patterns": self.pattern_count,
+            "states": len(self._delta)
+        }
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_skill_extractor():
+    """Общий для процесса экстрактор по таксономии из Config.SKILL_TAXONOMY_FILE"""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = SkillExtractor()
+    return _extractor
\ No newline at end of file
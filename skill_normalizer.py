@@ -0,0 +1,234 @@
+# services/skill_normalizer.py
+"""
+Нормализация навыков: разные записи одного навыка ("postgres", "PostgreSQL 14",
+"Постгрес") приводятся к навыку таксономии и его идентификатору.
+
+Порядок поиска:
+1. название или синоним из таксономии;
+2. то же без версий и уточнений в скобках ("Python 3.11", "Vue.js (Composition API)");
+3. единственный навык таксономии, найденный в строке ("опыт работы с Kafka");
+4. ближайший по эмбеддингу навык таксономии, если косинус не ниже
+   SKILL_NORMALIZER_THRESHOLD. Результат сохраняется в SQLite, поэтому
+   модель вызывается один раз на каждую новую запись навыка.
+
+Ненайденный навык остается как есть, его идентификатор - нормализованная запись.
+"""
+import hashlib
+import json
+import re
+import threading
+
+from config import Config
+from .cache import LRUCache, TieredCache
+from .embedding_cache import get_embedding_cache, normalize_skill
+from .embedding_backends import get_embedding_backend
+from .skill_extractor import get_skill_extractor
+
+BRACKETS_RE = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+VERSION_RE = re.compile(r"(?:^|\s)v?\d+(?:\.\d+)*[+x]?(?=\s|$)", re.IGNORECASE)
+
+# Порядок статусов при слиянии оценок одного навыка
+ASSESSMENT_RANK = {"confirmed": 3, "partial": 2, "missing": 1}
+
+
+def skill_id(name):
+    """Идентификатор навыка - нормализованное название"""
+    return normalize_skill(name)
+
+
+class SkillNormalizer:
+    """Индекс "запись навыка -> (идентификатор, название в таксономии)" """
+
+    def __init__(self, extractor=None, backend=None, threshold=None, use_embeddings=None, cache_path=None):
+        self.extractor = extractor or get_skill_extractor()
+        self.backend = backend
+        self.threshold = Config.SKILL_NORMALIZER_THRESHOLD if threshold is None else threshold
+        self.use_embeddings = Config.SKILL_NORMALIZER_EMBEDDINGS if use_embeddings is None else use_embeddings
+        self._resolved = LRUCache(Config.SKILL_NORMALIZER_MEMORY_ITEMS)
+        self._nearest = TieredCache(
+            max_items=Config.SKILL_NORMALIZER_MEMORY_ITEMS,
+            path=cache_path or Config.SKILL_NORMALIZER_CACHE_FILE,
+            table="skill_normalization"
+        )
+        self._patterns = None
+        self._pattern_skills = None
+        self._lock = threading.Lock()
+        self._embeddings_failed = False
+        self._fingerprint_value = None
+        self.methods = {"taxonomy": 0, "cleaned": 0, "extractor": 0, "embedding": 0, "unknown": 0}
+
+    def resolve(self, skill):
+        """(идентификатор, название) для любой записи навыка"""
+        resolved = self._resolved.get(skill)
+        if resolved is not None:
+            return resolved
+        return self.resolve_many([skill])[0]
+
+    def resolve_many(self, skills):
+        """resolve для списка; записи, не найденные в таксономии, кодируются одним пакетом"""
+        results = [self._resolved.get(skill) for skill in skills]
+        pending = {}
+        for position, (skill, resolved) in enumerate(zip(skills, results)):
+            if resolved is not None:
+                continue
+            resolved = self._resolve_local(str(skill).strip())
+            if resolved is None:
+                pending.setdefault(skill, []).append(position)
+            else:
+                self._resolved.set(skill, resolved)
+                results[position] = resolved
+
+        if pending:
+            nearest = self._nearest_skills([str(skill).strip() for skill in pending])
+            for (skill, positions), resolved in zip(pending.items(), nearest):
+                self._resolved.set(skill, resolved)
+                for position in positions:
+                    results[position] = resolved
+        return results
+
+    def canonical(self, skill):
+        return self.resolve(skill)[1]
+
+    def skill_id(self, skill):
+        return self.resolve(skill)[0]
+
+    def normalize(self, skills):
+        """Названия навыков из таксономии без повторов, в исходном порядке"""
+        names = []
+        seen = set()
+        for key, name in self.resolve_many(list(skills)):
+            if key and key not in seen:
+                seen.add(key)
+                names.append(name)
+        return names
+
+    def normalize_assessment(self, assessment):
+        """Оценки навыков по названиям таксономии; из повторов остается лучшая"""
+        merged = {}
+        for (_, name), status in zip(self.resolve_many(list(assessment)), assessment.values()):
+            current = merged.get(name)
+            if current is None or ASSESSMENT_RANK.get(status, 0) > ASSESSMENT_RANK.get(current, 0):
+                merged[name] = status
+        return merged
+
+    @staticmethod
+    def _cleaned(surface):
+        """Запись без версий и уточнений в скобках"""
+        return normalize_skill(VERSION_RE.sub(" ", BRACKETS_RE.sub(" ", normalize_skill(surface))))
+
+    def _resolve_local(self, surface):
+        """Поиск по таксономии без модели; None - нужен поиск по эмбеддингу"""
+        key = normalize_skill(surface)
+        if not key:
+            return "", surface
+
+        name = self.extractor.lookup(key)
+        if name is not None:
+            return self._found("taxonomy", name)
+
+        cleaned = self._cleaned(surface)
+        if cleaned and cleaned != key:
+            name = self.extractor.lookup(cleaned)
+            if name is not None:
+                return self._found("cleaned", name)
+
+        found = self.extractor.extract(surface)
+        if len(found) == 1:
+            return self._found("extractor", found[0])
+        return None
+
+    def _found(self, method, name):
+        self.methods[method] += 1
+        return skill_id(name), name
+
+    def _unknown(self, surface):
+        self.methods["unknown"] += 1
+        return self._cleaned(surface) or normalize_skill(surface), surface
+
+    def _nearest_skills(self, surfaces):
+        """Ближайшие навыки таксономии по эмбеддингу; не найденные остаются как есть"""
+        if not self.use_embeddings or self._embeddings_failed:
+            return [self._unknown(surface) for surface in surfaces]
+
+        names = {}
+        missing = []
+        for surface in surfaces:
+            cached = self._nearest.get(self._nearest_key(surface))
+            if cached is None:
+                missing.append(surface)
+            else:
+                names[surface] = cached[0]
+
+        if missing:
+            try:
+                backend = self.backend or get_embedding_backend()
+                patterns = self._pattern_embeddings(backend)
+                queries = get_embedding_cache(backend.cache_name).get_many(missing, backend.encode)
+            except Exception as e:
+                print(f"⚠️ Поиск навыков по эмбеддингам отключен: {e}")
+                self._embeddings_failed = True
+                queries = None
+
+            if queries is not None:
+                similarity = queries @ patterns.T
+                best = similarity.argmax(axis=1)
+                for surface, row, column in zip(missing, similarity, best):
+                    score = float(row[column])
+                    name = self._pattern_skills[column] if score >= self.threshold else None
+                    names[surface] = name
+                    # Промахи тоже запоминаем - иначе модель вызывалась бы для них снова
+                    self._nearest.set(self._nearest_key(surface), [name, round(score, 4)])
+
+        results = []
+        for surface in surfaces:
+            name = names.get(surface)
+            results.append(self._found("embedding", name) if name else self._unknown(surface))
+        return results
+
+    def _nearest_key(self, surface):
+        return f"{self._fingerprint()}:{self._cleaned(surface) or normalize_skill(surface)}"
+
+    def _pattern_embeddings(self, backend):
+        """Эмбеддинги всех названий и синонимов таксономии (считаются один раз через общий кэш)"""
+        if self._patterns is None:
+            with self._lock:
+                if self._patterns is None:
+                    texts = []
+                    skills = []
+                    for name in self.extractor.skills:
+                        for text in [name] + list(self.extractor.taxonomy[name]):
+                            texts.append(text)
+                            skills.append(name)
+                    self._pattern_skills = skills
+                    self._patterns = get_embedding_cache(backend.cache_name).get_many(texts, backend.encode)
+        return self._patterns
+
+    def _fingerprint(self):
+        """Результат поиска по эмбеддингам зависит от таксономии, модели и порога"""
+        if self._fingerprint_value is None:
+            backend = self.backend or get_embedding_backend()
+            raw = json.dumps([self.extractor.taxonomy, backend.cache_name, self.threshold],
+                             ensure_ascii=False, sort_keys=True)
+            self._fingerprint_value = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+        return self._fingerprint_value
+
+    def get_stats(self):
+        return {
+            "methods": dict(self.methods),
+            "resolved": self._resolved.get_stats(),
+            "nearest": self._nearest.get_stats()
+        }
+
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def get_skill_normalizer():
+    """Общий для процесса нормализатор навыков"""
+    global _normalizer
+    if _normalizer is None:
+        with _normalizer_lock:
+            if _normalizer is None:
+                _normalizer = SkillNormalizer()
+    return _normalizer
\ No newline at end of file
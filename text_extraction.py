@@ -0,0 +1,123 @@
+# services/text_extraction.py
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import docx
+import pdfplumber
+
+from config import Config
+
+
+def _pdf_page_texts(file_path, start, stop):
+    """Текст страниц [start, stop) PDF. Выполняется и в дочерних процессах"""
+    texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            # extract_text - самая дорогая операция, вызываем ее один раз на страницу
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """Общий пул процессов для разбора длинных PDF"""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(max_workers=Config.PDF_EXTRACT_WORKERS)
+    return _process_pool
+
+
+def iter_pages(file_path, pages=None, parallel=None):
+    """Потоковое извлечение текста: фрагменты по мере чтения документа.
+
+    Для PDF фрагмент - страница с переводом строки (пустые страницы пропускаются),
+    для DOCX - абзац, для TXT - блок файла. Склеенные фрагменты дают тот же
+    текст, что и прежнее чтение целиком.
+
+    pages - диапазон страниц PDF (start, stop) с нуля, stop не включается.
+    parallel - разбирать страницы в пуле процессов; по умолчанию включается
+    для PDF длиннее PDF_PARALLEL_MIN_PAGES страниц.
+    """
+    if file_path.endswith('.pdf'):
+        yield from _iter_pdf(file_path, pages, parallel)
+    elif file_path.endswith('.docx'):
+        document = docx.Document(file_path)
+        for i, paragraph in enumerate(document.paragraphs):
+            yield paragraph.text if i == 0 else "\n" + paragraph.text
+    elif file_path.endswith('.txt'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            while True:
+                block = f.read(64 * 1024)
+                if not block:
+                    break
+                yield block
+
+
+def _iter_pdf(file_path, pages, parallel):
+    with pdfplumber.open(file_path) as pdf:
+        total = len(pdf.pages)
+        start, stop = pages or (0, total)
+        start, stop = max(0, start), min(total, stop)
+
+        if parallel is None:
+            parallel = Config.PDF_EXTRACT_WORKERS > 1 and stop - start >= Config.PDF_PARALLEL_MIN_PAGES
+
+        if not parallel:
+            for page in pdf.pages[start:stop]:
+                text = page.extract_text()
+                page.close()
+                if text:
+                    yield text + "\n"
+            return
+
+    # Страницы разбираются пачками в пуле процессов и выдаются по порядку.
+    # В работе не больше двух пачек на процесс: если потребитель остановился
+    # (лимит символов), лишние страницы не разбираются.
+    step = Config.PDF_PAGES_PER_TASK
+    pool = _get_process_pool()
+    starts = iter(range(start, stop, step))
+    in_flight = deque()
+    try:
+        for i in starts:
+            in_flight.append(pool.submit(_pdf_page_texts, file_path, i, min(i + step, stop)))
+            if len(in_flight) >= 2 * Config.PDF_EXTRACT_WORKERS:
+                break
+        while in_flight:
+            texts = in_flight.popleft().result()
+            i = next(starts, None)
+            if i is not None:
+                in_flight.append(pool.submit(_pdf_page_texts, file_path, i, min(i + step, stop)))
+            for text in texts:
+                if text:
+                    yield text + "\n"
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def extract_text(file_path, max_chars=None, pages=None, parallel=None):
+    """Текст документа, не длиннее max_chars символов (None - без ограничения)"""
+    parts = []
+    length = 0
+    stream = iter_pages(file_path, pages=pages, parallel=parallel)
+    try:
+        for part in stream:
+            parts.append(part)
+            length += len(part)
+            if max_chars is not None and length >= max_chars:
+                break
+    except Exception as e:
+        print(f"Ошибка чтения файла: {e}")
+    finally:
+        # Закрываем документ и отменяем задачи пула сразу, не дожидаясь сборщика мусора
+        stream.close()
+
+    text = "".join(parts)
+    return text[:max_chars] if max_chars is not None else text
\ No newline at end of file
@@ -0,0 +1,206 @@
+# services/token_manager.py
+import base64
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from config import Config
+from .http_pool import get_http_pool
+
+# Межпроцессная блокировка файла кэша (на Windows остается только атомарная замена)
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+class TokenManager:
+    """Общий для процесса менеджер access token GigaChat.
+
+    Токен хранится в памяти, одновременно выполняется не более одного
+    обновления (остальные потоки ждут его результат), а фоновый таймер
+    обновляет токен заранее, до наступления expires_at.
+    """
+
+    def __init__(self):
+        self.config = Config
+        self.http_pool = get_http_pool()
+        self._token = None
+        self._expires_at = None
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._timer = None
+        self.refresh_count = 0
+
+        self._load_cache_file()
+        if self.peek_token():
+            self._schedule_refresh()
+        else:
+            # Получаем токен в фоне, не задерживая создание клиентов
+            self._schedule_refresh(delay=0)
+
+    def peek_token(self):
+        """Действующий токен из памяти или None, без обращения к сети"""
+        with self._state_lock:
+            if self._token and self._expires_at and self._expires_at > datetime.now():
+                return self._token
+        return None
+
+    def get_token(self):
+        """Действующий токен. Блокируется, только если токена еще нет"""
+        return self.peek_token() or self.refresh()
+
+    def refresh(self, stale_token=None):
+        """Обновление токена. stale_token - токен, который отверг сервер (401)"""
+        with self._refresh_lock:
+            # Пока ждали блокировку, токен мог обновить другой поток
+            token = self.peek_token()
+            if token and token != stale_token:
+                return token
+
+            with self._cache_file_lock():
+                # ...или другой процесс
+                self._load_cache_file()
+                token = self.peek_token()
+                if not token or token == stale_token:
+                    token = self._request_new_token()
+
+        self._schedule_refresh(None if token else self.config.TOKEN_RETRY_INTERVAL)
+        return token
+
+    def _request_new_token(self):
+        """Запрос нового access token"""
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json',
+            'Authorization': f'Basic {self._get_basic_auth()}',
+            'RqUID': self.config.GIGACHAT_CLIENT_ID,
+        }
+
+        data = {'scope': self.config.GIGACHAT_SCOPE}
+
+        try:
+            response = self.http_pool.post(
+                self.config.GIGACHAT_AUTH_URL,
+                headers=headers,
+                data=data,
+                verify=False,
+                timeout=30
+            )
+
+            if response.status_code == 200:
+                token_data = response.json()
+                expires_in = token_data.get('expires_in', 1800)
+                expires_at = datetime.now() + timedelta(seconds=expires_in - 300)
+
+                with self._state_lock:
+                    self._token = token_data['access_token']
+                    self._expires_at = expires_at
+                    self.refresh_count += 1
+
+                self._write_cache_file()
+                return self._token
+
+            print(f"Ошибка авторизации: {response.status_code}")
+
+        except Exception as e:
+            print(f"Ошибка при получении токена: {e}")
+
+        return None
+
+    def _get_basic_auth(self):
+        """Создание Basic Auth заголовка"""
+        credentials = f"{self.config.GIGACHAT_CLIENT_ID}:{self.config.GIGACHAT_CLIENT_SECRET}"
+        return base64.b64encode(credentials.encode()).decode()
+
+    def _schedule_refresh(self, delay=None):
+        """Планирование фонового обновления до истечения токена"""
+        with self._state_lock:
+            if delay is None:
+                if self._token and self._expires_at:
+                    delay = (self._expires_at - datetime.now()).total_seconds() - self.config.TOKEN_REFRESH_AHEAD
+                else:
+                    # Предыдущая попытка не удалась - повторим позже
+                    delay = self.config.TOKEN_RETRY_INTERVAL
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(delay, 0), self._background_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self):
+        """Обновление токена в фоновом потоке"""
+        with self._state_lock:
+            current = self._token
+        self.refresh(stale_token=current)
+
+    def _load_cache_file(self):
+        """Чтение токена из файлового кэша"""
+        if not os.path.exists(self.config.TOKEN_CACHE_FILE):
+            return
+
+        try:
+            with open(self.config.TOKEN_CACHE_FILE, 'r') as f:
+                token_data = json.load(f)
+            expires_at = datetime.fromisoformat(token_data['expires_at'])
+            with self._state_lock:
+                if not self._expires_at or expires_at > self._expires_at:
+                    self._token = token_data['access_token']
+                    self._expires_at = expires_at
+        except:
+            pass
+
+    def _write_cache_file(self):
+        """Атомарная запись кэша: временный файл + os.replace"""
+        with self._state_lock:
+            cache_data = {
+                'access_token': self._token,
+                'expires_at': self._expires_at.isoformat()
+            }
+
+        cache_dir = os.path.dirname(os.path.abspath(self.config.TOKEN_CACHE_FILE))
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.token-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cache_data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config.TOKEN_CACHE_FILE)
+        except Exception as e:
+            print(f"Ошибка сохранения токена: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @contextmanager
+    def _cache_file_lock(self):
+        """Блокировка обновления токена между процессами"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+
+        with open(f"{self.config.TOKEN_CACHE_FILE}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_token_manager = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager():
+    """Общий для процесса менеджер токенов"""
+    global _token_manager
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                _token_manager = TokenManager()
+    return _token_manager
\ No newline at end of file
@@ -6,6 +6,8 @@ from config import Config
 import os
 import json
 import threading
+import queue
+import re
 from datetime import datetime
 
 # Vosk для оффлайн распознавания
@@ -79,6 +81,45 @@ class VoiceService:
         except Exception as e:
             print(f"❌ Ошибка синтеза речи: {e}")
 
+    def speak_stream(self, chunks):
+        """Озвучивание потокового текста по предложениям.
+
+        Первое предложение начинает звучать, пока остальной текст еще генерируется.
+        Возвращает значение, которым завершился генератор chunks.
+        """
+        sentences = queue.Queue()
+        result = {}
+
+        def produce():
+            buffer = ""
+            try:
+                while True:
+                    try:
+                        buffer += next(chunks)
+                    except StopIteration as stop:
+                        result['value'] = stop.value
+                        break
+
+                    # Отдаем на озвучивание все завершенные предложения
+                    parts = re.split(r'(?<=[.!?])\s+', buffer)
+                    for sentence in parts[:-1]:
+                        sentences.put(sentence)
+                    buffer = parts[-1]
+            finally:
+                if buffer.strip():
+                    sentences.put(buffer)
+                sentences.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        while True:
+            sentence = sentences.get()
+            if sentence is None:
+                break
+            self.text_to_speech(sentence.strip())
+
+        return result.get('value')
+
     def speech_to_text_vosk(self, timeout=15):
         """Оффлайн распознавание через Vosk с pyaudio"""
         if not self.vosk_model or not self.audio: